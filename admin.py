@@ -3,7 +3,6 @@
 英语学习机器人数据库管理工具 - 简化版
 """
 
-import sqlite3
 import sys
 import os
 from datetime import datetime, timedelta
@@ -12,22 +11,19 @@ from datetime import datetime, timedelta
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from bot.models.database import db_manager
+from bot.utils.config import Config
 from loguru import logger
 
 def show_user_list():
     """显示所有用户列表"""
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            SELECT u.chat_id, u.username, u.first_name, u.created_at, u.last_activity, s.auto_send_enabled
-            FROM users u
-            LEFT JOIN user_settings s ON u.chat_id = s.chat_id
-            ORDER BY u.last_activity DESC
-        ''')
-        
-        users = cursor.fetchall()
+        with db_manager.get_connection() as conn:
+            users = conn.execute('''
+                SELECT u.chat_id, u.username, u.first_name, u.created_at, u.last_activity, s.auto_send_enabled
+                FROM users u
+                LEFT JOIN user_settings s ON u.chat_id = s.chat_id
+                ORDER BY u.last_activity DESC
+            ''').fetchall()
         
         print("\n📊 用户列表:")
         print("-" * 80)
@@ -50,8 +46,6 @@ def show_user_list():
         
     except Exception as e:
         print(f"查询用户列表失败: {e}")
-    finally:
-        conn.close()
 
 def show_user_stats(chat_id=None):
     """显示用户统计信息"""
@@ -59,47 +53,46 @@ def show_user_stats(chat_id=None):
         # 显示特定用户的详细统计
         stats = db_manager.get_user_stats(int(chat_id))
         settings = db_manager.get_user_settings(int(chat_id))
-        recent_count = db_manager.get_user_word_count(int(chat_id), days=7)
         
         print(f"\n📊 用户 {chat_id} 的详细统计:")
         print("-" * 40)
         print(f"总学习单词: {stats['total_words']} 个")
         print(f"今日学习: {stats['today_words']} 个")
-        print(f"最近7天: {recent_count} 个")
+        print(f"最近7天: {stats['week_words']} 个")
         print(f"已翻译: {stats['translated_words']} 个")
         print(f"自动发送: {'开启' if settings['auto_send_enabled'] else '关闭'}")
         print(f"发送间隔: {settings['interval_min']}-{settings['interval_max']} 秒")
     else:
         # 显示全体用户统计
-        conn = db_manager.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            # 总用户数
-            cursor.execute('SELECT COUNT(*) FROM users')
-            total_users = cursor.fetchone()[0]
-            
-            # 活跃用户数（最近7天有活动）
-            week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S')
-            cursor.execute('SELECT COUNT(*) FROM users WHERE last_activity >= ?', (week_ago,))
-            active_users = cursor.fetchone()[0]
-            
-            # 开启自动发送的用户数
-            cursor.execute('SELECT COUNT(*) FROM user_settings WHERE auto_send_enabled = 1')
-            auto_users = cursor.fetchone()[0]
-            
-            # 总学习单词数
-            cursor.execute('SELECT COUNT(*) FROM word_history')
-            total_words = cursor.fetchone()[0]
-            
-            # 今日学习单词数
-            today = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute('SELECT COUNT(*) FROM word_history WHERE DATE(created_at) = ?', (today,))
-            today_words = cursor.fetchone()[0]
-            
-            # 翻译缓存数量
-            cursor.execute('SELECT COUNT(*) FROM translation_cache')
-            cached_translations = cursor.fetchone()[0]
+            with db_manager.get_connection() as conn:
+                cursor = conn.cursor()
+                
+                # 总用户数
+                cursor.execute('SELECT COUNT(*) FROM users')
+                total_users = cursor.fetchone()[0]
+                
+                # 活跃用户数（最近7天有活动）
+                week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S')
+                cursor.execute('SELECT COUNT(*) FROM users WHERE last_activity >= ?', (week_ago,))
+                active_users = cursor.fetchone()[0]
+                
+                # 开启自动发送的用户数
+                cursor.execute('SELECT COUNT(*) FROM user_settings WHERE auto_send_enabled = 1')
+                auto_users = cursor.fetchone()[0]
+                
+                # 总学习单词数
+                cursor.execute('SELECT COUNT(*) FROM word_history')
+                total_words = cursor.fetchone()[0]
+                
+                # 今日学习单词数
+                today = datetime.now().strftime('%Y-%m-%d')
+                cursor.execute('SELECT COALESCE(SUM(total), 0) FROM user_daily_stats WHERE day = ?', (today,))
+                today_words = cursor.fetchone()[0]
+                
+                # 翻译缓存数量
+                cursor.execute('SELECT COUNT(*) FROM translation_cache')
+                cached_translations = cursor.fetchone()[0]
             
             print("\n📊 全体用户统计:")
             print("-" * 40)
@@ -109,27 +102,23 @@ def show_user_stats(chat_id=None):
             print(f"总学习单词数: {total_words}")
             print(f"今日学习单词: {today_words}")
             print(f"翻译缓存: {cached_translations} 个")
+            for source, kind, count in db_manager.get_translation_cache_breakdown():
+                print(f"  {source}/{kind}: {count} 个")
             
         except Exception as e:
             print(f"查询统计信息失败: {e}")
-        finally:
-            conn.close()
 
 def show_popular_words(limit=10):
     """显示最受欢迎的单词"""
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            SELECT word, COUNT(*) as count
-            FROM word_history
-            GROUP BY word
-            ORDER BY count DESC
-            LIMIT ?
-        ''', (limit,))
-        
-        words = cursor.fetchall()
+        with db_manager.get_connection() as conn:
+            words = conn.execute('''
+                SELECT word, COUNT(*) as count
+                FROM word_history
+                GROUP BY word
+                ORDER BY count DESC
+                LIMIT ?
+            ''', (limit,)).fetchall()
         
         print(f"\n📚 最受欢迎的 {limit} 个单词:")
         print("-" * 30)
@@ -141,35 +130,43 @@ def show_popular_words(limit=10):
             
     except Exception as e:
         print(f"查询热门单词失败: {e}")
-    finally:
-        conn.close()
 
 def clean_old_data(days=30):
     """清理旧数据"""
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    
     try:
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
         
-        # 清理旧的单词历史记录
-        cursor.execute('DELETE FROM word_history WHERE created_at < ?', (cutoff_date,))
-        deleted_words = cursor.rowcount
+        with db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # 清理旧的单词历史记录
+            cursor.execute('DELETE FROM word_history WHERE created_at < ?', (cutoff_date,))
+            deleted_words = cursor.rowcount
+            
+            # 同步清理对应日期的每日统计汇总
+            cursor.execute('DELETE FROM user_daily_stats WHERE day < ?', (cutoff_date[:10],))
+            
+            # 清理使用次数少的翻译缓存
+            cursor.execute('DELETE FROM translation_cache WHERE usage_count = 1 AND created_at < ?', (cutoff_date,))
+            deleted_cache = cursor.rowcount
         
-        # 清理使用次数少的翻译缓存
-        cursor.execute('DELETE FROM translation_cache WHERE usage_count = 1 AND created_at < ?', (cutoff_date,))
-        deleted_cache = cursor.rowcount
+        # 清理已过期的翻译缓存
+        expired_cache = db_manager.purge_expired_translations()
         
-        conn.commit()
         print(f"\n🧹 数据清理完成:")
         print(f"删除 {days} 天前的单词记录: {deleted_words} 条")
         print(f"删除低使用率的缓存: {deleted_cache} 条")
+        print(f"删除已过期的缓存: {expired_cache} 条")
         
     except Exception as e:
         print(f"数据清理失败: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+
+def invalidate_cache(source, kind=None):
+    """按来源（可再限定类型）清除翻译缓存"""
+    deleted = db_manager.invalidate_translations(source, kind)
+    target = f"{source}/{kind}" if kind else source
+    print(f"\n🧹 已清除 {target} 的翻译缓存: {deleted} 条")
+    print(f"运行中的机器人内存缓存最迟 {Config.get_translation_memory_ttl()} 秒后失效")
 
 def main():
     if len(sys.argv) < 2:
@@ -178,6 +175,7 @@ def main():
         print("  python admin.py stats [chat_id] - 显示统计信息")
         print("  python admin.py popular [数量]   - 显示热门单词")
         print("  python admin.py clean [天数]     - 清理旧数据")
+        print("  python admin.py invalidate <来源> [类型] - 清除翻译缓存（来源: ecdict / ollama，类型: dict / ai / not_found / suggestion）")
         return
     
     command = sys.argv[1]
@@ -193,6 +191,9 @@ def main():
     elif command == "clean":
         days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
         clean_old_data(days)
+    elif command == "invalidate" and len(sys.argv) > 2:
+        kind = sys.argv[3] if len(sys.argv) > 3 else None
+        invalidate_cache(sys.argv[2], kind)
     else:
         print(f"未知命令: {command}")
 
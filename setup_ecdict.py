@@ -10,6 +10,7 @@ from loguru import logger
 # 添加 ECDICT 路径
 ECDICT_PATH = os.path.join(os.path.dirname(__file__), 'data/ecdict')
 sys.path.insert(0, ECDICT_PATH)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
     import stardict
@@ -20,6 +21,8 @@ except ImportError as e:
 
 def convert_csv_to_sqlite():
     """将 CSV 数据转换为 SQLite 数据库"""
+    from bot.dictionary.ecdict_convert import convert_csv
+
     csv_path = os.path.join(ECDICT_PATH, 'ecdict.csv')
     sqlite_path = os.path.join(ECDICT_PATH, 'ecdict.db')
     
@@ -30,15 +33,83 @@ def convert_csv_to_sqlite():
     logger.info(f"开始转换 {csv_path} -> {sqlite_path}")
     
     try:
-        # 使用 ECDICT 提供的转换函数
-        stardict.convert_dict(sqlite_path, csv_path)
-        logger.info("转换完成！")
+        # 流式批量导入，中断后再次执行会从检查点继续
+        convert_csv(csv_path, sqlite_path)
         return True
     except Exception as e:
         logger.error(f"转换失败: {e}")
         return False
 
 
+def build_binary_dict():
+    """将 SQLite 数据库编译为内存映射的二进制词典"""
+    from bot.dictionary.ecdict_binary import build_binary
+
+    sqlite_path = os.path.join(ECDICT_PATH, 'ecdict.db')
+    binary_path = os.path.join(ECDICT_PATH, 'ecdict.bin')
+
+    if not os.path.exists(sqlite_path):
+        logger.error(f"SQLite 文件不存在，请先执行 --convert: {sqlite_path}")
+        return False
+
+    logger.info(f"开始生成二进制词典 {sqlite_path} -> {binary_path}")
+
+    try:
+        build_binary(sqlite_path, binary_path)
+        return True
+    except Exception as e:
+        logger.error(f"生成二进制词典失败: {e}")
+        return False
+
+
+def build_lemma():
+    """根据 exchange 字段生成变形词到原型的反向索引"""
+    from bot.dictionary.lemma_index import build_lemma_index
+
+    sqlite_path = os.path.join(ECDICT_PATH, 'ecdict.db')
+    lemma_path = os.path.join(ECDICT_PATH, 'ecdict.lemma')
+
+    if not os.path.exists(sqlite_path):
+        logger.error(f"SQLite 文件不存在，请先执行 --convert: {sqlite_path}")
+        return False
+
+    logger.info(f"开始生成词形索引 {sqlite_path} -> {lemma_path}")
+
+    try:
+        build_lemma_index(sqlite_path, lemma_path)
+        return True
+    except Exception as e:
+        logger.error(f"生成词形索引失败: {e}")
+        return False
+
+
+def build_tags():
+    """生成虚拟单词表使用的考试标签表和数值列索引"""
+    import sqlite3
+    from bot.dictionary.ecdict_convert import build_filter_indexes
+
+    sqlite_path = os.path.join(ECDICT_PATH, 'ecdict.db')
+
+    if not os.path.exists(sqlite_path):
+        logger.error(f"SQLite 文件不存在，请先执行 --convert: {sqlite_path}")
+        return False
+
+    logger.info(f"开始生成筛选索引 {sqlite_path}")
+
+    try:
+        conn = sqlite3.connect(sqlite_path, isolation_level=None)
+        try:
+            count = build_filter_indexes(conn)
+            conn.execute("ANALYZE")
+        finally:
+            conn.close()
+        logger.info(f"筛选索引已生成: {count:,} 个标签")
+        return True
+    except Exception as e:
+        logger.error(f"生成筛选索引失败: {e}")
+        return False
+
+
 def check_database_status():
     """检查数据库状态"""
     csv_path = os.path.join(ECDICT_PATH, 'ecdict.csv')
@@ -68,11 +139,46 @@ def check_database_status():
                 logger.info(f"🔍 测试查询 'hello': ✅")
             else:
                 logger.warning(f"🔍 测试查询 'hello': ❌")
+            
+            # 词典分类单词表依赖的标签表
+            import sqlite3
+            conn = sqlite3.connect(f'file:{sqlite_path}?mode=ro', uri=True)
+            try:
+                has_tags = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stardict_tag'"
+                ).fetchone() is not None
+            finally:
+                conn.close()
+            if has_tags:
+                logger.info("✅ 筛选索引: stardict_tag")
+            else:
+                logger.info("ℹ️ 筛选索引未生成（词典分类单词表需要，使用 --build-tags 生成）")
         except Exception as e:
             logger.error(f"数据库测试失败: {e}")
     else:
         logger.warning(f"❌ SQLite 文件不存在: {sqlite_path}")
 
+    binary_path = os.path.join(ECDICT_PATH, 'ecdict.bin')
+    if os.path.exists(binary_path):
+        size_mb = os.path.getsize(binary_path) / (1024 * 1024)
+        logger.info(f"✅ 二进制词典: {binary_path} ({size_mb:.1f} MB)")
+    else:
+        logger.info(f"ℹ️ 二进制词典未生成（可选，使用 --build-binary 生成）: {binary_path}")
+
+    lemma_path = os.path.join(ECDICT_PATH, 'ecdict.lemma')
+    if os.path.exists(lemma_path):
+        size_mb = os.path.getsize(lemma_path) / (1024 * 1024)
+        logger.info(f"✅ 词形索引: {lemma_path} ({size_mb:.1f} MB)")
+    else:
+        logger.info(f"ℹ️ 词形索引未生成（可选，使用 --build-lemma 生成）: {lemma_path}")
+
+    suggest_path = os.path.join(ECDICT_PATH, 'ecdict.suggest')
+    if os.path.exists(suggest_path):
+        size_mb = os.path.getsize(suggest_path) / (1024 * 1024)
+        logger.info(f"✅ 拼写纠错索引: {suggest_path} ({size_mb:.1f} MB)")
+    else:
+        logger.info(f"ℹ️ 拼写纠错索引未生成（服务首次启动时自动生成）: {suggest_path}")
+
 
 if __name__ == "__main__":
     import argparse
@@ -80,11 +186,20 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='ECDICT 数据库管理工具')
     parser.add_argument('--convert', action='store_true', help='转换 CSV 到 SQLite')
     parser.add_argument('--status', action='store_true', help='检查数据库状态')
+    parser.add_argument('--build-binary', action='store_true', help='生成内存映射的二进制词典 ecdict.bin')
+    parser.add_argument('--build-lemma', action='store_true', help='生成变形词到原型的反向索引 ecdict.lemma')
+    parser.add_argument('--build-tags', action='store_true', help='生成词典分类单词表使用的考试标签表和索引')
     
     args = parser.parse_args()
     
     if args.convert:
         convert_csv_to_sqlite()
+    elif args.build_binary:
+        build_binary_dict()
+    elif args.build_lemma:
+        build_lemma()
+    elif args.build_tags:
+        build_tags()
     elif args.status:
         check_database_status()
     else:
@@ -96,5 +211,6 @@ if __name__ == "__main__":
         
         if not os.path.exists(sqlite_path) and os.path.exists(csv_path):
             logger.info("SQLite 数据库不存在，开始自动转换...")
-            convert_csv_to_sqlite()
+            if convert_csv_to_sqlite():
+                build_lemma()
             check_database_status()
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+词典数据格式模块 - ECDICT 的 SQLite 转换、二进制词典、词形索引和拼写建议索引
+只依赖标准库和 loguru，不导入机器人的其他模块，setup_ecdict.py 构建词典时导入不会创建数据库或加载服务
+"""
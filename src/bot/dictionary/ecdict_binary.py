@@ -0,0 +1,236 @@
+"""
+ECDICT 内存映射二进制词典
+由 setup_ecdict.py --build-binary 从 ecdict.db 生成的只读文件，
+运行时通过 mmap 直接访问，多个进程共享同一份物理内存，启动无需加载
+
+文件布局（本机字节序，各段 8 字节对齐）:
+    头部: 魔数、格式版本、字节序标记、词条数、源数据库签名 (大小, 修改时间)、段表 (offset, length) * N
+    key_offsets / keys / key_records: 按字节序排好的小写词头及其记录号（HeadwordIndex）
+    rowids: 每条记录在 ecdict.db 中的 id
+    collins / oxford / bnc / frq: 定长 int32 数值列
+    <列>_offsets / <列>: 变长字符串列，按偏移量寻址的 UTF-8 字节块
+"""
+import json
+import mmap
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import time
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from .headword_index import HeadwordIndex
+
+
+MAGIC = b'ECDICTB\x00'
+FORMAT_VERSION = 2
+BYTE_ORDER_MARK = 0x01020304
+
+# 定长数值列
+NUMERIC_COLUMNS = ('collins', 'oxford', 'bnc', 'frq')
+
+# 变长字符串列
+TEXT_COLUMNS = ('word', 'phonetic', 'definition', 'translation', 'pos', 'tag', 'exchange', 'detail', 'audio')
+
+SECTIONS = (
+    ('key_offsets', 'keys', 'key_records', 'rowids')
+    + NUMERIC_COLUMNS
+    + tuple(name for column in TEXT_COLUMNS for name in (f'{column}_offsets', column))
+)
+
+_HEADER = struct.Struct('=8sIIIQQ')
+_SECTION = struct.Struct('=QQ')
+_ALIGN = 8
+
+# 偏移量使用 uint32，单个字符串块不能超过 4GB
+_MAX_OFFSET = 0xFFFFFFFF
+
+
+def source_signature(sqlite_path: str) -> Tuple[int, int]:
+    """源数据库的签名 (大小, 修改时间)，重新转换 ecdict.db 后随之改变"""
+    stat = os.stat(sqlite_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _header_size() -> int:
+    size = _HEADER.size + _SECTION.size * len(SECTIONS)
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def build_binary(sqlite_path: str, output_path: str) -> int:
+    """从 ECDICT SQLite 数据库生成二进制词典，返回写入的词条数
+
+    先写入 output_path.part，完成后原子替换，生成过程中断不会留下损坏的文件
+    """
+    started = time.perf_counter()
+    signature = source_signature(sqlite_path)
+    conn = sqlite3.connect(f'file:{sqlite_path}?mode=ro', uri=True)
+    rowids = array('I')
+    numeric = {column: array('i') for column in NUMERIC_COLUMNS}
+    text_offsets = {column: array('I', [0]) for column in TEXT_COLUMNS}
+    text_files = {column: tempfile.TemporaryFile() for column in TEXT_COLUMNS}
+    text_sizes = dict.fromkeys(TEXT_COLUMNS, 0)
+    pairs = []
+
+    try:
+        cursor = conn.execute(
+            f"SELECT id, {', '.join(NUMERIC_COLUMNS + TEXT_COLUMNS)} FROM stardict ORDER BY id"
+        )
+        # 按 id 顺序流式读取，字符串列直接写入临时文件
+        for record, row in enumerate(cursor):
+            rowids.append(row[0])
+            for column, value in zip(NUMERIC_COLUMNS, row[1:1 + len(NUMERIC_COLUMNS)]):
+                numeric[column].append(int(value or 0))
+            for column, value in zip(TEXT_COLUMNS, row[1 + len(NUMERIC_COLUMNS):]):
+                data = (value or '').encode('utf-8')
+                text_files[column].write(data)
+                text_sizes[column] += len(data)
+                if text_sizes[column] > _MAX_OFFSET:
+                    raise ValueError(f"字符串列 {column} 超过 4GB")
+                text_offsets[column].append(text_sizes[column])
+            pairs.append((row[1 + len(NUMERIC_COLUMNS)], record))
+    finally:
+        conn.close()
+
+    index = HeadwordIndex.from_pairs(pairs)
+    del pairs
+
+    sections = {
+        'key_offsets': index.offsets,
+        'keys': index.blob,
+        'key_records': index.ids,
+        'rowids': rowids,
+    }
+    sections.update(numeric)
+    for column in TEXT_COLUMNS:
+        sections[f'{column}_offsets'] = text_offsets[column]
+        sections[column] = text_files[column]
+
+    part_path = output_path + '.part'
+    try:
+        with open(part_path, 'wb') as out:
+            out.write(b'\x00' * _header_size())
+            table = []
+            for name in SECTIONS:
+                # 各段按 8 字节对齐，保证 memoryview.cast 可用
+                out.write(b'\x00' * (-out.tell() % _ALIGN))
+                offset = out.tell()
+                data = sections[name]
+                if hasattr(data, 'seek'):
+                    data.seek(0)
+                    shutil.copyfileobj(data, out, 1024 * 1024)
+                else:
+                    out.write(data)
+                table.append((offset, out.tell() - offset))
+
+            out.seek(0)
+            out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, len(rowids), *signature))
+            for offset, length in table:
+                out.write(_SECTION.pack(offset, length))
+        os.replace(part_path, output_path)
+    finally:
+        for f in text_files.values():
+            f.close()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    logger.info(
+        f"二进制词典已生成: {output_path} ({len(rowids)} 条, "
+        f"{os.path.getsize(output_path) / 1024 / 1024:.1f}MB, {time.perf_counter() - started:.1f}s)"
+    )
+    return len(rowids)
+
+
+class BinaryDict:
+    """只读的内存映射词典，接口与 stardict.StarDict 的 query / match / count 保持一致"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, bom, count, source_size, source_mtime = _HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"不是 ECDICT 二进制词典: {path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"二进制词典格式版本不匹配: {version} != {FORMAT_VERSION}")
+        if bom != BYTE_ORDER_MARK:
+            raise ValueError("二进制词典字节序与本机不一致，请重新生成")
+        self._count = count
+        # 生成时 ecdict.db 的签名，与当前文件不一致说明词典已重新转换
+        self.source_signature = (source_size, source_mtime)
+
+        self._sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = _SECTION.unpack_from(self._view, _HEADER.size + i * _SECTION.size)
+            self._sections[name] = self._view[offset:offset + length]
+
+        self.index = HeadwordIndex(
+            self._sections['keys'],
+            self._sections['key_offsets'].cast('I'),
+            self._sections['key_records'].cast('I'),
+        )
+        self._rowids = self._sections['rowids'].cast('I')
+        self._numeric = {column: self._sections[column].cast('i') for column in NUMERIC_COLUMNS}
+        self._text_offsets = {column: self._sections[f'{column}_offsets'].cast('I') for column in TEXT_COLUMNS}
+
+    def count(self) -> int:
+        """词条数量"""
+        return self._count
+
+    def _text(self, column: str, record: int) -> str:
+        offsets = self._text_offsets[column]
+        return str(self._sections[column][offsets[record]:offsets[record + 1]], 'utf-8')
+
+    def scan(self, columns: Tuple[str, ...]) -> Iterator[tuple]:
+        """按记录顺序遍历指定列（只解码需要的字段）"""
+        for record in range(self._count):
+            yield tuple(
+                self._numeric[column][record] if column in self._numeric else self._text(column, record)
+                for column in columns
+            )
+
+    def record(self, record: int) -> Dict[str, Any]:
+        """读取第 record 条记录，字段与 stardict.StarDict.query 返回的字典一致"""
+        data = {'id': self._rowids[record]}
+        for column in TEXT_COLUMNS:
+            data[column] = self._text(column, record)
+        for column in NUMERIC_COLUMNS:
+            data[column] = self._numeric[column][record]
+        data['detail'] = json.loads(data['detail']) if data['detail'] else None
+        return data
+
+    def query(self, word: Union[str, int]) -> Optional[Dict[str, Any]]:
+        """精确查询单词（也接受记录号）"""
+        if isinstance(word, int):
+            return self.record(word) if 0 <= word < self._count else None
+        record = self.index.lookup(word)
+        if record is None:
+            return None
+        return self.record(record)
+
+    def match(self, word: str, limit: int = 10, strip: bool = False) -> List[Tuple[int, str]]:
+        """按字典序返回从 word 开始的若干词头 [(记录号, 单词)]"""
+        target = word.strip().lower().encode('utf-8')
+        start = self.index._search(target)
+        end = min(start + limit, len(self.index))
+        results = []
+        for pos in range(start, end):
+            record = self.index.ids[pos]
+            results.append((record, self._text('word', record)))
+        return results
+
+    def close(self):
+        """释放内存映射（先释放所有派生的 memoryview）"""
+        views = [self.index.offsets, self.index.ids, self._rowids]
+        views += list(self._numeric.values()) + list(self._text_offsets.values())
+        views += list(self._sections.values()) + [self._view]
+        for view in views:
+            view.release()
+        self._sections.clear()
+        self._mmap.close()
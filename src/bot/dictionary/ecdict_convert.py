@@ -0,0 +1,264 @@
+"""
+ECDICT CSV -> SQLite 转换
+流式读取 ecdict.csv，按块批量写入 ecdict.db.part（大事务、关闭同步和日志），
+载入期间表上只有主键，单词唯一索引和二级索引在载入完成后创建，然后执行 ANALYZE，最后原子替换为 ecdict.db
+
+每个块提交时在同一事务中记录检查点（已读取的 CSV 行数和最后写入的 id），转换中断后再次执行时
+先删除检查点之后残留的行，再从检查点继续；CSV 文件有变化或中间文件损坏时从头开始
+"""
+import csv
+import os
+import re
+import sqlite3
+import sys
+import time
+from operator import itemgetter
+from typing import Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+
+# 与 stardict.StarDict 创建的表结构一致，只是 word 的唯一约束改为载入完成后创建的 stardict_2 唯一索引，
+# id 是 rowid 主键，不再需要额外的唯一约束
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS "stardict" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "word" VARCHAR(64) COLLATE NOCASE NOT NULL,
+    "sw" VARCHAR(64) COLLATE NOCASE NOT NULL,
+    "phonetic" VARCHAR(64),
+    "definition" TEXT,
+    "translation" TEXT,
+    "pos" VARCHAR(16),
+    "collins" INTEGER DEFAULT(0),
+    "oxford" INTEGER DEFAULT(0),
+    "tag" VARCHAR(64),
+    "bnc" INTEGER DEFAULT(NULL),
+    "frq" INTEGER DEFAULT(NULL),
+    "exchange" TEXT,
+    "detail" TEXT,
+    "audio" TEXT
+);
+CREATE TABLE IF NOT EXISTS "build_checkpoint" (
+    "id" INTEGER PRIMARY KEY CHECK (id = 1),
+    "csv_size" INTEGER NOT NULL,
+    "csv_mtime" INTEGER NOT NULL,
+    "rows_read" INTEGER NOT NULL,
+    "last_id" INTEGER NOT NULL
+);
+'''
+
+# 词条载入完成后再创建的索引
+INDEXES = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS "stardict_2" ON stardict (word)',
+    'CREATE INDEX IF NOT EXISTS "stardict_3" ON stardict (sw, word collate nocase)',
+    'CREATE INDEX IF NOT EXISTS "sd_1" ON stardict (word collate nocase)',
+)
+
+COLUMNS = ('word', 'sw', 'phonetic', 'definition', 'translation', 'pos', 'collins', 'oxford',
+           'tag', 'bnc', 'frq', 'exchange', 'detail', 'audio')
+
+# ecdict.csv 中的列
+CSV_COLUMNS = tuple(name for name in COLUMNS if name != 'sw')
+
+INSERT_SQL = (
+    f"INSERT INTO stardict ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(COLUMNS))})"
+)
+
+_NON_ALNUM = re.compile(r'[\W_]+')
+
+# 虚拟单词表筛选用的二级索引：考试标签拆分到 stardict_tag 表，数值列直接建索引
+FILTER_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS "stardict_tag" (
+    "tag" VARCHAR(16) NOT NULL,
+    "word_id" INTEGER NOT NULL,
+    PRIMARY KEY ("tag", "word_id")
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS "idx_stardict_collins" ON stardict (collins);
+CREATE INDEX IF NOT EXISTS "idx_stardict_oxford" ON stardict (oxford);
+CREATE INDEX IF NOT EXISTS "idx_stardict_frq" ON stardict (frq);
+'''
+
+# 每个事务写入的行数
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def strip_word(word: str) -> str:
+    """生成 sw 列（与 stardict.stripword 相同：只保留字母数字并转小写）"""
+    return _NON_ALNUM.sub('', word).lower()
+
+
+def _unescape(text: str) -> str:
+    """还原 CSV 中转义的换行（与 stardict.DictCsv 相同）"""
+    if '\\' not in text:
+        return text
+    return text.replace('\\n', '\n').replace('\\\\', '\\')
+
+
+def _to_int(text: str, default: Optional[int]) -> Optional[int]:
+    try:
+        return int(text) if text else default
+    except ValueError:
+        return default
+
+
+def _csv_signature(csv_path: str) -> Tuple[int, int]:
+    stat = os.stat(csv_path)
+    return stat.st_size, int(stat.st_mtime)
+
+
+def read_rows(csv_path: str, skip: int = 0) -> Iterator[Tuple[int, Optional[tuple]]]:
+    """流式读取 CSV，逐行返回 (已读取行数, 待插入的行)，空行返回 None；跳过前 skip 行数据"""
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader)]
+        # 缺少的列指向末尾补上的空字段
+        positions = [header.index(name) if name in header else len(header) for name in CSV_COLUMNS]
+        pick = itemgetter(*positions)
+
+        for rows_read, fields in enumerate(reader, 1):
+            if rows_read <= skip:
+                continue
+            missing = len(header) + 1 - len(fields)
+            if missing > 0:
+                fields.extend([''] * missing)
+            (word, phonetic, definition, translation, pos, collins, oxford,
+             tag, bnc, frq, exchange, detail, audio) = pick(fields)
+            word = _unescape(word).strip()
+            if not word:
+                yield rows_read, None
+                continue
+            yield rows_read, (
+                word,
+                strip_word(word),
+                _unescape(phonetic),
+                _unescape(definition),
+                _unescape(translation),
+                _unescape(pos),
+                _to_int(collins, 0),
+                _to_int(oxford, 0),
+                tag,
+                _to_int(bnc, None),
+                _to_int(frq, None),
+                exchange,
+                _unescape(detail) or None,
+                audio,
+            )
+
+
+def _open_part(part_path: str, signature: Tuple[int, int]) -> Tuple[sqlite3.Connection, int]:
+    """打开中间文件，返回 (连接, 检查点行数)；检查点不匹配或文件损坏时重新创建"""
+    if os.path.exists(part_path):
+        try:
+            conn = sqlite3.connect(part_path, isolation_level=None)
+            row = conn.execute(
+                "SELECT csv_size, csv_mtime, rows_read, last_id FROM build_checkpoint WHERE id = 1"
+            ).fetchone()
+            if row and tuple(row[:2]) == signature and conn.execute("PRAGMA quick_check").fetchone()[0] == 'ok':
+                # journal_mode=OFF 下中断的事务无法回滚，删除检查点之后写入的部分行
+                conn.execute("DELETE FROM stardict WHERE id > ?", (row[3],))
+                return conn, row[2]
+            conn.close()
+            logger.info("CSV 文件已变化或检查点无效，重新开始转换")
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"中间文件已损坏，重新开始转换: {e}")
+        os.remove(part_path)
+
+    conn = sqlite3.connect(part_path, isolation_level=None)
+    conn.executescript(SCHEMA)
+    conn.execute(
+        "INSERT INTO build_checkpoint (id, csv_size, csv_mtime, rows_read, last_id) VALUES (1, ?, ?, 0, 0)",
+        signature
+    )
+    return conn, 0
+
+
+def _write_chunk(conn: sqlite3.Connection, rows: List[tuple], rows_read: int):
+    """在一个事务中写入一块数据并更新检查点（记录最后写入的 id，恢复时删除其后的残留行）"""
+    conn.execute("BEGIN")
+    conn.executemany(INSERT_SQL, rows)
+    conn.execute(
+        "UPDATE build_checkpoint SET rows_read = ?, last_id = (SELECT IFNULL(MAX(id), 0) FROM stardict) WHERE id = 1",
+        (rows_read,)
+    )
+    conn.execute("COMMIT")
+
+
+def build_filter_indexes(conn: sqlite3.Connection) -> int:
+    """生成 stardict_tag 表和数值列索引（可重复执行），返回标签行数"""
+    conn.executescript(FILTER_SCHEMA)
+    rows = [
+        (tag, word_id)
+        for word_id, tags in conn.execute("SELECT id, tag FROM stardict WHERE tag IS NOT NULL AND tag != ''")
+        for tag in set(tags.split())
+    ]
+    conn.execute("BEGIN")
+    conn.execute("DELETE FROM stardict_tag")
+    conn.executemany("INSERT INTO stardict_tag (tag, word_id) VALUES (?, ?)", rows)
+    conn.execute("COMMIT")
+    return conn.execute("SELECT COUNT(*) FROM stardict_tag").fetchone()[0]
+
+
+def convert_csv(csv_path: str, sqlite_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """将 ECDICT CSV 转换为 SQLite 数据库，返回词条数
+
+    中间结果写入 sqlite_path.part，中断后再次调用会从检查点继续
+    """
+    started = time.perf_counter()
+    part_path = sqlite_path + '.part'
+    conn, skip = _open_part(part_path, _csv_signature(csv_path))
+    if skip:
+        logger.info(f"从检查点继续转换: 已处理 {skip:,} 行")
+
+    try:
+        # 构建期间不需要崩溃保护，检查点只依赖事务提交
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA cache_size=-262144")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        rows = []
+        rows_read = skip
+        loaded = 0
+        last_report = time.perf_counter()
+        for rows_read, row in read_rows(csv_path, skip):
+            if row is not None:
+                rows.append(row)
+            if len(rows) >= chunk_size:
+                _write_chunk(conn, rows, rows_read)
+                loaded += len(rows)
+                rows = []
+                if time.perf_counter() - last_report >= 2.0:
+                    last_report = time.perf_counter()
+                    elapsed = last_report - started
+                    logger.info(f"已写入 {skip + loaded:,} 行 ({loaded / elapsed:,.0f} 行/秒)")
+        _write_chunk(conn, rows, rows_read)
+        loaded += len(rows)
+        load_seconds = time.perf_counter() - started
+
+        index_started = time.perf_counter()
+        # 与唯一约束的 INSERT OR IGNORE 相同：大小写不同的重复单词只保留第一次出现的词条
+        duplicates = conn.execute(
+            "DELETE FROM stardict WHERE id NOT IN (SELECT MIN(id) FROM stardict GROUP BY word)"
+        ).rowcount
+        if duplicates:
+            logger.info(f"删除重复单词 {duplicates:,} 个")
+        for sql in INDEXES:
+            conn.execute(sql)
+        build_filter_indexes(conn)
+        conn.execute("DROP TABLE build_checkpoint")
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode=DELETE")
+        count = conn.execute("SELECT COUNT(*) FROM stardict").fetchone()[0]
+        index_seconds = time.perf_counter() - index_started
+    finally:
+        conn.close()
+
+    os.replace(part_path, sqlite_path)
+    total = time.perf_counter() - started
+    logger.info(
+        f"转换完成: {count:,} 个词条, 载入 {load_seconds:.1f}s ({loaded / max(load_seconds, 1e-9):,.0f} 行/秒), "
+        f"建索引和 ANALYZE {index_seconds:.1f}s, 共 {total:.1f}s"
+    )
+    return count
@@ -0,0 +1,110 @@
+"""
+ECDICT 词头索引
+将全部词头（小写）按字节序排好后紧凑存放在内存中，
+存在性检查和精确查找通过二分查找完成，不访问 SQLite
+"""
+import sqlite3
+import time
+from array import array
+from typing import Iterator, Optional
+
+
+class HeadwordIndex:
+    """紧凑的有序词头表
+
+    - blob: 所有词头 UTF-8 编码后首尾相接的字节串
+    - offsets: 第 i 个词头在 blob 中的起始位置，长度为 n + 1
+    - ids: 第 i 个词头对应的 stardict 行 id
+    """
+
+    def __init__(self, blob, offsets, ids):
+        self.blob = blob
+        self.offsets = offsets
+        self.ids = ids
+
+    @classmethod
+    def from_pairs(cls, pairs) -> 'HeadwordIndex':
+        """从 (word, id) 序列构建索引，重复的小写词头只保留第一个"""
+        entries = {}
+        for word, row_id in pairs:
+            if not word:
+                continue
+            key = word.strip().lower().encode('utf-8')
+            if key and key not in entries:
+                entries[key] = row_id
+
+        blob = bytearray()
+        offsets = array('I', [0])
+        ids = array('I')
+        for key in sorted(entries):
+            blob += key
+            offsets.append(len(blob))
+            ids.append(entries[key])
+
+        return cls(bytes(blob), offsets, ids)
+
+    @classmethod
+    def build_from_sqlite(cls, db_path: str) -> 'HeadwordIndex':
+        """从 ECDICT SQLite 数据库（只读方式打开）构建索引"""
+        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            cursor = conn.execute('SELECT word, id FROM stardict')
+            return cls.from_pairs(cursor)
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, word: str) -> bool:
+        return self.lookup(word) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """按顺序遍历全部词头"""
+        for i in range(len(self)):
+            yield self.key(i).decode('utf-8')
+
+    def key(self, i: int) -> bytes:
+        """第 i 个词头（UTF-8 字节）"""
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+    def _search(self, target: bytes) -> int:
+        """二分查找 target 的插入位置"""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, word: str) -> Optional[int]:
+        """精确查找单词，返回 stardict 行 id，不存在时返回 None"""
+        target = word.strip().lower().encode('utf-8')
+        if not target:
+            return None
+        pos = self._search(target)
+        if pos < len(self) and self.key(pos) == target:
+            return self.ids[pos]
+        return None
+
+    def memory_bytes(self) -> int:
+        """索引占用的内存（字节，不含对象头）"""
+        return (
+            len(self.blob)
+            + len(self.offsets) * self.offsets.itemsize
+            + len(self.ids) * self.ids.itemsize
+        )
+
+    def benchmark(self, samples: int = 1000) -> float:
+        """对均匀抽样的词头执行查找，返回平均耗时（微秒）"""
+        total = len(self)
+        if not total:
+            return 0.0
+        step = max(1, total // samples)
+        words = [self.key(i).decode('utf-8') for i in range(0, total, step)]
+        started = time.perf_counter()
+        for word in words:
+            self.lookup(word)
+        return (time.perf_counter() - started) / len(words) * 1_000_000
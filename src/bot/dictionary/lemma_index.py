@@ -0,0 +1,180 @@
+"""
+词形还原反向索引
+根据 ECDICT 的 exchange 字段（p: 过去式, d: 过去分词, i: 现在分词, 3: 第三人称单数,
+r: 比较级, t: 最高级, s: 复数, 0: 原型, 1: 原型的变换类型），
+预先生成 "变形 -> 原型" 的映射，一次查找即可把 ran / children / better 还原为原型
+
+文件布局（本机字节序）:
+    头部: 魔数、格式版本、字节序标记、变形数、取值数、源数据库签名 (大小, 修改时间)
+    key_offsets / key_values: 排好序的变形词（HeadwordIndex）及其取值编号
+    value_offsets: 取值在 values 中的起始位置
+    keys / values: UTF-8 字节块，每个取值为若干行 "原型\\t变换类型"
+"""
+import os
+import sqlite3
+import struct
+import time
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from .ecdict_binary import source_signature
+from .headword_index import HeadwordIndex
+
+
+MAGIC = b'ECLEMMA\x00'
+FORMAT_VERSION = 2
+BYTE_ORDER_MARK = 0x01020304
+
+# 表示变形的 exchange 类型
+INFLECTION_KINDS = 'pdi3rts'
+
+_HEADER = struct.Struct('=8sIIIIIIQQ')
+
+
+def parse_exchange(exchange: str) -> dict:
+    """解析 exchange 字段，返回 {类型: 取值}"""
+    result = {}
+    for item in (exchange or '').split('/'):
+        if ':' in item:
+            key, value = item.split(':', 1)
+            if key and value:
+                result[key] = value
+    return result
+
+
+class LemmaIndex:
+    """变形词 -> [(原型, 变换类型)] 的只读索引"""
+
+    def __init__(self, keys: HeadwordIndex, value_offsets, values, source: Tuple[int, int] = (0, 0)):
+        self.keys = keys
+        self.value_offsets = value_offsets
+        self.values = values
+        # 生成索引时 ecdict.db 的签名 (大小, 修改时间)
+        self.source = source
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[str, str]]) -> 'LemmaIndex':
+        """从 (word, exchange) 序列构建索引"""
+        forms = {}
+
+        def add(form: str, lemma: str, kinds: str):
+            form = form.strip().lower()
+            lemma = lemma.strip()
+            if not form or not lemma or form == lemma.lower():
+                return
+            lemmas = forms.setdefault(form, {})
+            lemmas[lemma] = ''.join(sorted(set(lemmas.get(lemma, '') + kinds), key=INFLECTION_KINDS.find))
+
+        for word, exchange in rows:
+            items = parse_exchange(exchange)
+            if not word or not items:
+                continue
+            # 原型词条列出的各种变形
+            for kind in INFLECTION_KINDS:
+                if kind in items:
+                    for form in items[kind].split(','):
+                        add(form, word, kind)
+            # 变形词条指回的原型
+            if '0' in items:
+                kinds = ''.join(k for k in items.get('1', '') if k in INFLECTION_KINDS)
+                add(word, items['0'], kinds)
+
+        value_offsets = array('I', [0])
+        values = bytearray()
+        pairs = []
+        for value_id, (form, lemmas) in enumerate(forms.items()):
+            text = '\n'.join(f'{lemma}\t{kinds}' for lemma, kinds in lemmas.items())
+            values += text.encode('utf-8')
+            value_offsets.append(len(values))
+            pairs.append((form, value_id))
+
+        return cls(HeadwordIndex.from_pairs(pairs), value_offsets, bytes(values))
+
+    @classmethod
+    def load(cls, path: str) -> 'LemmaIndex':
+        """从文件加载索引"""
+        with open(path, 'rb') as f:
+            magic, version, bom, key_count, keys_size, value_count, values_size, source_size, source_mtime = (
+                _HEADER.unpack(f.read(_HEADER.size))
+            )
+            if magic != MAGIC or version != FORMAT_VERSION or bom != BYTE_ORDER_MARK:
+                raise ValueError(f"词形索引文件格式不匹配: {path}")
+
+            key_offsets = array('I')
+            key_offsets.fromfile(f, key_count + 1)
+            key_values = array('I')
+            key_values.fromfile(f, key_count)
+            value_offsets = array('I')
+            value_offsets.fromfile(f, value_count + 1)
+            keys = f.read(keys_size)
+            values = f.read(values_size)
+
+        if len(keys) != keys_size or len(values) != values_size:
+            raise ValueError(f"词形索引文件已损坏: {path}")
+        return cls(HeadwordIndex(keys, key_offsets, key_values), value_offsets, values, (source_size, source_mtime))
+
+    def save(self, path: str):
+        """保存索引（先写临时文件再原子替换）"""
+        part_path = path + '.part'
+        with open(part_path, 'wb') as f:
+            f.write(_HEADER.pack(
+                MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK,
+                len(self.keys), len(self.keys.blob), len(self.value_offsets) - 1, len(self.values), *self.source
+            ))
+            self.keys.offsets.tofile(f)
+            self.keys.ids.tofile(f)
+            self.value_offsets.tofile(f)
+            f.write(self.keys.blob)
+            f.write(self.values)
+        os.replace(part_path, path)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, form: str) -> List[Tuple[str, str]]:
+        """查找变形词对应的原型，返回 [(原型, 变换类型)]，不是变形时返回空列表"""
+        value_id = self.keys.lookup(form)
+        if value_id is None:
+            return []
+        start, end = self.value_offsets[value_id], self.value_offsets[value_id + 1]
+        text = self.values[start:end].decode('utf-8')
+        return [tuple(line.split('\t', 1)) for line in text.split('\n')]
+
+
+def build_lemma_index(sqlite_path: str, output_path: str) -> int:
+    """从 ECDICT SQLite 数据库生成词形索引文件，返回变形词数量"""
+    started = time.perf_counter()
+    signature = source_signature(sqlite_path)
+    conn = sqlite3.connect(f'file:{sqlite_path}?mode=ro', uri=True)
+    try:
+        cursor = conn.execute("SELECT word, exchange FROM stardict WHERE exchange IS NOT NULL AND exchange != ''")
+        index = LemmaIndex.build(cursor)
+    finally:
+        conn.close()
+    index.source = signature
+
+    index.save(output_path)
+    logger.info(
+        f"词形索引已生成: {output_path} ({len(index)} 个变形, "
+        f"{os.path.getsize(output_path) / 1024 / 1024:.1f}MB, {time.perf_counter() - started:.1f}s)"
+    )
+    return len(index)
+
+
+def load_lemma_index(path: str, sqlite_path: Optional[str] = None) -> Optional[LemmaIndex]:
+    """加载词形索引，文件不存在、损坏或与 sqlite_path 的词典不一致时返回 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        started = time.perf_counter()
+        index = LemmaIndex.load(path)
+        if sqlite_path and os.path.exists(sqlite_path) and index.source != source_signature(sqlite_path):
+            logger.warning(f"词形索引与词典数据库不一致，已忽略，请执行 setup_ecdict.py --build-lemma 重新生成: {path}")
+            return None
+        logger.info(f"词形索引已加载: {len(index)} 个变形 ({(time.perf_counter() - started) * 1000:.1f}ms)")
+        return index
+    except Exception as e:
+        logger.error(f"加载词形索引失败: {e}")
+        return None
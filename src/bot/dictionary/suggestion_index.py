@@ -0,0 +1,236 @@
+"""
+拼写纠错建议索引
+SymSpell 删除法：词典侧和查询侧都生成编辑距离 MAX_DISTANCE 以内的删除变体，
+两侧变体相同的单词作为候选，再用 OSA 编辑距离校验，按 (编辑距离, 词频排名) 排序；
+两侧删除距离相同，编辑距离 MAX_DISTANCE 以内的单词都能找到
+
+删除变体以 crc32 哈希值存放在有序 array 中，通过二分查找定位，内存紧凑且可直接持久化
+"""
+import os
+import re
+import struct
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+
+MAGIC = b'ECSUGG\x00\x00'
+FORMAT_VERSION = 1
+BYTE_ORDER_MARK = 0x01020304
+
+# 建议的最大编辑距离（词典侧和查询侧的删除距离）；
+# 距离 2 需要词典侧预生成约 4 倍的删除变体，索引体积、构建时间和单次查询耗时都成倍增加
+MAX_DISTANCE = 1
+
+# 没有词频信息的单词排在最后
+UNRANKED = 0xFFFFFFFF
+
+# 只收录由字母组成的常规单词
+WORD_PATTERN = re.compile(r"^[a-z][a-z'-]*$")
+
+_HEADER = struct.Struct('=8sIIII')
+
+
+def _deletes(word: str, distance: int) -> set:
+    """生成编辑距离 distance 以内的全部删除变体（包含单词本身）"""
+    results = {word}
+    frontier = {word}
+    for _ in range(distance):
+        next_frontier = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        next_frontier -= results
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def _hash(text: str) -> int:
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def osa_distance(a: str, b: str, max_distance: int = MAX_DISTANCE) -> int:
+    """OSA（相邻交换算一次编辑）距离，超过 max_distance 时提前返回 max_distance + 1"""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    # 去掉公共前缀和后缀，只对不同的部分做动态规划
+    start = 0
+    end_a, end_b = len(a), len(b)
+    while start < end_a and start < end_b and a[start] == b[start]:
+        start += 1
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a = a[start:end_a]
+    b = b[start:end_b]
+    too_far = max_distance + 1
+    if not a or not b:
+        return min(len(a) or len(b), too_far)
+
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        current = [i]
+        row_min = i
+        for j in range(1, len(b) + 1):
+            value = prev[j - 1] if ca == b[j - 1] else prev[j - 1] + 1
+            if prev[j] + 1 < value:
+                value = prev[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (prev_prev is not None and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]
+                    and prev_prev[j - 2] + 1 < value):
+                value = prev_prev[j - 2] + 1
+            current.append(value)
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return too_far
+        prev_prev, prev = prev, current
+    return min(prev[-1], too_far)
+
+
+def word_rank(frq, bnc) -> int:
+    """词频排名：取 frq / bnc 中较靠前的非零排名"""
+    ranks = [int(value) for value in (frq, bnc) if value and int(value) > 0]
+    return min(ranks) if ranks else UNRANKED
+
+
+class SuggestionIndex:
+    """拼写纠错建议索引"""
+
+    def __init__(self, words: List[str], ranks: array, hashes: array, postings: array):
+        self.words = words
+        self.ranks = ranks
+        self.hashes = hashes
+        self.postings = postings
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[str, int]]) -> 'SuggestionIndex':
+        """从 (word, rank) 序列构建索引"""
+        best = {}
+        for word, rank in rows:
+            word = (word or '').strip().lower()
+            if not WORD_PATTERN.match(word):
+                continue
+            if word not in best or rank < best[word]:
+                best[word] = rank
+
+        words = sorted(best)
+        ranks = array('I', (best[word] for word in words))
+
+        entries = []
+        for word_id, word in enumerate(words):
+            for variant in _deletes(word, MAX_DISTANCE):
+                entries.append((_hash(variant), word_id))
+        entries.sort()
+
+        hashes = array('I', (entry[0] for entry in entries))
+        postings = array('I', (entry[1] for entry in entries))
+        return cls(words, ranks, hashes, postings)
+
+    @classmethod
+    def load(cls, path: str) -> 'SuggestionIndex':
+        """从文件加载索引"""
+        with open(path, 'rb') as f:
+            magic, version, bom, word_count, entry_count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION or bom != BYTE_ORDER_MARK:
+                raise ValueError(f"纠错索引文件格式不匹配: {path}")
+
+            ranks = array('I')
+            ranks.fromfile(f, word_count)
+            hashes = array('I')
+            hashes.fromfile(f, entry_count)
+            postings = array('I')
+            postings.fromfile(f, entry_count)
+            words = f.read().decode('utf-8').split('\n') if word_count else []
+
+        if len(words) != word_count:
+            raise ValueError(f"纠错索引文件已损坏: {path}")
+        return cls(words, ranks, hashes, postings)
+
+    def save(self, path: str):
+        """保存索引（先写临时文件再原子替换）"""
+        part_path = path + '.part'
+        with open(part_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, len(self.words), len(self.hashes)))
+            self.ranks.tofile(f)
+            self.hashes.tofile(f)
+            self.postings.tofile(f)
+            f.write('\n'.join(self.words).encode('utf-8'))
+        os.replace(part_path, path)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def suggest(self, word: str, limit: int = 5) -> List[str]:
+        """返回按 (编辑距离, 词频排名) 排序的建议单词"""
+        query = word.strip().lower()
+        if not query:
+            return []
+
+        hashes = self.hashes
+        postings = self.postings
+        size = len(hashes)
+        candidates = set()
+        for variant in _deletes(query, MAX_DISTANCE):
+            key = _hash(variant)
+            pos = bisect_left(hashes, key)
+            while pos < size and hashes[pos] == key:
+                candidates.add(postings[pos])
+                pos += 1
+
+        scored = []
+        for word_id in candidates:
+            candidate = self.words[word_id]
+            if candidate == query:
+                continue
+            distance = osa_distance(query, candidate)
+            if distance <= MAX_DISTANCE:
+                scored.append((distance, self.ranks[word_id], candidate))
+
+        scored.sort()
+        return [item[2] for item in scored[:limit]]
+
+    def memory_bytes(self) -> int:
+        """数组部分占用的内存（字节，不含单词字符串）"""
+        return sum(len(a) * a.itemsize for a in (self.ranks, self.hashes, self.postings))
+
+
+def load_or_build(path: str, source_path: str, rows_factory) -> Optional[SuggestionIndex]:
+    """加载持久化的索引；文件不存在或比词典旧时重新构建并保存"""
+    try:
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source_path):
+            started = time.perf_counter()
+            index = SuggestionIndex.load(path)
+            logger.info(f"纠错索引已加载: {len(index)} 个单词 ({(time.perf_counter() - started) * 1000:.1f}ms)")
+            return index
+    except Exception as e:
+        logger.warning(f"加载纠错索引失败，将重新构建: {e}")
+
+    try:
+        started = time.perf_counter()
+        index = SuggestionIndex.build(rows_factory())
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"保存纠错索引失败: {e}")
+        logger.info(
+            f"纠错索引已构建: {len(index)} 个单词, {len(index.hashes)} 个删除变体, "
+            f"{index.memory_bytes() / 1024 / 1024:.1f}MB, {time.perf_counter() - started:.2f}s"
+        )
+        return index
+    except Exception as e:
+        logger.error(f"构建纠错索引失败: {e}")
+        return None
@@ -1,6 +1,7 @@
 """
 命令处理器 - 简化版
 """
+import asyncio
 from telegram import Update
 from telegram.ext import ContextTypes
 from loguru import logger
@@ -8,7 +9,7 @@ from loguru import logger
 from ..services.word_service import WordService
 from ..services.word_manager import word_manager
 from ..services.scheduler import SchedulerService
-from ..models.database import db_manager
+from ..models.async_database import async_db_manager
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -17,7 +18,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     user = update.effective_user
     
     # 添加或更新用户信息到数据库
-    db_manager.add_or_update_user(
+    await async_db_manager.add_or_update_user(
         chat_id=chat_id,
         username=user.username,
         first_name=user.first_name,
@@ -25,12 +26,12 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     )
     
     # 获取用户当前选择的单词表并切换到该单词表
-    user_wordlist = db_manager.get_user_wordlist(chat_id)
-    word_manager.switch_wordlist(user_wordlist)
-    
-    word_count = word_manager.get_word_count()
-    user_stats = db_manager.get_user_stats(chat_id)
-    current_wordlist = word_manager.get_current_wordlist_info()
+    user_wordlist = await async_db_manager.get_user_wordlist(chat_id)
+    # 切换后立即取得单词表信息，之后的 await 期间其他用户可能切换单词表
+    current_wordlist = (await word_manager.switch_wordlist_async(user_wordlist)
+                        or word_manager.get_current_wordlist_info())
+    word_count = current_wordlist['word_count']
+    user_stats = await async_db_manager.get_user_stats(chat_id)
     
     logger.info(f"用户 {user.username or user.first_name} (ID: {chat_id}) 启动了机器人")
     
@@ -79,16 +80,15 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     user = update.effective_user
     
     # 更新用户活动
-    db_manager.add_or_update_user(
+    await async_db_manager.add_or_update_user(
         chat_id=chat_id,
         username=user.username,
         first_name=user.first_name,
         last_name=user.last_name
     )
     
-    stats_data = db_manager.get_user_stats(chat_id)
-    recent_count = db_manager.get_user_word_count(chat_id, days=7)
-    settings = db_manager.get_user_settings(chat_id)
+    stats_data = await async_db_manager.get_user_stats(chat_id)
+    settings = await async_db_manager.get_user_settings(chat_id)
     
     logger.info(f"用户 {user.username or user.first_name} (ID: {chat_id}) 查看统计信息")
     
@@ -98,7 +98,7 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         f"📊 您的学习统计\n\n"
         f"📚 总学习单词：{stats_data['total_words']} 个\n"
         f"📅 今日学习：{stats_data['today_words']} 个\n"
-        f"📝 最近7天：{recent_count} 个\n"
+        f"📝 最近7天：{stats_data['week_words']} 个\n"
         f"🔤 已翻译：{stats_data['translated_words']} 个\n"
         f"⚙️ 自动发送：{status_text}\n\n"
         f"💪 继续加油学习！"
@@ -196,7 +196,7 @@ async def my_words_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     user = update.effective_user
     
     # 更新用户活动
-    db_manager.add_or_update_user(
+    await async_db_manager.add_or_update_user(
         chat_id=chat_id,
         username=user.username,
         first_name=user.first_name,
@@ -204,7 +204,7 @@ async def my_words_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     )
     
     # 获取用户查询的单词
-    query_words = db_manager.get_user_query_words(chat_id, limit=20)
+    query_words = await async_db_manager.get_user_query_words(chat_id, limit=20)
     
     if not query_words:
         await update.message.reply_text(
@@ -226,11 +226,11 @@ async def my_words_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     if len(query_words) > 15:
         message_lines.append(f"\n... 还有 {len(query_words) - 15} 个单词")
     
-    total_count = db_manager.get_user_query_words_count(chat_id)
+    total_count = await async_db_manager.get_user_query_words_count(chat_id)
     message_lines.append(f"\n📊 总计查询了 {total_count} 个不同的单词")
     
     # 检查是否已有查询单词表
-    query_info = word_manager.get_user_query_wordlist_info(chat_id)
+    query_info = word_manager.get_user_query_wordlist_info(chat_id, total_count)
     
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = []
@@ -309,19 +309,28 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
             return
         
-        # 保存用户单词表
-        result = word_manager.save_user_wordlist(
+        # 保存用户单词表（包含批量词典校验，在线程中执行避免阻塞事件循环）
+        result = await asyncio.to_thread(
+            word_manager.save_user_wordlist,
             user_id=chat_id,
             filename=document.file_name,
             content=content
         )
         
         if result['success']:
+            unknown_words = result.get('unknown_words', [])
+            unknown_info = ""
+            if unknown_words:
+                preview = ', '.join(unknown_words[:10])
+                more = f" 等 {len(unknown_words)} 个" if len(unknown_words) > 10 else ""
+                unknown_info = f"⚠️ 词典未收录：{preview}{more}\n\n"
+            
             await processing_msg.edit_text(
                 f"✅ <b>单词表上传成功！</b>\n\n"
                 f"📄 显示名称：{result['display_name']}\n"
                 f"📁 文件名：{result['filename']}\n"
                 f"📊 单词数量：{result['word_count']} 个\n\n"
+                f"{unknown_info}"
                 f"💡 发送 /wordlist 切换到新的单词表\n"
                 f"📚 发送 /my_wordlists 查看所有单词表",
                 parse_mode='HTML'
@@ -0,0 +1,135 @@
+"""
+异步数据库门面
+在专用的数据库线程中执行 DatabaseManager 的方法，避免 SQLite 读写阻塞事件循环
+"""
+import asyncio
+import functools
+import queue
+import threading
+from concurrent.futures import Future
+from loguru import logger
+
+from .database import DatabaseManager, db_manager
+
+
+class DatabaseExecutor:
+    """数据库专用执行器：固定数量的工作线程 + 有界任务队列"""
+
+    def __init__(self, workers: int = 2, max_queue: int = 1000):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def _ensure_started(self):
+        """按需启动工作线程"""
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"db-executor-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        """工作线程主循环"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """提交任务，队列已满时抛出 queue.Full"""
+        if self._shutdown:
+            raise RuntimeError("数据库执行器已关闭")
+        self._ensure_started()
+        future = Future()
+        self._queue.put_nowait((future, fn, args, kwargs))
+        return future
+
+    def pending(self) -> int:
+        """获取排队中的任务数量"""
+        return self._queue.qsize()
+
+    def shutdown(self, wait: bool = True):
+        """关闭执行器，等待已提交的任务执行完毕"""
+        if self._shutdown:
+            return
+        self._shutdown = True
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class AsyncDatabaseManager:
+    """DatabaseManager 的异步版本，方法与 DatabaseManager 一一对应
+
+    用法: ``await async_db_manager.get_user_settings(chat_id)``
+    """
+
+    def __init__(self, db: DatabaseManager, workers: int = 2, max_queue: int = 1000):
+        self.db = db
+        self.executor = DatabaseExecutor(workers=workers, max_queue=max_queue)
+        self._slots = None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """获取限制排队数量的信号量（在事件循环中懒创建）"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.executor.max_queue)
+        return self._slots
+
+    async def run(self, fn, *args, **kwargs):
+        """在数据库线程中执行任意同步函数"""
+        # 队列满时在事件循环中等待，而不是阻塞线程
+        async with self._get_slots():
+            return await asyncio.wrap_future(self.executor.submit(fn, *args, **kwargs))
+
+    async def load_user_settings(self, chat_id: int):
+        """获取用户设置对象，缓存命中时直接在事件循环中返回"""
+        settings = self.db.settings_cache.get(chat_id)
+        if settings is not None:
+            return settings
+        return await self.run(self.db.load_user_settings, chat_id)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.db, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        # 缓存包装函数，避免每次调用重复创建
+        setattr(self, name, wrapper)
+        return wrapper
+
+    def stats(self) -> dict:
+        """获取执行器状态"""
+        return {
+            'workers': self.executor.workers,
+            'pending': self.executor.pending(),
+            'max_queue': self.executor.max_queue,
+        }
+
+    def shutdown(self):
+        """关闭数据库执行器"""
+        self.executor.shutdown(wait=True)
+        logger.info("数据库执行器已关闭")
+
+
+# 创建全局异步数据库管理器实例
+async_db_manager = AsyncDatabaseManager(db_manager)
@@ -0,0 +1,16 @@
+"""
+翻译缓存条目的类型和来源
+"""
+
+# 条目类型
+KIND_DICT = 'dict'              # 词典释义
+KIND_AI = 'ai'                  # AI 翻译结果
+KIND_NOT_FOUND = 'not_found'    # 词典未收录且没有相似单词
+KIND_SUGGESTION = 'suggestion'  # 词典未收录，给出了拼写建议
+
+# 否定条目（未收录），只短期缓存
+NEGATIVE_KINDS = (KIND_NOT_FOUND, KIND_SUGGESTION)
+
+# 条目来源，可按来源整体失效（如更新词典或更换 AI 模型后）
+SOURCE_ECDICT = 'ecdict'
+SOURCE_OLLAMA = 'ollama'
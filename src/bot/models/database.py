@@ -1,470 +1,540 @@
 """
 数据库管理模块 - 简化版
 """
-import sqlite3
-import os
+import atexit
+import time
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from loguru import logger
 
+from .pool import ConnectionPool
+from .write_behind import WriteBehindQueue
+from .cache_kinds import KIND_DICT, SOURCE_ECDICT
+from .migrations import MigrationRunner
+from .user_settings import UserSettings
+from ..utils.lru_cache import LRUCache
+from ..utils.config import Config
+
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "english_bot.db"):
+    def __init__(self, db_path: str = "english_bot.db", pool_size: int = 4,
+                 flush_interval: float = 0.2, flush_rows: int = 500,
+                 translation_cache_entries: int = 5000, translation_cache_bytes: int = 32 * 1024 * 1024,
+                 translation_cache_ttl: Optional[float] = None,
+                 activity_write_interval: Optional[float] = None, user_cache_entries: int = 100000,
+                 settings_cache_entries: int = 100000):
         """初始化数据库管理器"""
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, size=pool_size)
+        # word_history / user_query_words 的追加写入和缓存命中计数经写后队列批量提交，
+        # 读取不主动刷新队列（否则每次查询统计都会强制提交一次），最多落后 flush_interval
+        self.write_behind = WriteBehindQueue(self.pool, flush_interval=flush_interval, max_rows=flush_rows)
+        # translation_cache 前的内存缓存层，热门单词无需访问数据库；
+        # 管理工具在其他进程中删除的条目无法通知到这里，内存层条目最多保留 translation_cache_ttl 秒
+        if translation_cache_ttl is None:
+            translation_cache_ttl = Config.get_translation_memory_ttl()
+        self.translation_memory = LRUCache(
+            max_entries=translation_cache_entries,
+            max_bytes=translation_cache_bytes,
+            ttl=translation_cache_ttl
+        )
+        # 每个用户最近一次写入的资料和时间，用于跳过重复的 users 写入
+        if activity_write_interval is None:
+            activity_write_interval = Config.get_user_activity_write_interval()
+        self.activity_write_interval = activity_write_interval
+        self.user_seen = LRUCache(max_entries=user_cache_entries)
+        # 用户设置缓存，只在 update_auto_send_status / update_user_wordlist 时失效
+        self.settings_cache = LRUCache(max_entries=settings_cache_entries)
         self.init_database()
-    
+        atexit.register(self.close)
+
     def get_connection(self):
-        """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
-    
+        """获取数据库连接（上下文管理器：正常退出时提交，异常时回滚，并归还连接池）"""
+        return self.pool.connection()
+
+    def close(self):
+        """写入缓冲中的数据并关闭数据库连接池"""
+        self.write_behind.close()
+        self.pool.close()
+
+    def get_write_queue_depth(self) -> int:
+        """获取写后队列中尚未落盘的行数"""
+        return self.write_behind.depth()
+
     def init_database(self):
-        """初始化数据库表"""
+        """初始化数据库表（执行待执行的结构迁移）"""
         logger.info("正在初始化数据库...")
-        
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+
         try:
-            # 创建用户表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    chat_id INTEGER PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    last_name TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            ''')
-            
-            # 创建用户设置表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_settings (
-                    chat_id INTEGER PRIMARY KEY,
-                    auto_send_enabled BOOLEAN DEFAULT 0,
-                    auto_send_interval_min INTEGER DEFAULT 30,
-                    auto_send_interval_max INTEGER DEFAULT 120,
-                    selected_wordlist TEXT DEFAULT '3',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (chat_id) REFERENCES users (chat_id)
-                )
-            ''')
-            
-            # 创建单词学习历史表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS word_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    chat_id INTEGER,
-                    word TEXT NOT NULL,
-                    translated BOOLEAN DEFAULT 0,
-                    translation TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (chat_id) REFERENCES users (chat_id)
-                )
-            ''')
-            
-            # 创建翻译缓存表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS translation_cache (
-                    word TEXT PRIMARY KEY,
-                    translation TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    usage_count INTEGER DEFAULT 1
-                )
-            ''')
-            
-            # 创建用户查询单词表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_query_words (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    chat_id INTEGER,
-                    word TEXT NOT NULL,
-                    translation TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (chat_id) REFERENCES users (chat_id)
-                )
-            ''')
-            
-            # 创建索引
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_word_history_chat_id ON word_history(chat_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_word_history_created_at ON word_history(created_at)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_last_activity ON users(last_activity)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_query_words_chat_id ON user_query_words(chat_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_query_words_created_at ON user_query_words(created_at)')
-            
-            conn.commit()
-            logger.success("数据库初始化完成")
-            
+            applied = MigrationRunner(self.pool).run()
+            logger.success(f"数据库初始化完成 (执行迁移 {applied} 个)")
+
         except Exception as e:
             logger.error(f"数据库初始化失败: {e}")
-            conn.rollback()
             raise
-        finally:
-            conn.close()
-    
+
     def add_or_update_user(self, chat_id: int, username: str = None, first_name: str = None, last_name: str = None):
-        """添加或更新用户信息"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """添加或更新用户信息
+
+        资料未变化且距上次写入不足 activity_write_interval 秒时直接跳过，
+        否则用一条 upsert 语句写入
+        """
+        profile = (username, first_name, last_name)
+        now = time.monotonic()
+        seen = self.user_seen.get(chat_id)
+        if seen and seen[0] == profile and now - seen[1] < self.activity_write_interval:
+            return True
+
         try:
-            cursor.execute('SELECT chat_id FROM users WHERE chat_id = ?', (chat_id,))
-            user_exists = cursor.fetchone() is not None
-            
-            if user_exists:
-                cursor.execute('''
-                    UPDATE users 
-                    SET username = ?, first_name = ?, last_name = ?, last_activity = CURRENT_TIMESTAMP, is_active = 1
-                    WHERE chat_id = ?
-                ''', (username, first_name, last_name, chat_id))
-            else:
-                cursor.execute('''
+            with self.get_connection() as conn:
+                conn.execute('''
                     INSERT INTO users (chat_id, username, first_name, last_name)
                     VALUES (?, ?, ?, ?)
+                    ON CONFLICT(chat_id) DO UPDATE SET
+                        username = excluded.username,
+                        first_name = excluded.first_name,
+                        last_name = excluded.last_name,
+                        last_activity = CURRENT_TIMESTAMP,
+                        is_active = 1
                 ''', (chat_id, username, first_name, last_name))
-                
-                cursor.execute('''
-                    INSERT INTO user_settings (chat_id)
-                    VALUES (?)
-                ''', (chat_id,))
-            
-            conn.commit()
+
+                if seen is None:
+                    # 本进程首次见到该用户时确保存在设置记录
+                    conn.execute('INSERT OR IGNORE INTO user_settings (chat_id) VALUES (?)', (chat_id,))
+
+            self.user_seen.put(chat_id, (profile, now))
             return True
-            
+
         except Exception as e:
             logger.error(f"添加/更新用户失败: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
-    
-    def get_user_settings(self, chat_id: int) -> dict:
-        """获取用户设置"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+
+    def load_user_settings(self, chat_id: int) -> UserSettings:
+        """获取用户设置对象（优先读取缓存）"""
+        settings = self.settings_cache.get(chat_id)
+        if settings is not None:
+            return settings
+
+        # 读取期间设置被更新时不缓存读到的旧值
+        generation = self.settings_cache.generation
         try:
-            cursor.execute('''
-                SELECT auto_send_enabled, auto_send_interval_min, auto_send_interval_max, selected_wordlist
-                FROM user_settings WHERE chat_id = ?
-            ''', (chat_id,))
-            
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'auto_send_enabled': bool(result[0]),
-                    'interval_min': result[1],
-                    'interval_max': result[2],
-                    'selected_wordlist': result[3] or '3'
-                }
-            else:
-                cursor.execute('INSERT INTO user_settings (chat_id) VALUES (?)', (chat_id,))
-                conn.commit()
-                return {
-                    'auto_send_enabled': False,
-                    'interval_min': 30,
-                    'interval_max': 120,
-                    'selected_wordlist': '3'
-                }
-                
+            with self.get_connection() as conn:
+                result = conn.execute('''
+                    SELECT auto_send_enabled, auto_send_interval_min, auto_send_interval_max, selected_wordlist
+                    FROM user_settings WHERE chat_id = ?
+                ''', (chat_id,)).fetchone()
+
+                if result:
+                    settings = UserSettings.from_row(chat_id, result)
+                else:
+                    conn.execute('INSERT OR IGNORE INTO user_settings (chat_id) VALUES (?)', (chat_id,))
+                    settings = UserSettings(chat_id=chat_id)
+
+            self.settings_cache.put(chat_id, settings, generation=generation)
+            return settings
+
         except Exception as e:
             logger.error(f"获取用户设置失败: {e}")
-            return {
-                'auto_send_enabled': False,
-                'interval_min': 30,
-                'interval_max': 120,
-                'selected_wordlist': '3'
-            }
-        finally:
-            conn.close()
-    
+            return UserSettings(chat_id=chat_id)
+
+    def get_user_settings(self, chat_id: int) -> dict:
+        """获取用户设置"""
+        return self.load_user_settings(chat_id).to_dict()
+
     def update_auto_send_status(self, chat_id: int, enabled: bool) -> bool:
         """更新用户自动发送状态"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                UPDATE user_settings 
-                SET auto_send_enabled = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE chat_id = ?
-            ''', (enabled, chat_id))
-            
-            conn.commit()
+            with self.get_connection() as conn:
+                conn.execute('''
+                    UPDATE user_settings
+                    SET auto_send_enabled = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE chat_id = ?
+                ''', (enabled, chat_id))
+
             return True
-            
+
         except Exception as e:
             logger.error(f"更新自动发送状态失败: {e}")
-            conn.rollback()
             return False
         finally:
-            conn.close()
-    
+            self.settings_cache.invalidate(chat_id)
+
     def add_word_to_history(self, chat_id: int, word: str, translated: bool = False, translation: str = None):
-        """添加单词到学习历史"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """添加单词到学习历史（经写后队列异步批量写入，并累加每日统计）"""
         try:
-            cursor.execute('''
+            self.write_behind.enqueue('''
                 INSERT INTO word_history (chat_id, word, translated, translation)
                 VALUES (?, ?, ?, ?)
             ''', (chat_id, word, translated, translation))
-            
-            conn.commit()
+            self.write_behind.increment('''
+                INSERT INTO user_daily_stats (chat_id, day, total, translated)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(chat_id, day) DO UPDATE SET
+                    total = total + excluded.total,
+                    translated = translated + excluded.translated
+            ''', (chat_id, datetime.now().strftime('%Y-%m-%d')), (1, int(bool(translated))))
+
             return True
-            
+
         except Exception as e:
             logger.error(f"添加单词历史失败: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
-    
+
     def get_user_word_count(self, chat_id: int, days: int = 7) -> int:
-        """获取用户最近几天学习的单词数量"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """获取用户最近几天（含今天）学习的单词数量"""
         try:
-            since_date = datetime.now() - timedelta(days=days)
-            cursor.execute('''
-                SELECT COUNT(*) FROM word_history 
-                WHERE chat_id = ? AND created_at >= ?
-            ''', (chat_id, since_date))
-            
-            result = cursor.fetchone()
+            since_day = (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+            with self.get_connection() as conn:
+                result = conn.execute('''
+                    SELECT COALESCE(SUM(total), 0) FROM user_daily_stats
+                    WHERE chat_id = ? AND day >= ?
+                ''', (chat_id, since_day)).fetchone()
+
             return result[0] if result else 0
-            
+
         except Exception as e:
             logger.error(f"获取用户单词数量失败: {e}")
             return 0
-        finally:
-            conn.close()
-    
+
+    def _memory_ttl(self, ttl: Optional[float]) -> Optional[float]:
+        """内存缓存层条目的有效期：取条目剩余有效期和内存层有效期中较短的一个"""
+        memory_ttl = self.translation_memory.ttl
+        if ttl is None or not memory_ttl:
+            return ttl
+        return min(ttl, memory_ttl)
+
+    def _read_cached_translation(self, word: str) -> Optional[str]:
+        """读取未过期的缓存翻译（先查内存缓存层，数据库中的条目读取后载入内存缓存层）"""
+        translation = self.translation_memory.get(word)
+        if translation is None:
+            generation = self.translation_memory.generation
+            with self.get_connection() as conn:
+                result = conn.execute('''
+                    SELECT translation, (julianday(expires_at) - julianday('now')) * 86400
+                    FROM translation_cache WHERE word = ?
+                ''', (word,)).fetchone()
+            if not result:
+                return None
+            translation, remaining = result
+            if remaining is not None and remaining <= 0:
+                return None
+            # 有过期时间的条目在内存缓存层中同时过期；读取期间缓存被清除时不写回
+            self.translation_memory.put(word, translation, ttl=self._memory_ttl(remaining), generation=generation)
+        return translation
+
     def get_cached_translation(self, word: str) -> Optional[str]:
-        """从缓存获取翻译"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """从缓存获取翻译（已过期的条目视为未命中，命中次数由写后队列批量写回）"""
+        word = word.lower()
         try:
-            cursor.execute('SELECT translation FROM translation_cache WHERE word = ?', (word.lower(),))
-            result = cursor.fetchone()
-            
-            if result:
-                cursor.execute('''
-                    UPDATE translation_cache 
-                    SET usage_count = usage_count + 1
-                    WHERE word = ?
-                ''', (word.lower(),))
-                conn.commit()
-                return result[0]
-            
-            return None
-            
+            translation = self._read_cached_translation(word)
+            if translation is None:
+                return None
+
+            self.write_behind.increment(
+                'UPDATE translation_cache SET usage_count = usage_count + ?2 WHERE word = ?1',
+                (word,)
+            )
+            return translation
+
         except Exception as e:
             logger.error(f"获取缓存翻译失败: {e}")
             return None
-        finally:
-            conn.close()
-    
-    def cache_translation(self, word: str, translation: str):
-        """缓存翻译结果"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+
+    def load_cached_translation(self, word: str) -> bool:
+        """把缓存翻译载入内存缓存层（用于预取，不计入使用次数），返回是否有未过期的缓存"""
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO translation_cache (word, translation)
-                VALUES (?, ?)
-            ''', (word.lower(), translation))
-            
-            conn.commit()
+            return self._read_cached_translation(word.lower()) is not None
+        except Exception as e:
+            logger.error(f"载入缓存翻译失败: {e}")
+            return False
+
+    def cache_translation(self, word: str, translation: str, kind: str = KIND_DICT,
+                          source: str = SOURCE_ECDICT, ttl: Optional[float] = None):
+        """缓存翻译结果（同时写入数据库和内存缓存层），ttl 为空时永不过期"""
+        word = word.lower()
+        # 递增代数，进行中的读取不会把旧翻译写回内存缓存层
+        self.translation_memory.invalidate(word)
+        # datetime('now', NULL) 为 NULL，即永不过期
+        expires_modifier = f'+{int(ttl)} seconds' if ttl else None
+        try:
+            with self.get_connection() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO translation_cache (word, translation, kind, source, expires_at)
+                    VALUES (?, ?, ?, ?, datetime('now', ?))
+                ''', (word, translation, kind, source, expires_modifier))
+
+            # 提交前开始的读取仍可能读到旧行，提交后再次失效
+            self.translation_memory.invalidate(word)
+            self.translation_memory.put(word, translation, ttl=self._memory_ttl(ttl))
             return True
-            
+
         except Exception as e:
             logger.error(f"缓存翻译失败: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
-    
+
+    def get_cached_words(self, words: List[str], chunk_size: int = 500) -> set:
+        """批量检查哪些单词已有未过期的翻译缓存（分块 IN 查询，只读主键索引）"""
+        words = sorted({word.lower() for word in words})
+        cached = set()
+        try:
+            with self.get_connection() as conn:
+                for start in range(0, len(words), chunk_size):
+                    chunk = words[start:start + chunk_size]
+                    placeholders = ','.join('?' * len(chunk))
+                    results = conn.execute(f'''
+                        SELECT word FROM translation_cache
+                        WHERE word IN ({placeholders}) AND (expires_at IS NULL OR expires_at > datetime('now'))
+                    ''', chunk).fetchall()
+                    cached.update(row[0] for row in results)
+
+        except Exception as e:
+            logger.error(f"批量检查翻译缓存失败: {e}")
+
+        return cached
+
+    def cache_translations(self, items: List[Tuple[str, str]]) -> int:
+        """批量写入词典释义（不覆盖未过期的条目，不写入内存缓存层），返回写入数量"""
+        if not items:
+            return 0
+        try:
+            with self.get_connection() as conn:
+                before = conn.total_changes
+                conn.executemany('''
+                    INSERT INTO translation_cache (word, translation, kind, source)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(word) DO UPDATE SET
+                        translation = excluded.translation, kind = excluded.kind, source = excluded.source,
+                        expires_at = NULL, created_at = CURRENT_TIMESTAMP
+                    WHERE translation_cache.expires_at <= datetime('now')
+                ''', [(word.lower(), translation, KIND_DICT, SOURCE_ECDICT) for word, translation in items])
+                return conn.total_changes - before
+
+        except Exception as e:
+            logger.error(f"批量缓存翻译失败: {e}")
+            return 0
+
+    def invalidate_translations(self, source: str, kind: Optional[str] = None) -> int:
+        """删除指定来源（可再限定类型）的翻译缓存，返回删除数量"""
+        try:
+            with self.get_connection() as conn:
+                if kind is None:
+                    cursor = conn.execute('DELETE FROM translation_cache WHERE source = ?', (source,))
+                else:
+                    cursor = conn.execute(
+                        'DELETE FROM translation_cache WHERE source = ? AND kind = ?', (source, kind)
+                    )
+                deleted = cursor.rowcount
+            # 内存缓存层不记录来源，整体清空
+            self.translation_memory.clear()
+            return deleted
+
+        except Exception as e:
+            logger.error(f"清除翻译缓存失败: {e}")
+            return 0
+
+    def sync_render_version(self, version: str) -> int:
+        """词典渲染模板版本变化时删除已持久化的词典渲染结果，返回删除数量
+
+        首次记录版本时旧条目的模板版本未知，同样删除；删除后由预热任务或查询时按新模板重新渲染
+        """
+        try:
+            with self.get_connection() as conn:
+                result = conn.execute(
+                    "SELECT value FROM cache_meta WHERE key = 'dict_render_version'"
+                ).fetchone()
+                if result and result[0] == version:
+                    return 0
+                cursor = conn.execute(
+                    'DELETE FROM translation_cache WHERE source = ? AND kind = ?', (SOURCE_ECDICT, KIND_DICT)
+                )
+                deleted = cursor.rowcount
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('dict_render_version', ?)", (version,)
+                )
+            self.translation_memory.clear()
+            return deleted
+
+        except Exception as e:
+            logger.error(f"同步词典渲染模板版本失败: {e}")
+            return 0
+
+    def purge_expired_translations(self) -> int:
+        """删除已过期的翻译缓存，返回删除数量"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute("DELETE FROM translation_cache WHERE expires_at <= datetime('now')")
+                return cursor.rowcount
+
+        except Exception as e:
+            logger.error(f"清理过期翻译缓存失败: {e}")
+            return 0
+
+    def get_translation_cache_breakdown(self) -> List[Tuple[str, str, int]]:
+        """按 (来源, 类型) 统计翻译缓存条目数"""
+        try:
+            with self.get_connection() as conn:
+                return conn.execute('''
+                    SELECT source, kind, COUNT(*) FROM translation_cache
+                    GROUP BY source, kind ORDER BY source, kind
+                ''').fetchall()
+
+        except Exception as e:
+            logger.error(f"统计翻译缓存失败: {e}")
+            return []
+
+    def get_translation_cache_stats(self) -> dict:
+        """获取内存缓存层的命中/未命中/淘汰统计"""
+        return self.translation_memory.stats()
+
     def get_user_stats(self, chat_id: int) -> dict:
-        """获取用户统计信息"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """获取用户统计信息（总计/今日/最近7天/已翻译，基于每日汇总表）"""
         try:
-            # 总学习单词数
-            cursor.execute('SELECT COUNT(*) FROM word_history WHERE chat_id = ?', (chat_id,))
-            total_words = cursor.fetchone()[0]
-            
-            # 今天学习的单词数
-            today = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute('''
-                SELECT COUNT(*) FROM word_history 
-                WHERE chat_id = ? AND DATE(created_at) = ?
-            ''', (chat_id, today))
-            today_words = cursor.fetchone()[0]
-            
-            # 翻译过的单词数
-            cursor.execute('''
-                SELECT COUNT(*) FROM word_history 
-                WHERE chat_id = ? AND translated = 1
-            ''', (chat_id,))
-            translated_words = cursor.fetchone()[0]
-            
+            now = datetime.now()
+            today = now.strftime('%Y-%m-%d')
+            week_start = (now - timedelta(days=6)).strftime('%Y-%m-%d')
+            with self.get_connection() as conn:
+                total_words, today_words, week_words, translated_words = conn.execute('''
+                    SELECT COALESCE(SUM(total), 0),
+                           COALESCE(SUM(CASE WHEN day = ? THEN total END), 0),
+                           COALESCE(SUM(CASE WHEN day >= ? THEN total END), 0),
+                           COALESCE(SUM(translated), 0)
+                    FROM user_daily_stats
+                    WHERE chat_id = ?
+                ''', (today, week_start, chat_id)).fetchone()
+
             return {
                 'total_words': total_words,
                 'today_words': today_words,
+                'week_words': week_words,
                 'translated_words': translated_words
             }
-            
+
         except Exception as e:
             logger.error(f"获取用户统计失败: {e}")
             return {
                 'total_words': 0,
                 'today_words': 0,
+                'week_words': 0,
                 'translated_words': 0
             }
-        finally:
-            conn.close()
-    
+
     def update_user_wordlist(self, chat_id: int, wordlist_name: str) -> bool:
         """更新用户选择的单词表"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                UPDATE user_settings 
-                SET selected_wordlist = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE chat_id = ?
-            ''', (wordlist_name, chat_id))
-            
-            if cursor.rowcount == 0:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO user_settings (chat_id, selected_wordlist)
-                    VALUES (?, ?)
-                ''', (chat_id, wordlist_name))
-            
-            conn.commit()
+                    UPDATE user_settings
+                    SET selected_wordlist = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE chat_id = ?
+                ''', (wordlist_name, chat_id))
+
+                if cursor.rowcount == 0:
+                    cursor.execute('''
+                        INSERT INTO user_settings (chat_id, selected_wordlist)
+                        VALUES (?, ?)
+                    ''', (chat_id, wordlist_name))
+
             return True
-            
+
         except Exception as e:
             logger.error(f"更新用户单词表失败: {e}")
-            conn.rollback()
             return False
         finally:
-            conn.close()
-    
+            self.settings_cache.invalidate(chat_id)
+
     def get_user_wordlist(self, chat_id: int) -> str:
         """获取用户选择的单词表"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                SELECT selected_wordlist FROM user_settings WHERE chat_id = ?
-            ''', (chat_id,))
-            
-            result = cursor.fetchone()
-            return result[0] if result and result[0] else '3'
-            
-        except Exception as e:
-            logger.error(f"获取用户单词表失败: {e}")
-            return '3'
-        finally:
-            conn.close()
+        return self.load_user_settings(chat_id).selected_wordlist
 
     def add_user_query_word(self, chat_id: int, word: str, translation: str) -> bool:
-        """添加用户查询的单词"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """记录用户查询的单词（每个单词一行，重复查询只更新最近时间和次数，经写后队列批量写入）"""
         try:
-            cursor.execute('''
+            self.write_behind.enqueue('''
                 INSERT INTO user_query_words (chat_id, word, translation)
                 VALUES (?, ?, ?)
+                ON CONFLICT(chat_id, word) DO UPDATE SET
+                    translation = excluded.translation,
+                    last_seen = CURRENT_TIMESTAMP,
+                    lookup_count = lookup_count + 1
             ''', (chat_id, word.lower(), translation))
-            
-            conn.commit()
+
             return True
-            
+
         except Exception as e:
             logger.error(f"添加用户查询单词失败: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
 
     def get_user_query_words(self, chat_id: int, limit: int = 100) -> List[dict]:
-        """获取用户查询的单词列表"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """获取用户最近查询的单词列表"""
         try:
-            cursor.execute('''
-                SELECT DISTINCT word, translation, created_at 
-                FROM user_query_words 
-                WHERE chat_id = ? 
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (chat_id, limit))
-            
-            results = cursor.fetchall()
+            with self.get_connection() as conn:
+                results = conn.execute('''
+                    SELECT word, translation, last_seen, first_seen, lookup_count
+                    FROM user_query_words
+                    WHERE chat_id = ?
+                    ORDER BY last_seen DESC
+                    LIMIT ?
+                ''', (chat_id, limit)).fetchall()
+
             return [
                 {
                     'word': row[0],
                     'translation': row[1],
-                    'created_at': row[2]
+                    'created_at': row[2],
+                    'first_seen': row[3],
+                    'lookup_count': row[4]
                 }
                 for row in results
             ]
-            
+
+        except Exception as e:
+            logger.error(f"获取用户查询单词失败: {e}")
+            return []
+
+    def get_user_query_word_list(self, chat_id: int, limit: int = 5000) -> List[str]:
+        """获取用户查询过的单词（按字母排序，只读主键索引，不读取翻译内容）"""
+        try:
+            with self.get_connection() as conn:
+                results = conn.execute('''
+                    SELECT word FROM user_query_words
+                    WHERE chat_id = ?
+                    ORDER BY word
+                    LIMIT ?
+                ''', (chat_id, limit)).fetchall()
+
+            return [row[0] for row in results]
+
         except Exception as e:
             logger.error(f"获取用户查询单词失败: {e}")
             return []
-        finally:
-            conn.close()
 
     def get_user_query_words_count(self, chat_id: int) -> int:
         """获取用户查询单词的数量"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                SELECT COUNT(DISTINCT word) FROM user_query_words WHERE chat_id = ?
-            ''', (chat_id,))
-            
-            result = cursor.fetchone()
+            with self.get_connection() as conn:
+                result = conn.execute('''
+                    SELECT COUNT(*) FROM user_query_words WHERE chat_id = ?
+                ''', (chat_id,)).fetchone()
+
             return result[0] if result else 0
-            
+
         except Exception as e:
             logger.error(f"获取用户查询单词数量失败: {e}")
             return 0
-        finally:
-            conn.close()
 
     def clear_user_query_words(self, chat_id: int) -> bool:
         """清空用户查询的单词"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('DELETE FROM user_query_words WHERE chat_id = ?', (chat_id,))
-            conn.commit()
+            # 先写入缓冲中的记录，避免清空后再被写入
+            self.write_behind.flush()
+            with self.get_connection() as conn:
+                conn.execute('DELETE FROM user_query_words WHERE chat_id = ?', (chat_id,))
+
             return True
-            
+
         except Exception as e:
             logger.error(f"清空用户查询单词失败: {e}")
-            conn.rollback()
             return False
-        finally:
-            conn.close()
 # 创建全局数据库管理器实例
 db_manager = DatabaseManager()
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""
+数据库迁移模块
+按版本号顺序执行迁移步骤，已执行的版本记录在 schema_version 表中
+"""
+import time
+from typing import Callable, List, Union
+from loguru import logger
+
+from .pool import ConnectionPool
+
+
+class Migration:
+    """单个迁移步骤：一组 SQL 语句或一个接收连接的函数"""
+
+    def __init__(self, version: int, description: str, steps: Union[List[str], Callable]):
+        self.version = version
+        self.description = description
+        self.steps = steps
+
+    def apply(self, conn):
+        """在给定连接（已开启事务）上执行迁移"""
+        if callable(self.steps):
+            self.steps(conn)
+        else:
+            for sql in self.steps:
+                conn.execute(sql)
+
+
+def _table_exists(conn, name: str) -> bool:
+    """检查表是否存在"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def _create_base_schema(conn):
+    """基础表结构（对迁移系统引入前的旧数据库同样安全）"""
+    # 创建用户表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            chat_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    # 创建用户设置表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_settings (
+            chat_id INTEGER PRIMARY KEY,
+            auto_send_enabled BOOLEAN DEFAULT 0,
+            auto_send_interval_min INTEGER DEFAULT 30,
+            auto_send_interval_max INTEGER DEFAULT 120,
+            selected_wordlist TEXT DEFAULT '3',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (chat_id) REFERENCES users (chat_id)
+        )
+    ''')
+
+    # 创建单词学习历史表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS word_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            word TEXT NOT NULL,
+            translated BOOLEAN DEFAULT 0,
+            translation TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (chat_id) REFERENCES users (chat_id)
+        )
+    ''')
+
+    # 创建翻译缓存表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS translation_cache (
+            word TEXT PRIMARY KEY,
+            translation TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            usage_count INTEGER DEFAULT 1
+        )
+    ''')
+
+    # 创建用户查询单词表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_query_words (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            word TEXT NOT NULL,
+            translation TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (chat_id) REFERENCES users (chat_id)
+        )
+    ''')
+
+    # 创建索引
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_word_history_chat_id ON word_history(chat_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_word_history_created_at ON word_history(created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_users_last_activity ON users(last_activity)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_query_words_chat_id ON user_query_words(chat_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_query_words_created_at ON user_query_words(created_at)')
+
+
+def _create_daily_stats(conn):
+    """用户每日学习统计汇总表（由写入路径增量维护）"""
+    rollup_exists = _table_exists(conn, 'user_daily_stats')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_daily_stats (
+            chat_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            translated INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (chat_id, day)
+        ) WITHOUT ROWID
+    ''')
+    if not rollup_exists:
+        # 首次创建时从已有的学习历史回填
+        conn.execute('''
+            INSERT INTO user_daily_stats (chat_id, day, total, translated)
+            SELECT chat_id, DATE(created_at, 'localtime'), COUNT(*), COALESCE(SUM(translated = 1), 0)
+            FROM word_history
+            WHERE chat_id IS NOT NULL
+            GROUP BY chat_id, DATE(created_at, 'localtime')
+        ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_daily_stats_day ON user_daily_stats(day)')
+
+
+def _dedupe_user_query_words(conn):
+    """查询记录改为每个 (chat_id, word) 一行，保留首次/最近查询时间和查询次数"""
+    conn.execute('''
+        CREATE TABLE user_query_words_dedup (
+            chat_id INTEGER NOT NULL,
+            word TEXT NOT NULL,
+            translation TEXT,
+            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            lookup_count INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (chat_id, word),
+            FOREIGN KEY (chat_id) REFERENCES users (chat_id)
+        )
+    ''')
+    # 合并旧数据，翻译取最近一次查询的结果
+    conn.execute('''
+        INSERT INTO user_query_words_dedup (chat_id, word, translation, first_seen, last_seen, lookup_count)
+        SELECT agg.chat_id, agg.word, q.translation, agg.first_seen, agg.last_seen, agg.lookup_count
+        FROM (
+            SELECT chat_id, LOWER(word) AS word, MIN(created_at) AS first_seen,
+                   MAX(created_at) AS last_seen, COUNT(*) AS lookup_count, MAX(id) AS last_id
+            FROM user_query_words
+            WHERE chat_id IS NOT NULL
+            GROUP BY chat_id, LOWER(word)
+        ) agg
+        JOIN user_query_words q ON q.id = agg.last_id
+    ''')
+    conn.execute('DROP TABLE user_query_words')
+    conn.execute('ALTER TABLE user_query_words_dedup RENAME TO user_query_words')
+    conn.execute('CREATE INDEX idx_user_query_words_chat_last_seen ON user_query_words(chat_id, last_seen)')
+
+
+def _type_translation_cache(conn):
+    """翻译缓存记录条目类型、来源和过期时间，已缓存的"未找到"结果立即过期"""
+    conn.execute("ALTER TABLE translation_cache ADD COLUMN kind TEXT NOT NULL DEFAULT 'dict'")
+    conn.execute("ALTER TABLE translation_cache ADD COLUMN source TEXT NOT NULL DEFAULT 'ecdict'")
+    # NULL 表示永不过期
+    conn.execute('ALTER TABLE translation_cache ADD COLUMN expires_at TIMESTAMP')
+    # 旧数据按内容区分：词典释义以标题开头，"❌" 开头的是未找到，其余为 AI 翻译
+    conn.execute('''
+        UPDATE translation_cache SET
+            kind = CASE
+                WHEN translation LIKE '❌%💡%' THEN 'suggestion'
+                WHEN translation LIKE '❌%' THEN 'not_found'
+                WHEN translation LIKE '<b>📖%' THEN 'dict'
+                ELSE 'ai'
+            END,
+            source = CASE
+                WHEN translation LIKE '❌%' OR translation LIKE '<b>📖%' THEN 'ecdict'
+                ELSE 'ollama'
+            END
+    ''')
+    conn.execute('''
+        UPDATE translation_cache SET expires_at = CURRENT_TIMESTAMP
+        WHERE kind IN ('not_found', 'suggestion')
+    ''')
+    conn.execute('CREATE INDEX idx_translation_cache_source_kind ON translation_cache(source, kind)')
+    conn.execute('CREATE INDEX idx_translation_cache_expires ON translation_cache(expires_at)')
+
+
+# 迁移列表，只能在末尾追加新版本，不要修改已发布的版本
+MIGRATIONS = [
+    Migration(1, '基础表结构', _create_base_schema),
+    Migration(2, '每日学习统计汇总表', _create_daily_stats),
+    Migration(3, '学习历史复合索引 (chat_id, created_at)', [
+        'CREATE INDEX IF NOT EXISTS idx_word_history_chat_created ON word_history(chat_id, created_at)',
+        'DROP INDEX IF EXISTS idx_word_history_chat_id',
+    ]),
+    Migration(4, '学习历史复合索引 (chat_id, translated)', [
+        'CREATE INDEX IF NOT EXISTS idx_word_history_chat_translated ON word_history(chat_id, translated)',
+    ]),
+    Migration(5, '查询记录复合索引 (chat_id, created_at)', [
+        'CREATE INDEX IF NOT EXISTS idx_user_query_words_chat_created ON user_query_words(chat_id, created_at)',
+        'DROP INDEX IF EXISTS idx_user_query_words_chat_id',
+    ]),
+    Migration(6, '管理工具查询索引', [
+        'CREATE INDEX IF NOT EXISTS idx_word_history_word ON word_history(word)',
+        'CREATE INDEX IF NOT EXISTS idx_translation_cache_usage ON translation_cache(usage_count, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_user_settings_auto_send ON user_settings(auto_send_enabled)',
+    ]),
+    Migration(7, '查询记录按 (chat_id, word) 去重', _dedupe_user_query_words),
+    Migration(8, '翻译缓存条目类型、来源和过期时间', _type_translation_cache),
+    Migration(9, '缓存元数据表（词典渲染模板版本）', [
+        'CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+    ]),
+]
+
+
+class MigrationRunner:
+    """迁移执行器
+
+    每个迁移版本在独立的短事务中执行（索引逐个构建），
+    WAL 模式下其他连接在迁移期间仍可正常读取；
+    多个进程（机器人和 admin.py）同时启动时，在写事务内确认版本尚未执行，同一版本只执行一次
+    """
+
+    def __init__(self, pool: ConnectionPool, migrations: List[Migration] = None):
+        self.pool = pool
+        self.migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+
+    def current_version(self) -> int:
+        """获取数据库当前的结构版本"""
+        with self.pool.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            result = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+        return result[0] or 0
+
+    def run(self) -> int:
+        """执行所有待执行的迁移，返回执行的数量"""
+        current = self.current_version()
+        pending = [m for m in self.migrations if m.version > current]
+        if not pending:
+            logger.debug(f"数据库结构已是最新版本 v{current}")
+            return 0
+
+        applied = 0
+        for migration in pending:
+            started = time.perf_counter()
+            with self.pool.connection() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                # 取得写锁后重新读取版本，其他进程可能已执行了这个迁移
+                version = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] or 0
+                if version >= migration.version:
+                    logger.debug(f"数据库迁移 v{migration.version} 已由其他进程执行，跳过")
+                    continue
+                migration.apply(conn)
+                conn.execute(
+                    'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                    (migration.version, migration.description)
+                )
+            applied += 1
+            logger.info(
+                f"数据库迁移 v{migration.version} 完成: {migration.description} "
+                f"({(time.perf_counter() - started) * 1000:.1f}ms)"
+            )
+
+        return applied
@@ -0,0 +1,31 @@
+"""
+用户设置数据模型
+"""
+from dataclasses import dataclass, asdict
+
+
+@dataclass(frozen=True)
+class UserSettings:
+    """用户设置（不可变，可安全地在缓存中共享）"""
+    chat_id: int
+    auto_send_enabled: bool = False
+    interval_min: int = 30
+    interval_max: int = 120
+    selected_wordlist: str = '3'
+
+    @classmethod
+    def from_row(cls, chat_id: int, row: tuple) -> 'UserSettings':
+        """从 user_settings 查询结果创建"""
+        return cls(
+            chat_id=chat_id,
+            auto_send_enabled=bool(row[0]),
+            interval_min=row[1],
+            interval_max=row[2],
+            selected_wordlist=row[3] or '3'
+        )
+
+    def to_dict(self) -> dict:
+        """转换为处理器使用的字典格式"""
+        data = asdict(self)
+        del data['chat_id']
+        return data
@@ -0,0 +1,156 @@
+"""
+写后队列（write-behind）模块
+缓冲只追加的写入事件和计数器增量，按时间间隔或行数阈值合并为单个事务批量提交；
+连续刷新失败 max_retries 次后逐行写入，丢弃并记录无法写入的行，避免一行坏数据让缓冲区无限增长
+"""
+import threading
+import time
+from loguru import logger
+
+from .pool import ConnectionPool
+
+
+class WriteBehindQueue:
+    """写后队列：将同一 SQL 的多次写入合并为一次 executemany，计数器增量按 key 聚合"""
+
+    def __init__(self, pool: ConnectionPool, flush_interval: float = 0.2, max_rows: int = 500,
+                 max_retries: int = 3):
+        self.pool = pool
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.max_retries = max_retries
+        self._buffer = {}
+        self._counters = {}
+        self._rows = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        # 连续刷新失败的次数，成功后清零
+        self._failures = 0
+        self.flushed_rows = 0
+        self.flush_count = 0
+        self.dropped_rows = 0
+
+    def _ensure_started(self):
+        """按需启动后台刷新线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, sql: str, params: tuple):
+        """缓冲一条写入"""
+        if self._closed:
+            raise RuntimeError("写后队列已关闭")
+        with self._cond:
+            self._ensure_started()
+            self._buffer.setdefault(sql, []).append(params)
+            self._rows += 1
+            if self._rows >= self.max_rows:
+                self._cond.notify()
+
+    def increment(self, sql: str, key: tuple, delta: tuple = (1,)):
+        """累加一个计数器增量，同一 key 的多次增量在刷新时合并为一行
+
+        刷新时以 key + 合计增量 作为参数执行 sql
+        """
+        if self._closed:
+            raise RuntimeError("写后队列已关闭")
+        with self._cond:
+            self._ensure_started()
+            counters = self._counters.setdefault(sql, {})
+            current = counters.get(key)
+            if current is None:
+                counters[key] = tuple(delta)
+                self._rows += 1
+                if self._rows >= self.max_rows:
+                    self._cond.notify()
+            else:
+                counters[key] = tuple(a + b for a, b in zip(current, delta))
+
+    def depth(self) -> int:
+        """获取尚未写入数据库的行数"""
+        return self._rows
+
+    def _run(self):
+        """后台线程：每隔 flush_interval 或积累到 max_rows 时刷新"""
+        while True:
+            with self._cond:
+                if not self._closed and self._rows < self.max_rows:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    break
+            self.flush()
+
+    def flush(self) -> int:
+        """立即把缓冲区写入数据库，返回写入的行数"""
+        with self._flush_lock:
+            with self._cond:
+                if not self._rows:
+                    return 0
+                batch, counters, rows = self._buffer, self._counters, self._rows
+                self._buffer, self._counters, self._rows = {}, {}, 0
+
+            if self._failures >= self.max_retries:
+                return self._flush_rows(batch, counters)
+
+            started = time.perf_counter()
+            try:
+                with self.pool.connection() as conn:
+                    for sql, params in batch.items():
+                        conn.executemany(sql, params)
+                    for sql, deltas in counters.items():
+                        conn.executemany(sql, [key + delta for key, delta in deltas.items()])
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"写后队列刷新失败（第 {self._failures} 次），{rows} 行将在下次重试: {e}")
+                with self._cond:
+                    for sql, params in batch.items():
+                        self._buffer.setdefault(sql, [])[:0] = params
+                    for sql, deltas in counters.items():
+                        pending = self._counters.setdefault(sql, {})
+                        for key, delta in deltas.items():
+                            if key in pending:
+                                pending[key] = tuple(a + b for a, b in zip(pending[key], delta))
+                            else:
+                                pending[key] = delta
+                                self._rows += 1
+                    self._rows += sum(len(params) for params in batch.values())
+                return 0
+
+            self._failures = 0
+            self.flushed_rows += rows
+            self.flush_count += 1
+            logger.debug(f"写后队列刷新 {rows} 行，耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+            return rows
+
+    def _flush_rows(self, batch: dict, counters: dict) -> int:
+        """逐行写入（每行单独提交），无法写入的行记录日志后丢弃，返回写入的行数"""
+        statements = [(sql, params) for sql, rows in batch.items() for params in rows]
+        statements += [(sql, key + delta) for sql, deltas in counters.items() for key, delta in deltas.items()]
+        written = 0
+        for sql, params in statements:
+            try:
+                with self.pool.connection() as conn:
+                    conn.execute(sql, params)
+                written += 1
+            except Exception as e:
+                self.dropped_rows += 1
+                logger.error(f"写后队列丢弃无法写入的行 {params!r}: {e}\n{sql.strip()}")
+
+        self._failures = 0
+        self.flushed_rows += written
+        self.flush_count += 1
+        logger.warning(f"写后队列逐行写入 {written} 行，丢弃 {len(statements) - written} 行")
+        return written
+
+    def close(self):
+        """停止后台线程并写入剩余数据"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
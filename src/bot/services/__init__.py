@@ -1,18 +1,25 @@
 """
 服务模块 - 集成所有业务服务
+
+按需导入：部分服务模块在导入时创建全局数据库管理器，
+只导入 ai_client、virtual_wordlists 等子模块时不应连带打开数据库
 """
+import importlib
+
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'TranslationService': 'translation',
+    'ECDictService': 'ecdict_service',
+    'ecdict_service': 'ecdict_service',
+    'WordService': 'word_service',
+    'WordManager': 'word_manager',
+    'SchedulerService': 'scheduler',
+}
+
+__all__ = list(_EXPORTS)
 
-from .translation import TranslationService
-from .ecdict_service import ECDictService, ecdict_service
-from .word_service import WordService
-from .word_manager import WordManager
-from .scheduler import SchedulerService
 
-__all__ = [
-    'TranslationService',
-    'ECDictService', 
-    'ecdict_service',
-    'WordService',
-    'WordManager',
-    'SchedulerService'
-]
\ No newline at end of file
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
@@ -0,0 +1,151 @@
+"""
+异步 AI 翻译客户端
+通过 ollama.AsyncClient 调用本地 Ollama 服务，生成过程不阻塞事件循环；
+全局并发上限之外的请求排队等待，每个请求有超时，调用方被取消时 HTTP 请求随之中断；
+可选流式生成，边生成边回调已生成的文本
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+from ollama import AsyncClient
+
+from ..utils.config import Config
+
+
+class OllamaClient:
+    """Ollama 异步客户端（带超时、并发上限和指标统计）"""
+
+    def __init__(self, host: Optional[str] = None, model: str = 'qwen2.5:7b',
+                 timeout: float = 60.0, max_in_flight: int = 2):
+        self.host = host
+        self.model = model
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        # AsyncClient 和信号量都绑定在事件循环上，循环变化时重新创建
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self.in_flight = 0
+        self.queued = 0
+        self.metrics = {
+            'requests': 0,
+            'started': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'cancelled': 0,
+            'queue_wait_total': 0.0,
+            'queue_wait_max': 0.0,
+            'generation_total': 0.0,
+            'generation_max': 0.0,
+            'streams': 0,
+            'first_chunk_total': 0.0,
+            'first_chunk_max': 0.0,
+        }
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._client = AsyncClient(host=self.host, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    async def _generate(self, messages: List[Dict[str, str]], on_progress, started: float) -> str:
+        """执行生成；提供 on_progress 时使用流式接口，每收到一段内容就以累计文本回调一次"""
+        if on_progress is None:
+            response = await self._client.chat(model=self.model, messages=messages)
+            return response.message.content or ''
+
+        parts = []
+        stream = await self._client.chat(model=self.model, messages=messages, stream=True)
+        async for part in stream:
+            content = part.message.content
+            if not content:
+                continue
+            if not parts:
+                first_chunk = time.perf_counter() - started
+                self.metrics['streams'] += 1
+                self.metrics['first_chunk_total'] += first_chunk
+                self.metrics['first_chunk_max'] = max(self.metrics['first_chunk_max'], first_chunk)
+            parts.append(content)
+            await on_progress(''.join(parts))
+        return ''.join(parts)
+
+    async def chat(self, messages: List[Dict[str, str]], timeout: Optional[float] = None,
+                   on_progress: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """发送对话请求并返回回复内容
+
+        排队和生成的总时间超过 timeout 时抛出 asyncio.TimeoutError；调用方任务被取消时请求随之取消。
+        提供 on_progress 时流式生成，on_progress 以目前为止的完整文本调用
+        """
+        self._bind_loop()
+        timeout = self.timeout if timeout is None else timeout
+        metrics = self.metrics
+        metrics['requests'] += 1
+        queued_at = time.perf_counter()
+        self.queued += 1
+        acquired = False
+
+        async def run() -> str:
+            nonlocal acquired
+            async with self._semaphore:
+                acquired = True
+                self.queued -= 1
+                metrics['started'] += 1
+                wait = time.perf_counter() - queued_at
+                metrics['queue_wait_total'] += wait
+                metrics['queue_wait_max'] = max(metrics['queue_wait_max'], wait)
+
+                self.in_flight += 1
+                started = time.perf_counter()
+                try:
+                    return await self._generate(messages, on_progress, started)
+                finally:
+                    self.in_flight -= 1
+                    elapsed = time.perf_counter() - started
+                    metrics['generation_total'] += elapsed
+                    metrics['generation_max'] = max(metrics['generation_max'], elapsed)
+
+        try:
+            content = await asyncio.wait_for(run(), timeout)
+            metrics['completed'] += 1
+            return content
+
+        except asyncio.TimeoutError:
+            metrics['timeouts'] += 1
+            logger.warning(f"AI 请求超时 ({timeout:.0f}s, {'生成中' if acquired else '排队中'})")
+            raise
+        except asyncio.CancelledError:
+            metrics['cancelled'] += 1
+            logger.debug("AI 请求已取消")
+            raise
+        except Exception:
+            metrics['failed'] += 1
+            raise
+        finally:
+            if not acquired:
+                self.queued -= 1
+
+    def stats(self) -> dict:
+        """获取客户端指标"""
+        metrics = self.metrics
+        started = metrics['started']
+        return {
+            **metrics,
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'queue_wait_avg': metrics['queue_wait_total'] / started if started else 0.0,
+            'generation_avg': metrics['generation_total'] / started if started else 0.0,
+            'first_chunk_avg': metrics['first_chunk_total'] / metrics['streams'] if metrics['streams'] else 0.0,
+        }
+
+
+# 创建全局客户端
+ai_client = OllamaClient(
+    host=Config.get_ollama_host(),
+    model=Config.get_ollama_model(),
+    timeout=Config.get_ollama_timeout(),
+    max_in_flight=Config.get_ollama_max_in_flight(),
+)
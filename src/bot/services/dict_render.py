@@ -0,0 +1,214 @@
+"""
+词典结果渲染
+词条先解析为紧凑的 DictRecord（释义已分行、词形变化和考试标签已解析），
+渲染出的 HTML 按 (单词, 匹配的变形, 模板版本) 缓存；修改模板常量后版本号随之改变，
+机器人启动时发现版本变化会删除 translation_cache 中按旧模板渲染的词典条目
+"""
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.lru_cache import LRUCache
+
+
+# 词形变化类型名称
+EXCHANGE_NAMES = {
+    'p': '过去式', 'd': '过去分词', 'i': '现在分词',
+    '3': '第三人称单数', 'r': '比较级', 't': '最高级',
+    's': '复数', '0': '原型'
+}
+
+# 词形变化的显示顺序
+EXCHANGE_ORDER = ('p', 'd', 'i', '3', 'r', 't', 's', '0')
+
+# 考试标签名称
+TAG_NAMES = {
+    'zk': '中考', 'gk': '高考', 'ky': '考研',
+    'cet4': '四级', 'cet6': '六级',
+    'toefl': '托福', 'ielts': '雅思', 'gre': 'GRE'
+}
+
+# 模板片段
+TEMPLATES = {
+    'title': "<b>📖 {word}</b>",
+    'phonetic': "<i>🔊 /{phonetic}/</i>",
+    'matched_form': "<i>🔁 {form} 是 {word} 的{kinds}</i>",
+    'lemma': "<i>🔁 也是 {lemma} 的{kinds}</i>",
+    'translation_header': "<b>🇨🇳 中文释义</b>",
+    'definition_header': "<b>🇬🇧 英文释义</b>",
+    'bullet': "  • {line}",
+    'pos': "<b>📝 词性:</b> <code>{pos}</code>",
+    'exchange_header': "<b>🔄 词形变化</b>",
+    'exchange_item': "<b>{name}:</b> <code>{value}</code>",
+    'level_header': "<b>⭐ 权威评级</b>",
+    'collins': "柯林斯 <b>{collins}星</b>",
+    'oxford': "<b>牛津3000</b>",
+    'bnc': "BNC词频: <code>{bnc}</code>",
+    'frq': "现代词频: <code>{frq}</code>",
+    'tag_header': "<b>🎯 考试范围</b>",
+    'tag_item': "<code>{name}</code>",
+    'separator': " | ",
+}
+
+# 渲染逻辑本身有改动时递增
+RENDER_REVISION = 2
+
+
+def _template_version() -> str:
+    """根据模板常量计算版本号"""
+    source = repr((RENDER_REVISION, EXCHANGE_NAMES, EXCHANGE_ORDER, TAG_NAMES, sorted(TEMPLATES.items())))
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+
+
+TEMPLATE_VERSION = _template_version()
+
+
+def _split_lines(text: Optional[str]) -> Tuple[str, ...]:
+    """按行拆分释义，去掉空行"""
+    if not text:
+        return ()
+    return tuple(line.strip() for line in text.split('\n') if line.strip())
+
+
+class DictRecord:
+    """解析后的词条"""
+
+    __slots__ = ('word', 'phonetic', 'translation', 'definition', 'pos',
+                 'exchange', 'lemma_kinds', 'collins', 'oxford', 'bnc', 'frq', 'tags')
+
+    def __init__(self, word: str, phonetic: str = '', translation: Tuple[str, ...] = (),
+                 definition: Tuple[str, ...] = (), pos: str = '', exchange: Tuple[Tuple[str, str], ...] = (),
+                 lemma_kinds: str = '', collins: int = 0, oxford: int = 0, bnc: int = 0, frq: int = 0,
+                 tags: Tuple[str, ...] = ()):
+        self.word = word
+        self.phonetic = phonetic
+        self.translation = translation
+        self.definition = definition
+        self.pos = pos
+        self.exchange = exchange
+        # 词条本身是变形时相对原型的变换类型（exchange 的 1: 项）
+        self.lemma_kinds = lemma_kinds
+        self.collins = collins
+        self.oxford = oxford
+        self.bnc = bnc
+        self.frq = frq
+        self.tags = tags
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DictRecord':
+        """从 stardict 查询结果解析"""
+        exchanges = {}
+        for item in (data.get('exchange') or '').split('/'):
+            if ':' in item:
+                key, value = item.split(':', 1)
+                exchanges[key] = value
+        tags = (data.get('tag') or '').split()
+
+        return cls(
+            word=data.get('word') or '',
+            phonetic=data.get('phonetic') or '',
+            translation=_split_lines(data.get('translation')),
+            definition=_split_lines(data.get('definition')),
+            pos=data.get('pos') or '',
+            exchange=tuple((key, exchanges[key]) for key in EXCHANGE_ORDER if key in exchanges),
+            lemma_kinds=exchanges.get('1', ''),
+            collins=int(data.get('collins') or 0),
+            oxford=int(data.get('oxford') or 0),
+            bnc=int(data.get('bnc') or 0),
+            frq=int(data.get('frq') or 0),
+            tags=tuple(tag for tag in tags if tag in TAG_NAMES),
+        )
+
+
+def format_exchange(record: DictRecord) -> str:
+    """格式化词形变化信息"""
+    return TEMPLATES['separator'].join(
+        TEMPLATES['exchange_item'].format(name=EXCHANGE_NAMES[key], value=value)
+        for key, value in record.exchange
+    )
+
+
+def _kind_names(kinds: str) -> str:
+    """变换类型的名称"""
+    return '、'.join(EXCHANGE_NAMES[k] for k in kinds if k in EXCHANGE_NAMES and k != '0') or '变形'
+
+
+def render(record: DictRecord, matched_form: Optional[Tuple[str, str]] = None) -> str:
+    """将词条渲染为 Telegram HTML"""
+    lines = [TEMPLATES['title'].format(word=record.word)]
+
+    # 音标
+    if record.phonetic:
+        lines.append(TEMPLATES['phonetic'].format(phonetic=record.phonetic))
+
+    # 查询的是变形词
+    lemma = dict(record.exchange).get('0')
+    if matched_form:
+        form, kinds = matched_form
+        lines.append(TEMPLATES['matched_form'].format(form=form, word=record.word, kinds=_kind_names(kinds)))
+    # 有自己释义的变形词同时给出原型
+    elif lemma and lemma.lower() != record.word.lower():
+        lines.append(TEMPLATES['lemma'].format(lemma=lemma, kinds=_kind_names(record.lemma_kinds)))
+
+    lines.append("")  # 空行分隔
+
+    # 中文释义和英文释义
+    for header, entries in (('translation_header', record.translation), ('definition_header', record.definition)):
+        if entries:
+            lines.append(TEMPLATES[header])
+            lines.extend(TEMPLATES['bullet'].format(line=line) for line in entries)
+            lines.append("")
+
+    # 词性
+    if record.pos:
+        lines.append(TEMPLATES['pos'].format(pos=record.pos))
+        lines.append("")
+
+    # 词形变化
+    if record.exchange:
+        lines.append(TEMPLATES['exchange_header'])
+        lines.append(f"  {format_exchange(record)}")
+        lines.append("")
+
+    # 词频和等级信息
+    level_info = []
+    if record.collins > 0:
+        level_info.append(TEMPLATES['collins'].format(collins=record.collins))
+    if record.oxford > 0:
+        level_info.append(TEMPLATES['oxford'])
+    if record.bnc:
+        level_info.append(TEMPLATES['bnc'].format(bnc=record.bnc))
+    if record.frq:
+        level_info.append(TEMPLATES['frq'].format(frq=record.frq))
+
+    if level_info:
+        lines.append(TEMPLATES['level_header'])
+        lines.append(f"  {TEMPLATES['separator'].join(level_info)}")
+        lines.append("")
+
+    # 考试标签
+    if record.tags:
+        lines.append(TEMPLATES['tag_header'])
+        tags = (TEMPLATES['tag_item'].format(name=TAG_NAMES[tag]) for tag in record.tags)
+        lines.append(f"  {TEMPLATES['separator'].join(tags)}")
+
+    return '\n'.join(lines)
+
+
+class RenderCache:
+    """渲染结果缓存，键为 (单词, 匹配的变形, 模板版本)"""
+
+    def __init__(self, max_entries: int = 20000, max_bytes: int = 32 * 1024 * 1024):
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+
+    def render(self, word_data: Dict[str, Any], matched_form: Optional[Tuple[str, str]] = None) -> str:
+        """渲染词条，命中缓存时不再解析和拼接"""
+        key = ((word_data.get('word') or '').lower(), matched_form, TEMPLATE_VERSION)
+        html = self.cache.get(key)
+        if html is None:
+            html = render(DictRecord.from_dict(word_data), matched_form)
+            self.cache.put(key, html)
+        return html
+
+    def stats(self) -> dict:
+        """获取缓存统计"""
+        return self.cache.stats()
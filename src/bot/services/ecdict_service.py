@@ -2,11 +2,23 @@
 ECDICT 词典服务
 基于 ECDICT 词典数据库提供英汉翻译服务
 """
+import json
 import os
+import sqlite3
 import sys
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
 from loguru import logger
 
+from .dict_render import RenderCache
+from ..models.cache_kinds import KIND_DICT, KIND_NOT_FOUND, KIND_SUGGESTION
+from ..dictionary.ecdict_binary import BinaryDict, source_signature
+from ..dictionary.headword_index import HeadwordIndex
+from ..dictionary.lemma_index import load_lemma_index
+from ..dictionary.suggestion_index import load_or_build, word_rank
+from ..utils.config import Config
+
 # 将 ECDICT 路径添加到 Python 路径
 ECDICT_PATH = os.path.join(os.path.dirname(__file__), '../../../data/ecdict')
 sys.path.insert(0, ECDICT_PATH)
@@ -17,27 +29,145 @@ except ImportError as e:
     logger.error(f"无法导入 ECDICT 模块: {e}")
     stardict = None
 
+# stardict 表的字段（与 StarDict.query 返回的字典一致）
+STARDICT_FIELDS = ('id', 'word', 'sw', 'phonetic', 'definition', 'translation', 'pos',
+                   'collins', 'oxford', 'tag', 'bnc', 'frq', 'exchange', 'detail', 'audio')
+
+
+# 词典加载状态
+STATE_IDLE = 'idle'
+STATE_LOADING = 'loading'
+STATE_READY = 'ready'
+STATE_FAILED = 'failed'
+
+# 词典加载期间临时提示的开头
+LOADING_PREFIX = "⏳ 词典正在加载中"
+
 
 class ECDictService:
-    """ECDICT 词典服务类"""
+    """ECDICT 词典服务类
+
+    创建时不加载词典，首次使用或调用 start_loading() 时在后台线程中加载；
+    加载完成前 is_available() 返回 False，翻译请求得到"加载中"的快速响应
+    """
     
     def __init__(self):
+        self.binary_db = None
         self.dict_db = None
+        self.dict_db_path = None
         self.csv_db = None
-        self._initialize_dict()
+        self._local = threading.local()
+        self.headword_index = None
+        self.suggestion_index = None
+        self.lemma_index = None
+        self.render_cache = RenderCache()
+        self.state = STATE_IDLE
+        self.load_seconds = None
+        self.ready_after = None
+        self._created_at = time.perf_counter()
+        self._state_lock = threading.Lock()
+        self._loaded = threading.Event()
+    
+    def start_loading(self) -> bool:
+        """在后台线程中开始加载词典，已经开始过时返回 False"""
+        with self._state_lock:
+            if self.state != STATE_IDLE:
+                return False
+            self.state = STATE_LOADING
+        threading.Thread(target=self._load, name="ecdict-loader", daemon=True).start()
+        return True
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """等待词典加载完成（尚未开始时先开始加载），返回词典是否可用"""
+        self.start_loading()
+        self._loaded.wait(timeout)
+        return self.is_available()
+    
+    def is_loading(self) -> bool:
+        """词典是否仍在加载（尚未开始时触发后台加载）"""
+        if self.state == STATE_IDLE:
+            self.start_loading()
+        return self.state in (STATE_IDLE, STATE_LOADING)
+    
+    def loading_message(self, word: str) -> str:
+        """词典加载期间的快速响应"""
+        return f"{LOADING_PREFIX}，请稍后再查询 '{word}'"
+    
+    def is_loading_message(self, text: str) -> bool:
+        """是否为词典加载期间的临时提示（不是真正的翻译，不应记入学习历史）"""
+        return text.startswith(LOADING_PREFIX)
+    
+    def _load(self):
+        """加载词典和各类索引（在后台线程中执行）"""
+        started = time.perf_counter()
+        try:
+            self._initialize_dict()
+            if self._has_backend():
+                self._load_suggestion_index()
+                self.lemma_index = load_lemma_index(
+                    os.path.join(ECDICT_PATH, 'ecdict.lemma'), os.path.join(ECDICT_PATH, 'ecdict.db')
+                )
+        except Exception as e:
+            logger.error(f"加载 ECDICT 失败: {e}")
+        
+        finished = time.perf_counter()
+        self.load_seconds = finished - started
+        self.ready_after = finished - self._created_at
+        self.state = STATE_READY if self._has_backend() else STATE_FAILED
+        self._loaded.set()
+        
+        if self.state == STATE_READY:
+            logger.success(
+                f"ECDICT 词典已就绪: 加载耗时 {self.load_seconds:.2f}s, 创建后 {self.ready_after:.2f}s 可用"
+            )
+        else:
+            logger.warning(f"ECDICT 词典不可用 (耗时 {self.load_seconds:.2f}s)")
+    
+    def status(self) -> dict:
+        """获取词典加载状态"""
+        return {
+            'state': self.state,
+            'load_seconds': self.load_seconds,
+            'ready_after': self.ready_after,
+        }
     
     def _initialize_dict(self):
         """初始化词典数据库"""
+        # 优先使用内存映射的二进制词典（不依赖 stardict 模块）
+        binary_path = os.path.join(ECDICT_PATH, 'ecdict.bin')
+        sqlite_path = os.path.join(ECDICT_PATH, 'ecdict.db')
+        if os.path.exists(binary_path):
+            try:
+                started = time.perf_counter()
+                binary_db = BinaryDict(binary_path)
+                # ecdict.db 重新转换后二进制词典已过时
+                if os.path.exists(sqlite_path) and binary_db.source_signature != source_signature(sqlite_path):
+                    binary_db.close()
+                    logger.warning("二进制词典与词典数据库不一致，回退到 SQLite，请执行 setup_ecdict.py --build-binary 重新生成")
+                else:
+                    self.binary_db = binary_db
+                    logger.info(
+                        f"成功加载二进制词典: {binary_path} ({self.binary_db.count()} 条, "
+                        f"{(time.perf_counter() - started) * 1000:.1f}ms)"
+                    )
+                    return
+            except Exception as e:
+                logger.error(f"加载二进制词典失败，回退到 SQLite: {e}")
+                self.binary_db = None
+
         if not stardict:
             logger.error("ECDICT 模块未正确导入")
             return
         
         try:
             # 优先使用 SQLite 数据库（如果存在）
-            sqlite_path = os.path.join(ECDICT_PATH, 'ecdict.db')
             if os.path.exists(sqlite_path):
                 self.dict_db = stardict.StarDict(sqlite_path)
+                self.dict_db_path = sqlite_path
+                self._local.dict_db = self.dict_db
                 logger.info(f"成功加载 SQLite 词典数据库: {sqlite_path}")
+                if Config.get_ecdict_preload_index():
+                    self._load_headword_index(sqlite_path)
             else:
                 # 回退到 CSV 文件
                 csv_path = os.path.join(ECDICT_PATH, 'ecdict.csv')
@@ -49,9 +179,139 @@ class ECDictService:
         except Exception as e:
             logger.error(f"初始化 ECDICT 失败: {e}")
     
+    def _load_headword_index(self, sqlite_path: str):
+        """预加载词头索引，失败时回退到直接查询 SQLite"""
+        try:
+            started = time.perf_counter()
+            index = HeadwordIndex.build_from_sqlite(sqlite_path)
+            elapsed = time.perf_counter() - started
+            self.headword_index = index
+            logger.info(
+                f"词头索引已加载: {len(index)} 个词头, "
+                f"内存 {index.memory_bytes() / 1024 / 1024:.1f}MB, "
+                f"构建 {elapsed:.2f}s, 平均查找 {index.benchmark():.1f}µs"
+            )
+        except Exception as e:
+            logger.error(f"加载词头索引失败: {e}")
+            self.headword_index = None
+
+    def _suggestion_rows(self):
+        """纠错索引的词表来源：有词频、柯林斯、牛津或考试标签的单词"""
+        columns = ('word', 'frq', 'bnc', 'collins', 'oxford', 'tag')
+        if self.binary_db:
+            for word, frq, bnc, collins, oxford, tag in self.binary_db.scan(columns):
+                if frq or bnc or collins or oxford or tag:
+                    yield word, word_rank(frq, bnc)
+            return
+
+        sqlite_path = os.path.join(ECDICT_PATH, 'ecdict.db')
+        conn = sqlite3.connect(f'file:{sqlite_path}?mode=ro', uri=True)
+        try:
+            cursor = conn.execute('''
+                SELECT word, frq, bnc FROM stardict
+                WHERE frq > 0 OR bnc > 0 OR collins > 0 OR oxford > 0 OR (tag IS NOT NULL AND tag != '')
+            ''')
+            for word, frq, bnc in cursor:
+                yield word, word_rank(frq, bnc)
+        finally:
+            conn.close()
+
+    def _load_suggestion_index(self):
+        """加载（或首次构建）拼写纠错索引，持久化在词典文件旁边"""
+        if self.binary_db:
+            source_path = self.binary_db.path
+        elif self.dict_db:
+            source_path = os.path.join(ECDICT_PATH, 'ecdict.db')
+        else:
+            return
+        index_path = os.path.join(ECDICT_PATH, 'ecdict.suggest')
+        self.suggestion_index = load_or_build(index_path, source_path, self._suggestion_rows)
+
+    def _sqlite_dict(self):
+        """获取当前线程的 StarDict 实例（sqlite3 连接不能跨线程使用）"""
+        db = getattr(self._local, 'dict_db', None)
+        if db is None and self.dict_db is not None:
+            db = stardict.StarDict(self.dict_db_path)
+            self._local.dict_db = db
+        return db
+
+    def _sqlite_conn(self) -> sqlite3.Connection:
+        """获取当前线程的只读 sqlite3 连接（批量查询使用）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f'file:{self.dict_db_path}?mode=ro', uri=True)
+            self._local.conn = conn
+        return conn
+
+    def query_many(self, words: List[str], fields: Optional[Tuple[str, ...]] = None,
+                   chunk_size: int = 500) -> Dict[str, Optional[Dict[str, Any]]]:
+        """批量精确查询，返回 {单词(小写): 词条}，未收录的单词对应 None
+
+        SQLite 按块执行 IN (...) 查询；fields 指定时只读取这些字段（如只做存在性检查时传 ('id', 'word')），
+        可以省去大部分行解码开销。二进制词典直接在内存索引中查找，始终返回完整词条
+        """
+        keys = list(dict.fromkeys(word.strip().lower() for word in words if word and word.strip()))
+        results: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(keys)
+        if not keys or not self.is_available():
+            return results
+
+        try:
+            if self.binary_db:
+                for key in keys:
+                    results[key] = self.binary_db.query(key)
+            elif self.dict_db:
+                columns = STARDICT_FIELDS if fields is None else tuple(dict.fromkeys(('word',) + tuple(fields)))
+                word_index = columns.index('word')
+                conn = self._sqlite_conn()
+                for start in range(0, len(keys), chunk_size):
+                    chunk = keys[start:start + chunk_size]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor = conn.execute(
+                        f"SELECT {', '.join(columns)} FROM stardict WHERE word IN ({placeholders})", chunk
+                    )
+                    for row in cursor:
+                        record = dict(zip(columns, row))
+                        if record.get('detail'):
+                            record['detail'] = json.loads(record['detail'])
+                        results[row[word_index].lower()] = record
+            else:
+                for key in keys:
+                    results[key] = self.query_word(key)
+        except Exception as e:
+            logger.error(f"批量查询单词失败: {e}")
+
+        return results
+
+    def resolve_many(self, words: List[str]) -> Dict[str, Tuple[Optional[Dict[str, Any]], Optional[Tuple[str, str]]]]:
+        """批量查询并把变形词还原为原型，返回 {单词(小写): (词条, 匹配的变形)}"""
+        resolved = {}
+        for key, word_data in self.query_many(words).items():
+            # 只有未收录或没有自己释义的单词才需要逐个还原
+            if self.lemma_index is not None and not self._has_senses(word_data):
+                resolved[key] = self.resolve_word(key)
+            else:
+                resolved[key] = (word_data, None)
+        return resolved
+
+    def has_memory_index(self) -> bool:
+        """存在性检查能否只查内存中的词头索引（二进制词典或预加载的词头索引），不访问 SQLite"""
+        return self.binary_db is not None or self.headword_index is not None
+    
+    def has_word(self, word: str) -> bool:
+        """检查单词是否存在于词典中"""
+        if self.binary_db:
+            return word in self.binary_db.index
+        if self.headword_index is not None:
+            return word in self.headword_index
+        return self.query_word(word) is not None
+
+    def _has_backend(self) -> bool:
+        """是否已加载任一词典后端"""
+        return self.binary_db is not None or self.dict_db is not None or self.csv_db is not None
+    
     def is_available(self) -> bool:
-        """检查 ECDICT 服务是否可用"""
-        return self.dict_db is not None or self.csv_db is not None
+        """检查 ECDICT 服务是否可用（加载完成且有可用的词典后端）"""
+        return self.state == STATE_READY and self._has_backend()
     
     def query_word(self, word: str) -> Optional[Dict[str, Any]]:
         """查询单词"""
@@ -62,9 +322,17 @@ class ECDictService:
             # 清理输入的单词
             word = word.strip().lower()
             
+            if self.binary_db:
+                result = self.binary_db.query(word)
+            # 有词头索引时先在内存中确认单词存在，只为命中的单词读取完整记录
+            elif self.headword_index is not None and self.dict_db:
+                row_id = self.headword_index.lookup(word)
+                if row_id is None:
+                    return None
+                result = self._sqlite_dict().query(row_id)
             # 优先使用 SQLite 数据库
-            if self.dict_db:
-                result = self.dict_db.query(word)
+            elif self.dict_db:
+                result = self._sqlite_dict().query(word)
             elif self.csv_db:
                 result = self.csv_db.query(word)
             else:
@@ -75,126 +343,38 @@ class ECDictService:
             logger.error(f"查询单词 '{word}' 失败: {e}")
             return None
     
-    def format_translation(self, word_data: Dict[str, Any]) -> str:
-        """格式化翻译结果"""
-        if not word_data:
-            return ""
-        
-        lines = []
-        
-        # 单词标题
-        word = word_data.get('word', '')
-        lines.append(f"<b>📖 {word}</b>")
-        
-        # 音标
-        phonetic = word_data.get('phonetic', '')
-        if phonetic:
-            lines.append(f"<i>🔊 /{phonetic}/</i>")
-        
-        lines.append("")  # 空行分隔
-        
-        # 中文释义
-        translation = word_data.get('translation', '')
-        if translation:
-            lines.append("<b>🇨🇳 中文释义</b>")
-            # 处理多行释义
-            for line in translation.split('\n'):
-                if line.strip():
-                    lines.append(f"  • {line.strip()}")
-            lines.append("")
-        
-        # 英文释义
-        definition = word_data.get('definition', '')
-        if definition:
-            lines.append("<b>🇬🇧 英文释义</b>")
-            for line in definition.split('\n'):
-                if line.strip():
-                    lines.append(f"  • {line.strip()}")
-            lines.append("")
-        
-        # 词性
-        pos = word_data.get('pos', '')
-        if pos:
-            lines.append(f"<b>📝 词性:</b> <code>{pos}</code>")
-            lines.append("")
-        
-        # 词形变化
-        exchange = word_data.get('exchange', '')
-        if exchange:
-            exchange_info = self._format_exchange(exchange)
-            if exchange_info:
-                lines.append("<b>🔄 词形变化</b>")
-                lines.append(f"  {exchange_info}")
-                lines.append("")
-        
-        # 词频和等级信息
-        collins = word_data.get('collins', 0)
-        oxford = word_data.get('oxford', 0)
-        bnc = word_data.get('bnc', '')
-        frq = word_data.get('frq', '')
-        
-        level_info = []
-        if collins and collins > 0:
-            level_info.append(f"柯林斯 <b>{collins}星</b>")
-        if oxford and oxford > 0:
-            level_info.append("<b>牛津3000</b>")
-        if bnc and str(bnc) != '0':
-            level_info.append(f"BNC词频: <code>{bnc}</code>")
-        if frq and str(frq) != '0':
-            level_info.append(f"现代词频: <code>{frq}</code>")
+    @staticmethod
+    def _has_senses(word_data: Optional[Dict[str, Any]]) -> bool:
+        """词条是否有自己的中文或英文释义"""
+        return bool(word_data and (word_data.get('translation') or word_data.get('definition')))
+    
+    def resolve_word(self, word: str) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[str, str]]]:
+        """查询单词，未收录或没有释义的变形词还原为原型词条
+
+        返回 (词条, 匹配的变形)，匹配的变形为 (变形词, 变换类型)，使用精确命中的词条时为 None
+        """
+        word_data = self.query_word(word)
+        if self.lemma_index is None:
+            return word_data, None
         
-        if level_info:
-            lines.append("<b>⭐ 权威评级</b>")
-            lines.append(f"  {' | '.join(level_info)}")
-            lines.append("")
+        # 精确命中的词条有自己的释义时直接使用（left、found、saw 既是变形也是独立的单词），
+        # 其原型在渲染时一并显示
+        if self._has_senses(word_data):
+            return word_data, None
         
-        # 考试标签
-        tag = word_data.get('tag', '')
-        if tag:
-            tag_mapping = {
-                'zk': '中考', 'gk': '高考', 'ky': '考研',
-                'cet4': '四级', 'cet6': '六级',
-                'toefl': '托福', 'ielts': '雅思', 'gre': 'GRE'
-            }
-            tags = []
-            for t in tag.split():
-                if t in tag_mapping:
-                    tags.append(f"<code>{tag_mapping[t]}</code>")
-            if tags:
-                lines.append("<b>🎯 考试范围</b>")
-                lines.append(f"  {' | '.join(tags)}")
+        form = word.strip().lower()
+        for lemma, kinds in self.lemma_index.lookup(form):
+            lemma_data = self.query_word(lemma)
+            if lemma_data:
+                return lemma_data, (form, kinds)
         
-        return '\n'.join(lines)
+        return word_data, None
     
-    def _format_exchange(self, exchange: str) -> str:
-        """格式化词形变化信息"""
-        if not exchange:
-            return ""
-        
-        try:
-            # 解析 exchange 字段
-            exchanges = {}
-            for item in exchange.split('/'):
-                if ':' in item:
-                    key, value = item.split(':', 1)
-                    exchanges[key] = value
-            
-            exchange_names = {
-                'p': '过去式', 'd': '过去分词', 'i': '现在分词', 
-                '3': '第三人称单数', 'r': '比较级', 't': '最高级', 
-                's': '复数', '0': '原型'
-            }
-            
-            formatted = []
-            for key in ['p', 'd', 'i', '3', 'r', 't', 's', '0']:
-                if key in exchanges:
-                    name = exchange_names.get(key, key)
-                    formatted.append(f"<b>{name}:</b> <code>{exchanges[key]}</code>")
-            
-            return ' | '.join(formatted) if formatted else ""
-        except Exception as e:
-            logger.error(f"格式化词形变化失败: {e}")
+    def format_translation(self, word_data: Dict[str, Any], matched_form: Optional[Tuple[str, str]] = None) -> str:
+        """格式化翻译结果（matched_form 为查询时匹配到的变形）"""
+        if not word_data:
             return ""
+        return self.render_cache.render(word_data, matched_form)
     
     def search_similar_words(self, word: str, limit: int = 5) -> list:
         """搜索相似单词"""
@@ -204,8 +384,17 @@ class ECDictService:
         try:
             word = word.strip().lower()
             
-            if self.dict_db:
-                matches = self.dict_db.match(word, limit, strip=True)
+            # 优先使用纠错索引（编辑距离 2 以内，按词频排序）
+            if self.suggestion_index is not None:
+                suggestions = self.suggestion_index.suggest(word, limit)
+                if suggestions:
+                    return suggestions
+            
+            # 没有纠错结果时回退到前缀匹配
+            if self.binary_db:
+                matches = self.binary_db.match(word, limit, strip=True)
+            elif self.dict_db:
+                matches = self._sqlite_dict().match(word, limit, strip=True)
             elif self.csv_db:
                 matches = self.csv_db.match(word, limit, strip=True)
             else:
@@ -217,20 +406,24 @@ class ECDictService:
             logger.error(f"搜索相似单词失败: {e}")
             return []
     
-    def translate(self, word: str) -> str:
-        """翻译单词（主要接口）"""
-        # 首先精确查询
-        word_data = self.query_word(word)
+    def lookup(self, word: str) -> Tuple[str, str]:
+        """查询单词，返回 (条目类型, 结果文本)，类型见 cache_kinds"""
+        # 首先精确查询，变形词还原为原型
+        word_data, matched_form = self.resolve_word(word)
         if word_data:
-            return self.format_translation(word_data)
+            return KIND_DICT, self.format_translation(word_data, matched_form)
         
         # 如果没找到，尝试搜索相似单词
         similar_words = self.search_similar_words(word)
         if similar_words:
             suggestions = ', '.join(similar_words[:3])
-            return f"❌ 未找到单词 '{word}'\n💡 你是否要查找: {suggestions}"
+            return KIND_SUGGESTION, f"❌ 未找到单词 '{word}'\n💡 你是否要查找: {suggestions}"
         
-        return f"❌ 词典中未找到单词 '{word}'"
+        return KIND_NOT_FOUND, f"❌ 词典中未找到单词 '{word}'"
+    
+    def translate(self, word: str) -> str:
+        """翻译单词（主要接口）"""
+        return self.lookup(word)[1]
 
 
 # 创建全局实例
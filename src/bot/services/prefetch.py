@@ -0,0 +1,173 @@
+"""
+翻译预取
+自动发送单词时提前选出每个用户的下一个单词，由后台任务在 AI 空闲时逐个预先翻译并载入内存缓存，
+用户点击翻译按钮时直接命中缓存；统计预取命中率和浪费的预取
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from loguru import logger
+
+from ..models.async_database import async_db_manager
+from .ai_client import ai_client
+
+
+class TranslationPrefetcher:
+    """自动发送单词的翻译预取器（单个后台任务顺序执行，AI 有请求排队时让路）"""
+
+    def __init__(self, translate: Callable[[str], Awaitable[str]], max_queue: int = 100,
+                 track_per_chat: int = 20, idle_poll: float = 0.5):
+        self._translate = translate
+        self.max_queue = max_queue
+        self.track_per_chat = track_per_chat
+        self.idle_poll = idle_poll
+        # 队列和后台任务绑定在事件循环上，循环变化时重新创建
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        # 每个用户预先选好的下一个单词: chat_id -> (单词表, 单词)
+        self._planned: Dict[int, Tuple[str, str]] = {}
+        # 已发送、尚未请求翻译的单词，每个用户保留最近 track_per_chat 个
+        self._sent: Dict[int, OrderedDict] = {}
+        # 翻译已在缓存中的 (chat_id, 单词)
+        self._ready: Set[Tuple[int, str]] = set()
+        self.metrics = {
+            'planned': 0,
+            'prefetched': 0,
+            'already_cached': 0,
+            'failed': 0,
+            'dropped': 0,
+            'hits': 0,
+            'misses': 0,
+            'wasted': 0,
+        }
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = loop.create_task(self._run(), name="translation-prefetch")
+
+    def plan(self, chat_id: int, wordlist: str, word: str):
+        """记录用户的下一个单词并加入预取队列（需在事件循环中调用）"""
+        self._bind_loop()
+        self._discard_planned(chat_id)
+        self._planned[chat_id] = (wordlist, word)
+        self.metrics['planned'] += 1
+        try:
+            self._queue.put_nowait((chat_id, word))
+        except asyncio.QueueFull:
+            # 队列已满说明预取跟不上，放弃这次预取，点击时照常翻译
+            self.metrics['dropped'] += 1
+
+    def take(self, chat_id: int, wordlist: str) -> Optional[str]:
+        """取出预先选好的单词（单词表已切换时作废并返回 None），之后开始跟踪该单词的翻译请求"""
+        planned = self._planned.pop(chat_id, None)
+        if planned is None:
+            return None
+        planned_wordlist, word = planned
+        if planned_wordlist != wordlist:
+            self._waste(chat_id, word)
+            return None
+
+        sent = self._sent.setdefault(chat_id, OrderedDict())
+        sent[word] = None
+        sent.move_to_end(word)
+        while len(sent) > self.track_per_chat:
+            old_word, _ = sent.popitem(last=False)
+            self._waste(chat_id, old_word)
+        return word
+
+    def record_request(self, chat_id: int, word: str):
+        """记录翻译请求：自动发送的单词翻译已预取完成为命中，否则为未命中，其他单词不统计"""
+        sent = self._sent.get(chat_id)
+        if not sent or word not in sent:
+            return
+        del sent[word]
+        if (chat_id, word) in self._ready:
+            self._ready.discard((chat_id, word))
+            self.metrics['hits'] += 1
+        else:
+            self.metrics['misses'] += 1
+
+    def discard(self, chat_id: int):
+        """用户关闭自动发送时丢弃其预取状态"""
+        self._discard_planned(chat_id)
+        for word in self._sent.pop(chat_id, {}):
+            self._waste(chat_id, word)
+
+    def _discard_planned(self, chat_id: int):
+        planned = self._planned.pop(chat_id, None)
+        if planned is not None:
+            self._waste(chat_id, planned[1])
+
+    def _waste(self, chat_id: int, word: str):
+        """单词不再会被请求翻译；已预取的计为浪费"""
+        if (chat_id, word) in self._ready:
+            self._ready.discard((chat_id, word))
+            self.metrics['wasted'] += 1
+
+    def _is_tracked(self, chat_id: int, word: str) -> bool:
+        planned = self._planned.get(chat_id)
+        return (planned is not None and planned[1] == word) or word in self._sent.get(chat_id, ())
+
+    async def _wait_idle(self):
+        """AI 有请求排队或并发已满时等待，预取不与用户的请求争抢"""
+        while ai_client.queued or ai_client.in_flight >= ai_client.max_in_flight:
+            await asyncio.sleep(self.idle_poll)
+
+    async def _prefetch(self, chat_id: int, word: str):
+        if await async_db_manager.load_cached_translation(word):
+            self.metrics['already_cached'] += 1
+        else:
+            await self._wait_idle()
+            await self._translate(word)
+            # 词典加载中等情况下翻译结果不会写入缓存
+            if not await async_db_manager.load_cached_translation(word):
+                self.metrics['failed'] += 1
+                return
+            self.metrics['prefetched'] += 1
+
+        if self._is_tracked(chat_id, word):
+            self._ready.add((chat_id, word))
+        else:
+            # 预取期间用户已关闭自动发送或切换了单词表
+            self.metrics['wasted'] += 1
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            chat_id, word = await queue.get()
+            try:
+                if self._is_tracked(chat_id, word):
+                    await self._prefetch(chat_id, word)
+            except Exception as e:
+                self.metrics['failed'] += 1
+                logger.debug(f"预取翻译失败 - {word}: {e}")
+            finally:
+                queue.task_done()
+
+    async def stop(self):
+        """停止后台任务（未完成的预取直接放弃）"""
+        worker, self._worker = self._worker, None
+        self._loop = None
+        if worker is None or worker.done():
+            return
+        worker.cancel()
+        try:
+            await worker
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict:
+        """获取预取统计，hit_rate 为自动发送单词的翻译请求中预取已完成的比例"""
+        metrics = self.metrics
+        requests = metrics['hits'] + metrics['misses']
+        return {
+            **metrics,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'ready': len(self._ready),
+            'hit_rate': metrics['hits'] / requests if requests else 0.0,
+        }
@@ -6,8 +6,10 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from loguru import logger
 
+from .translation import translation_prefetcher
 from .word_manager import word_manager
-from ..models.database import db_manager
+from ..models.async_database import async_db_manager
+from ..utils.config import Config
 
 
 class SchedulerService:
@@ -20,18 +22,18 @@ class SchedulerService:
         user = update.effective_user
         
         # 更新用户信息和自动发送状态
-        db_manager.add_or_update_user(
+        await async_db_manager.add_or_update_user(
             chat_id=chat_id,
             username=user.username,
             first_name=user.first_name,
             last_name=user.last_name
         )
-        db_manager.update_auto_send_status(chat_id, True)
+        await async_db_manager.update_auto_send_status(chat_id, True)
         
         logger.info(f"用户 {user.username or user.first_name} (ID: {chat_id}) 开启了自动发送单词功能")
         
         # 获取用户设置
-        settings = db_manager.get_user_settings(chat_id)
+        settings = await async_db_manager.get_user_settings(chat_id)
         
         # 移除已存在的任务（如果有）
         current_jobs = context.job_queue.get_jobs_by_name(f"auto_word_{chat_id}")
@@ -59,7 +61,8 @@ class SchedulerService:
         user = update.effective_user
         
         # 更新数据库中的自动发送状态
-        db_manager.update_auto_send_status(chat_id, False)
+        await async_db_manager.update_auto_send_status(chat_id, False)
+        translation_prefetcher.discard(chat_id)
         
         logger.info(f"用户 {user.username or user.first_name} (ID: {chat_id}) 关闭了自动发送单词功能")
         
@@ -75,30 +78,33 @@ class SchedulerService:
         """自动发送随机单词给用户，带翻译按钮"""
         chat_id = context.job.chat_id
         
-        # 检查用户是否仍然启用自动发送
-        settings = db_manager.get_user_settings(chat_id)
-        if not settings['auto_send_enabled']:
+        # 检查用户是否仍然启用自动发送（设置对象来自缓存，无需每次查询数据库）
+        settings = await async_db_manager.load_user_settings(chat_id)
+        if not settings.auto_send_enabled:
             logger.debug(f"用户 {chat_id} 已关闭自动发送，停止任务")
+            translation_prefetcher.discard(chat_id)
             return
         
         # 确保使用用户选择的单词表
-        user_wordlist = db_manager.get_user_wordlist(chat_id)
+        user_wordlist = settings.selected_wordlist
         logger.debug(f"自动发送 - 用户 (ID: {chat_id}) 的选择单词表: {user_wordlist}")
         
         # 获取当前word_manager的单词表状态
         current_wordlist_before = word_manager.get_current_wordlist_info()
         logger.debug(f"自动发送 - 切换前当前单词表: {current_wordlist_before}")
         
-        word_manager.switch_wordlist(user_wordlist)
-        
         # 确认切换后的状态
-        current_wordlist_after = word_manager.get_current_wordlist_info()
+        current_wordlist_after = (await word_manager.switch_wordlist_async(user_wordlist)
+                                  or word_manager.get_current_wordlist_info())
         logger.debug(f"自动发送 - 切换后当前单词表: {current_wordlist_after}")
         
-        word = word_manager.get_random_word()
+        # 优先使用上次发送时预先选好（翻译已预取）的单词，单词表切换过则重新选择
+        word = translation_prefetcher.take(chat_id, user_wordlist) or word_manager.get_random_word()
+        # 趁单词表仍是该用户的，同时选好下一个单词
+        next_word = word_manager.get_random_word()
         
         # 记录自动发送的单词到历史
-        db_manager.add_word_to_history(chat_id, word)
+        await async_db_manager.add_word_to_history(chat_id, word)
         
         logger.debug(f"自动发送单词给用户 (ID: {chat_id}): {word} (来自单词表: {current_wordlist_after['name']})")
         
@@ -113,8 +119,12 @@ class SchedulerService:
                 reply_markup=reply_markup
             )
             
+            # 在后台预先翻译下一个单词
+            if Config.get_translation_prefetch_enabled():
+                translation_prefetcher.plan(chat_id, user_wordlist, next_word)
+            
             # 安排下一次发送
-            interval = random.randint(settings['interval_min'], settings['interval_max'])
+            interval = random.randint(settings.interval_min, settings.interval_max)
             context.job_queue.run_once(
                 SchedulerService.send_auto_word,
                 interval,
@@ -126,4 +136,5 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"自动发送单词失败 (用户 ID: {chat_id}): {e}")
             # 如果发送失败（如用户阻止了机器人），停止自动发送
-            db_manager.update_auto_send_status(chat_id, False)
\ No newline at end of file
+            await async_db_manager.update_auto_send_status(chat_id, False)
+            translation_prefetcher.discard(chat_id)
\ No newline at end of file
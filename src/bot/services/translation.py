@@ -1,61 +1,102 @@
 """
 翻译服务 - 集成 ECDICT 词典
 """
+from typing import Awaitable, Callable, Optional
+
 from telegram import Update
 from loguru import logger
-from ollama import chat
-from ollama import ChatResponse
 
-from ..models.database import db_manager
+from ..models.async_database import async_db_manager
+from ..models.cache_kinds import KIND_AI, KIND_DICT, KIND_SUGGESTION, SOURCE_ECDICT, SOURCE_OLLAMA
+from ..utils.config import Config
+from ..utils.progressive_message import ProgressiveMessage
+from ..utils.single_flight import SingleFlight
+from .ai_client import ai_client
 from .ecdict_service import ecdict_service
+from .prefetch import TranslationPrefetcher
+
+
+# 同一单词的并发翻译请求只计算一次
+translation_flight = SingleFlight()
 
 
 class TranslationService:
     """翻译服务类"""
     
     @staticmethod
-    def translate(word: str) -> str:
-        """翻译单词"""
+    async def translate(word: str, on_progress: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """翻译单词（同一单词同时到达的请求共享一次翻译结果）
+
+        on_progress 用于逐步显示流式生成的 AI 翻译，合并的请求只有第一个调用者的 on_progress 生效
+        """
+        return await translation_flight.do(
+            word.strip().lower(), lambda: TranslationService._translate(word, on_progress)
+        )
+    
+    @staticmethod
+    async def _translate(word: str, on_progress: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """翻译单词（查缓存、ECDICT，最后回退到 AI 翻译）"""
         logger.debug(f"开始翻译单词: {word}")
         
         # 首先尝试从缓存获取翻译
-        cached_translation = db_manager.get_cached_translation(word)
+        cached_translation = await async_db_manager.get_cached_translation(word)
         if cached_translation:
             logger.debug(f"使用缓存翻译 - {word}: {cached_translation}")
             return cached_translation
         
+        # 词典加载期间直接返回提示，不回退到耗时的 AI 翻译，也不写入缓存
+        if ecdict_service.is_loading():
+            logger.debug(f"ECDICT 尚未就绪 - {word}")
+            return ecdict_service.loading_message(word)
+        
         # 优先使用 ECDICT 词典
+        negative = None
         if ecdict_service.is_available():
             try:
-                ecdict_result = ecdict_service.translate(word)
-                logger.debug(f"ECDICT 翻译成功 - {word}")
+                kind, ecdict_result = ecdict_service.lookup(word)
+                if kind == KIND_DICT:
+                    logger.debug(f"ECDICT 翻译成功 - {word}")
+                    await async_db_manager.cache_translation(word, ecdict_result, KIND_DICT, SOURCE_ECDICT)
+                    return ecdict_result
                 
-                # 缓存翻译结果
-                db_manager.cache_translation(word, ecdict_result)
-                return ecdict_result
+                # 有拼写建议时多半是拼错了，直接返回建议，不交给 AI
+                if kind == KIND_SUGGESTION:
+                    await async_db_manager.cache_translation(
+                        word, ecdict_result, kind, SOURCE_ECDICT, ttl=Config.get_negative_cache_ttl()
+                    )
+                    return ecdict_result
+                negative = (kind, ecdict_result)
             except Exception as e:
                 logger.warning(f"ECDICT 翻译失败，回退到 AI 翻译 - {word}: {e}")
         
         # 回退到 AI 翻译
         try:
-            response: ChatResponse = chat(model='qwen2.5:7b', messages=[
+            translation = await ai_client.chat([
                 {
                     'role': 'user',
                     'content': f'请翻译英文单词 "{word}"，包括音标、词性、中文释义和例句。',
                 },
-            ])
-            
-            translation = response.message.content
+            ], on_progress=on_progress if Config.get_ai_streaming_enabled() else None)
             logger.debug(f"AI 翻译完成 - {word}: {translation}")
             
-            # 缓存翻译结果
-            db_manager.cache_translation(word, translation)
+            # AI 结果按单独的有效期缓存
+            await async_db_manager.cache_translation(
+                word, translation, KIND_AI, SOURCE_OLLAMA, ttl=Config.get_ai_translation_ttl()
+            )
             
             return translation
             
         except Exception as e:
             logger.error(f"翻译API调用失败 - {word}: {str(e)}")
-            raise
+            if negative is None:
+                raise
+            
+            # AI 不可用时返回词典的"未找到"结果，短期缓存，过期后再尝试 AI
+            kind, ecdict_result = negative
+            await async_db_manager.cache_translation(
+                word, ecdict_result, kind, SOURCE_ECDICT, ttl=Config.get_negative_cache_ttl()
+            )
+            return ecdict_result
     
     @staticmethod
     async def handle_translation_callback(update: Update) -> None:
@@ -70,13 +111,17 @@ class TranslationService:
             chat_id = user.id
             
             logger.info(f"用户 {user.username or user.first_name} (ID: {chat_id}) 请求翻译单词: {word}")
+            translation_prefetcher.record_request(chat_id, word)
             
             try:
-                translation = TranslationService.translate(word)
+                # AI 翻译时在原消息上逐步显示生成的内容
+                progress = ProgressiveMessage(lambda text: query.edit_message_text(text=text))
+                translation = await TranslationService.translate(word, on_progress=progress.update)
                 logger.debug(f"翻译成功 - {word}")
                 
-                # 更新数据库，标记该单词已被翻译
-                db_manager.add_word_to_history(chat_id, word, translated=True, translation=translation)
+                # 更新数据库，标记该单词已被翻译（词典加载期间的临时提示不记录）
+                if not ecdict_service.is_loading_message(translation):
+                    await async_db_manager.add_word_to_history(chat_id, word, translated=True, translation=translation)
                 
                 # 更新消息，显示翻译结果
                 await query.edit_message_text(
@@ -87,4 +132,8 @@ class TranslationService:
                 logger.error(f"翻译失败 - {word}: {str(e)}")
                 await query.edit_message_text(
                     text=f"📖 单词: {word}\n❌ 翻译失败: {str(e)}"
-                )
\ No newline at end of file
+                )
+
+
+# 自动发送单词的翻译预取
+translation_prefetcher = TranslationPrefetcher(TranslationService.translate)
@@ -0,0 +1,217 @@
+"""
+词典分类单词表（虚拟单词表）
+按 ECDICT 的考试标签、柯林斯星级、牛津3000 和现代词频筛选出的单词表，
+通过 stardict_tag 表和数值列索引查询（setup_ecdict.py --build-tags 生成），
+结果物化为词条 id 数组缓存到磁盘，词典文件不变时不再重复查询
+
+缓存文件布局（本机字节序）:
+    头部: 魔数、格式版本、词条数、单词块长度、签名（筛选条件和词典文件的摘要）
+    ids: 词条在 ecdict.db 中的 id（uint32）
+    words: UTF-8 单词，按行分隔
+"""
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .ecdict_service import ECDICT_PATH
+
+
+MAGIC = b'ECVLIST\x00'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('=8sIII16s')
+
+
+class WordFilter:
+    """虚拟单词表的筛选条件"""
+
+    __slots__ = ('name', 'tag', 'min_collins', 'oxford', 'max_frq')
+
+    def __init__(self, name: str, tag: Optional[str] = None, min_collins: int = 0,
+                 oxford: bool = False, max_frq: int = 0):
+        self.name = name
+        self.tag = tag
+        self.min_collins = min_collins
+        self.oxford = oxford
+        self.max_frq = max_frq
+
+    def __repr__(self) -> str:
+        return (f"WordFilter(tag={self.tag!r}, min_collins={self.min_collins}, "
+                f"oxford={self.oxford}, max_frq={self.max_frq})")
+
+    def sql(self, use_tag_table: bool = True) -> Tuple[str, tuple]:
+        """生成查询语句，返回 (sql, 参数)"""
+        conditions = []
+        params = []
+        if self.tag and use_tag_table:
+            source = "stardict_tag AS t JOIN stardict AS s ON s.id = t.word_id"
+            conditions.append("t.tag = ?")
+            params.append(self.tag)
+        else:
+            source = "stardict AS s"
+            if self.tag:
+                # 没有 stardict_tag 表时退回全表扫描（结果会缓存，只在首次生成时发生）
+                conditions.append("(' ' || s.tag || ' ') LIKE ?")
+                params.append(f'% {self.tag} %')
+        if self.min_collins:
+            conditions.append("s.collins >= ?")
+            params.append(self.min_collins)
+        if self.oxford:
+            conditions.append("s.oxford = 1")
+        if self.max_frq:
+            conditions.append("s.frq BETWEEN 1 AND ?")
+            params.append(self.max_frq)
+
+        where = ' AND '.join(conditions) or '1'
+        return f"SELECT s.id, s.word FROM {source} WHERE {where}", tuple(params)
+
+
+# 可选的虚拟单词表，键在 /wordlist 中以 virtual_ 前缀出现
+VIRTUAL_WORDLISTS: Dict[str, WordFilter] = {
+    'zk': WordFilter('中考词汇', tag='zk'),
+    'gk': WordFilter('高考词汇', tag='gk'),
+    'cet4': WordFilter('大学英语四级', tag='cet4'),
+    'cet6': WordFilter('大学英语六级', tag='cet6'),
+    'ky': WordFilter('考研词汇', tag='ky'),
+    'toefl': WordFilter('托福词汇', tag='toefl'),
+    'ielts': WordFilter('雅思词汇', tag='ielts'),
+    'gre': WordFilter('GRE 词汇', tag='gre'),
+    'cet6_core': WordFilter('六级核心（柯林斯≥3星, 词频前2万）', tag='cet6', min_collins=3, max_frq=20000),
+    'oxford': WordFilter('牛津3000核心词', oxford=True),
+    'collins5': WordFilter('柯林斯5星高频词', min_collins=5),
+    'frq5k': WordFilter('现代高频词前5000', max_frq=5000),
+}
+
+
+class VirtualWordlistStore:
+    """虚拟单词表的生成和缓存"""
+
+    def __init__(self, db_path: str, cache_dir: str):
+        self.db_path = db_path
+        self.cache_dir = cache_dir
+        self._words: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        """词典数据库存在时才提供虚拟单词表"""
+        return os.path.exists(self.db_path)
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.wl')
+
+    def _signature(self, key: str) -> bytes:
+        """筛选条件和词典文件的摘要，任一变化时缓存失效"""
+        stat = os.stat(self.db_path)
+        source = f'{VIRTUAL_WORDLISTS[key]!r}|{stat.st_size}|{stat.st_mtime_ns}'
+        return hashlib.sha1(source.encode('utf-8')).digest()[:16]
+
+    def _read_header(self, path: str) -> Optional[tuple]:
+        try:
+            with open(path, 'rb') as f:
+                magic, version, count, words_size, signature = _HEADER.unpack(f.read(_HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        return count, words_size, signature
+
+    def cached_count(self, key: str) -> int:
+        """已物化的单词数（未生成或已失效时返回 0）"""
+        if key in self._words:
+            return len(self._words[key])
+        header = self._read_header(self._cache_path(key))
+        if not header or not self.is_available() or header[2] != self._signature(key):
+            return 0
+        return header[0]
+
+    def _load(self, key: str) -> Optional[List[str]]:
+        """读取缓存文件，签名不匹配时返回 None"""
+        path = self._cache_path(key)
+        header = self._read_header(path)
+        if not header or header[2] != self._signature(key):
+            return None
+        count, words_size, _ = header
+        with open(path, 'rb') as f:
+            # 单词块位于 id 数组之后
+            f.seek(_HEADER.size + count * array('I').itemsize)
+            words = f.read(words_size).decode('utf-8').split('\n') if count else []
+        if len(words) != count:
+            return None
+        return words
+
+    def _generate(self, key: str) -> List[str]:
+        """查询词典生成单词表并写入缓存文件"""
+        started = time.perf_counter()
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        try:
+            has_tag_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stardict_tag'"
+            ).fetchone() is not None
+            if not has_tag_table:
+                logger.warning("词典缺少 stardict_tag 表，请执行 setup_ecdict.py --build-tags")
+            sql, params = VIRTUAL_WORDLISTS[key].sql(use_tag_table=has_tag_table)
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        # 按单词去重（大小写不同的词条只保留一个），单词表按字母排序
+        by_word = {}
+        for word_id, word in rows:
+            word = (word or '').strip()
+            if word and word.lower() not in by_word:
+                by_word[word.lower()] = (word, word_id)
+        entries = sorted(by_word.values())
+        ids = array('I', (word_id for _, word_id in entries))
+        words = [word for word, _ in entries]
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(key)
+            data = '\n'.join(words).encode('utf-8')
+            with open(path + '.part', 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(ids), len(data), self._signature(key)))
+                ids.tofile(f)
+                f.write(data)
+            os.replace(path + '.part', path)
+        except OSError as e:
+            logger.warning(f"保存虚拟单词表缓存失败: {e}")
+
+        logger.info(f"虚拟单词表 {key} 已生成: {len(words)} 个单词 ({(time.perf_counter() - started) * 1000:.1f}ms)")
+        return words
+
+    def get_words(self, key: str) -> List[str]:
+        """获取虚拟单词表的单词（按字母排序），依次使用内存、磁盘缓存，最后查询词典"""
+        if key not in VIRTUAL_WORDLISTS:
+            return []
+        words = self._words.get(key)
+        if words is not None:
+            return words
+
+        with self._lock:
+            if key in self._words:
+                return self._words[key]
+            if not self.is_available():
+                return []
+            try:
+                words = self._load(key)
+                if words is None:
+                    words = self._generate(key)
+            except Exception as e:
+                logger.error(f"生成虚拟单词表 {key} 失败: {e}")
+                return []
+            self._words[key] = words
+            return words
+
+
+# 创建全局实例
+virtual_wordlists = VirtualWordlistStore(
+    os.path.join(ECDICT_PATH, 'ecdict.db'),
+    os.path.join(ECDICT_PATH, 'wordlists')
+)
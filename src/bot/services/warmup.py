@@ -0,0 +1,127 @@
+"""
+翻译缓存预热
+启动后在后台线程中翻译全部系统和用户单词表的单词并写入翻译缓存，
+不占用事件循环，也不推迟机器人开始接收消息
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple
+
+from loguru import logger
+
+from ..models.database import DatabaseManager, db_manager
+from ..utils.config import Config
+from .ecdict_service import ECDictService, ecdict_service
+from .word_manager import WordManager, word_manager
+
+
+class CacheWarmer:
+    """翻译缓存预热任务"""
+
+    def __init__(self, db: DatabaseManager, dictionary: ECDictService, manager: WordManager,
+                 workers: int = 2, chunk_size: int = 200, progress_interval: float = 5.0):
+        self.db = db
+        self.dictionary = dictionary
+        self.manager = manager
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.progress_interval = progress_interval
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {
+            'vocabulary': 0,
+            'already_cached': 0,
+            'cached': 0,
+            'not_found': 0,
+            'elapsed': 0.0,
+            'done': False,
+        }
+
+    def collect_vocabulary(self) -> List[str]:
+        """收集系统和用户单词表的单词（小写去重）
+
+        不包括按词典筛选的虚拟单词表：它们动辄数万词，全部预热会生成每个虚拟表并与正常请求争抢资源
+        """
+        vocabulary = set()
+        for name, info in list(self.manager.available_wordlists.items()):
+            if info['type'] == 'virtual':
+                continue
+            for word in self.manager.get_wordlist_words(name):
+                word = word.strip().lower()
+                if word:
+                    vocabulary.add(word)
+        return sorted(vocabulary)
+
+    def start(self) -> bool:
+        """在后台线程中启动预热（等待词典就绪后开始），已在运行时返回 False"""
+        if self._thread is not None:
+            return False
+        self._thread = threading.Thread(target=self.run, name="cache-warmup", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """请求停止预热（已提交的分块执行完后结束）"""
+        self._stop.set()
+
+    def _warm_chunk(self, words: List[str]) -> Tuple[int, int]:
+        """翻译一组单词并批量写入缓存，返回 (写入数, 未找到数)"""
+        if self._stop.is_set():
+            return 0, 0
+
+        items = []
+        not_found = 0
+        for word, (word_data, matched_form) in self.dictionary.resolve_many(words).items():
+            if word_data:
+                items.append((word, self.dictionary.format_translation(word_data, matched_form)))
+            else:
+                # 未收录的单词留给运行时处理（AI 翻译等）
+                not_found += 1
+
+        return self.db.cache_translations(items), not_found
+
+    def run(self):
+        """执行预热（阻塞，通常在后台线程中调用）"""
+        if not self.dictionary.wait_ready():
+            logger.warning("ECDICT 词典不可用，跳过翻译缓存预热")
+            return
+
+        started = time.perf_counter()
+        try:
+            vocabulary = self.collect_vocabulary()
+            cached_words = self.db.get_cached_words(vocabulary)
+            pending = [word for word in vocabulary if word not in cached_words]
+            self.stats.update(vocabulary=len(vocabulary), already_cached=len(cached_words))
+            logger.info(
+                f"开始预热翻译缓存: 单词表共 {len(vocabulary)} 个单词, "
+                f"已缓存 {len(cached_words)} 个, 待翻译 {len(pending)} 个"
+            )
+
+            chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+            processed = 0
+            last_report = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cache-warmup") as pool:
+                futures = {pool.submit(self._warm_chunk, chunk): len(chunk) for chunk in chunks}
+                for future in as_completed(futures):
+                    cached, not_found = future.result()
+                    self.stats['cached'] += cached
+                    self.stats['not_found'] += not_found
+                    processed += futures[future]
+                    if time.perf_counter() - last_report >= self.progress_interval:
+                        last_report = time.perf_counter()
+                        logger.info(f"翻译缓存预热进度: {processed}/{len(pending)}")
+
+            self.stats['elapsed'] = time.perf_counter() - started
+            self.stats['done'] = not self._stop.is_set()
+            logger.success(
+                f"翻译缓存预热{'完成' if self.stats['done'] else '已停止'}: 写入 {self.stats['cached']} 个, "
+                f"词典未收录 {self.stats['not_found']} 个, 耗时 {self.stats['elapsed']:.1f}s"
+            )
+
+        except Exception as e:
+            logger.error(f"翻译缓存预热失败: {e}")
+
+
+# 创建全局预热任务
+cache_warmer = CacheWarmer(db_manager, ecdict_service, word_manager, workers=Config.get_cache_warmup_workers())
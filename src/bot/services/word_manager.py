@@ -1,12 +1,17 @@
 """
 单词管理模块 - 简化版
 """
+import asyncio
 import random
 import os
 import glob
 from datetime import datetime
+from typing import Optional
 from loguru import logger
 
+from .ecdict_service import ecdict_service
+from .virtual_wordlists import VIRTUAL_WORDLISTS, virtual_wordlists
+
 
 class WordManager:
     """单词管理器"""
@@ -90,24 +95,52 @@ class WordManager:
                 logger.error(f"计算单词表 {name} 的单词数量失败: {e}")
                 wordlists[name]['word_count'] = 0
         
+        # 词典分类单词表（按需生成，单词数在生成后才知道）
+        if virtual_wordlists.is_available():
+            for key, word_filter in VIRTUAL_WORDLISTS.items():
+                wordlists[f"virtual_{key}"] = {
+                    'file_path': None,
+                    'full_path': None,
+                    'display_name': f"🎯 {word_filter.name}",
+                    'type': 'virtual',
+                    'word_count': virtual_wordlists.cached_count(key)
+                }
+        
         logger.debug(f"发现单词表: {list(wordlists.keys())}")
         return wordlists
     
+    def _read_words(self, file_path: str) -> list:
+        """读取单词表文件中的单词（未去重）"""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        
+        words = []
+        lines = content.strip().split('\n')
+        
+        for line in lines:
+            if line.strip() and not (line.isupper() or 'The Real Saint Nick' in line):
+                line_words = [word.strip() for word in line.split(',') if word.strip()]
+                words.extend(line_words)
+        
+        return words
+    
+    def get_wordlist_words(self, wordlist_name: str) -> list:
+        """读取指定单词表的全部单词（不切换当前单词表）"""
+        info = self.available_wordlists.get(wordlist_name)
+        if not info:
+            return []
+        if info['type'] == 'virtual':
+            return virtual_wordlists.get_words(wordlist_name[len('virtual_'):])
+        try:
+            return sorted(set(self._read_words(info['full_path'])))
+        except Exception as e:
+            logger.error(f"读取单词表 {wordlist_name} 失败: {e}")
+            return []
+    
     def _count_words_in_file(self, file_path: str) -> int:
         """计算文件中的单词数量"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            
-            words = []
-            lines = content.strip().split('\n')
-            
-            for line in lines:
-                if line.strip() and not (line.isupper() or 'The Real Saint Nick' in line):
-                    line_words = [word.strip() for word in line.split(',') if word.strip()]
-                    words.extend(line_words)
-            
-            return len(set(words))  # 去重后的单词数量
+            return len(set(self._read_words(file_path)))  # 去重后的单词数量
         except Exception as e:
             logger.error(f"读取文件 {file_path} 失败: {e}")
             return 0
@@ -118,20 +151,15 @@ class WordManager:
             logger.error(f"单词表 {wordlist_name} 不存在")
             return False
         
-        file_path = self.available_wordlists[wordlist_name]['full_path']
+        info = self.available_wordlists[wordlist_name]
+        if info['type'] == 'virtual':
+            return self._load_virtual_wordlist(wordlist_name, info)
+        
+        file_path = info['full_path']
         logger.info(f"加载单词表: {file_path}")
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            
-            words = []
-            lines = content.strip().split('\n')
-            
-            for line in lines:
-                if line.strip() and not (line.isupper() or 'The Real Saint Nick' in line):
-                    line_words = [word.strip() for word in line.split(',') if word.strip()]
-                    words.extend(line_words)
+            words = self._read_words(file_path)
             
             self.words = sorted(list(set(words)))
             self.current_wordlist = wordlist_name
@@ -143,6 +171,19 @@ class WordManager:
             self.words = ["apple", "banana", "cherry"]
             return False
     
+    def _load_virtual_wordlist(self, wordlist_name: str, info: dict) -> bool:
+        """加载词典分类单词表（首次使用时生成，之后使用缓存）"""
+        words = virtual_wordlists.get_words(wordlist_name[len('virtual_'):])
+        if not words:
+            logger.error(f"单词表 {wordlist_name} 为空或生成失败")
+            return False
+        
+        self.words = words
+        self.current_wordlist = wordlist_name
+        info['word_count'] = len(words)
+        logger.debug(f"加载单词表: {wordlist_name} ({len(words)} 个单词)")
+        return True
+    
     def get_random_word(self) -> str:
         """获取随机单词"""
         if not self.words:
@@ -168,6 +209,19 @@ class WordManager:
         """切换单词表"""
         return self.load_wordlist(wordlist_name)
     
+    async def switch_wordlist_async(self, wordlist_name: str) -> Optional[dict]:
+        """切换单词表（事件循环中使用）：首次使用的虚拟单词表需要查询整个词典，在线程中生成，不阻塞其他用户
+
+        返回切换后的单词表信息，切换失败时返回 None。单词表是所有用户共享的，
+        调用方在之后的任何 await 期间都可能被其他用户切换，应使用返回值而不是再次读取当前状态
+        """
+        info = self.available_wordlists.get(wordlist_name)
+        if info and info['type'] == 'virtual':
+            await asyncio.to_thread(virtual_wordlists.get_words, wordlist_name[len('virtual_'):])
+        if not self.switch_wordlist(wordlist_name):
+            return None
+        return self.get_current_wordlist_info()
+    
     def _generate_display_name_from_filename(self, original_filename: str) -> str:
         """根据原始文件名生成显示名称"""
         if not original_filename:
@@ -206,6 +260,19 @@ class WordManager:
         
         return display_name
 
+    def find_unknown_words(self, words: list) -> list:
+        """返回词典中未收录的单词（小写，词典加载中最多等待 10 秒，不可用时返回空列表）
+
+        有内存词头索引时逐个二分查找，否则批量查询 SQLite（只读取 id 和 word）
+        """
+        if not ecdict_service.wait_ready(timeout=10):
+            return []
+        if ecdict_service.has_memory_index():
+            keys = {word.strip().lower() for word in words if word and word.strip()}
+            return sorted(word for word in keys if not ecdict_service.has_word(word))
+        records = ecdict_service.query_many(words, fields=('id', 'word'))
+        return sorted(word for word, record in records.items() if record is None)
+    
     def save_user_wordlist(self, user_id: int, filename: str, content: str) -> dict:
         """保存用户上传的单词表"""
         try:
@@ -237,16 +304,23 @@ class WordManager:
                     'error': '文件中没有找到有效的单词，请检查文件格式'
                 }
             
+            # 批量检查词典未收录的单词
+            unknown_words = self.find_unknown_words(self._read_words(file_path))
+            
             # 重新扫描单词表
             self.available_wordlists = self.scan_wordlists()
             
-            logger.info(f"用户 {user_id} 上传单词表成功: {final_filename} -> {display_name} ({word_count} 个单词)")
+            logger.info(
+                f"用户 {user_id} 上传单词表成功: {final_filename} -> {display_name} "
+                f"({word_count} 个单词, 词典未收录 {len(unknown_words)} 个)"
+            )
             
             return {
                 'success': True,
                 'filename': final_filename,
                 'display_name': display_name,
                 'word_count': word_count,
+                'unknown_words': unknown_words,
                 'wordlist_key': f"user_{final_filename[:-4]}"
             }
             
@@ -314,13 +388,8 @@ class WordManager:
                     })
         return user_wordlists
 
-    def create_user_query_wordlist(self, chat_id: int) -> dict:
-        """创建用户查询单词表"""
-        from ..models.database import db_manager
-        
-        # 获取用户查询的单词
-        query_words = db_manager.get_user_query_words(chat_id)
-        
+    def create_user_query_wordlist(self, chat_id: int, query_words: list) -> dict:
+        """创建用户查询单词表（query_words 为调用方从数据库读取的单词列表，已去重）"""
         if not query_words:
             return {
                 'success': False,
@@ -328,13 +397,8 @@ class WordManager:
             }
         
         try:
-            # 创建单词表内容
-            words_content = []
-            for word_data in query_words:
-                words_content.append(word_data['word'])
-            
-            # 去重并排序
-            unique_words = sorted(list(set(words_content)))
+            # 数据库中每个单词只有一行，这里只需排序
+            unique_words = sorted(query_words)
             content = ', '.join(unique_words)
             
             # 生成文件名 - 使用更短的名称避免callback_data过长
@@ -370,10 +434,8 @@ class WordManager:
                 'error': f'创建单词表失败: {str(e)}'
             }
 
-    def get_user_query_wordlist_info(self, chat_id: int) -> dict:
-        """获取用户查询单词表信息"""
-        from ..models.database import db_manager
-        
+    def get_user_query_wordlist_info(self, chat_id: int, query_words_count: int) -> dict:
+        """获取用户查询单词表信息（query_words_count 由调用方从数据库读取）"""
         # 查找是否已存在查询单词表（新格式：{chat_id}_{timestamp}_query.txt）
         query_wordlist_key = None
         for key, info in self.available_wordlists.items():
@@ -383,9 +445,6 @@ class WordManager:
                     query_wordlist_key = key
                     break
         
-        # 获取用户查询单词数量
-        query_words_count = db_manager.get_user_query_words_count(chat_id)
-        
         return {
             'exists': query_wordlist_key is not None,
             'wordlist_key': query_wordlist_key,
@@ -5,9 +5,11 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from loguru import logger
 import os
 
+from .ecdict_service import ecdict_service
 from .word_manager import word_manager
-from ..models.database import db_manager
+from ..models.async_database import async_db_manager
 from .translation import TranslationService
+from ..utils.progressive_message import ProgressiveMessage
 
 
 class WordService:
@@ -20,29 +22,28 @@ class WordService:
         user = update.effective_user
         
         # 确保使用用户选择的单词表
-        user_wordlist = db_manager.get_user_wordlist(chat_id)
+        user_wordlist = await async_db_manager.get_user_wordlist(chat_id)
         logger.debug(f"用户 {user.username or user.first_name} (ID: {chat_id}) 的选择单词表: {user_wordlist}")
         
         # 获取当前word_manager的单词表状态
         current_wordlist_before = word_manager.get_current_wordlist_info()
         logger.debug(f"切换前当前单词表: {current_wordlist_before}")
         
-        word_manager.switch_wordlist(user_wordlist)
-        
         # 确认切换后的状态
-        current_wordlist_after = word_manager.get_current_wordlist_info()
+        current_wordlist_after = (await word_manager.switch_wordlist_async(user_wordlist)
+                                  or word_manager.get_current_wordlist_info())
         logger.debug(f"切换后当前单词表: {current_wordlist_after}")
         
         word = word_manager.get_random_word()
         
         # 更新用户活动并记录单词学习历史
-        db_manager.add_or_update_user(
+        await async_db_manager.add_or_update_user(
             chat_id=chat_id,
             username=user.username,
             first_name=user.first_name,
             last_name=user.last_name
         )
-        db_manager.add_word_to_history(chat_id, word)
+        await async_db_manager.add_word_to_history(chat_id, word)
         
         logger.info(f"用户 {user.username or user.first_name} (ID: {chat_id}) 请求随机单词: {word} (来自单词表: {current_wordlist_after['name']})")
         
@@ -59,7 +60,7 @@ class WordService:
         user = update.effective_user
         
         # 更新用户活动
-        db_manager.add_or_update_user(
+        await async_db_manager.add_or_update_user(
             chat_id=chat_id,
             username=user.username,
             first_name=user.first_name,
@@ -68,7 +69,7 @@ class WordService:
         
         # 获取所有可用的单词表
         available_wordlists = word_manager.get_available_wordlists()
-        current_wordlist_name = db_manager.get_user_wordlist(chat_id)
+        current_wordlist_name = await async_db_manager.get_user_wordlist(chat_id)
         
         logger.info(f"用户 {user.username or user.first_name} (ID: {chat_id}) 查看单词表菜单")
         
@@ -81,11 +82,14 @@ class WordService:
         
         # 分别处理系统单词表和用户单词表
         system_wordlists = []
+        virtual_wordlists = []
         user_wordlists = []
         
         for wordlist_name, wordlist_info in available_wordlists.items():
             if wordlist_info['type'] == 'system':
                 system_wordlists.append((wordlist_name, wordlist_info))
+            elif wordlist_info['type'] == 'virtual':
+                virtual_wordlists.append((wordlist_name, wordlist_info))
             elif wordlist_info['type'] == 'user':
                 # 只显示当前用户自己的单词表
                 filename = os.path.basename(wordlist_info['full_path'])
@@ -105,6 +109,19 @@ class WordService:
                 callback_data=f"select_wordlist_{wordlist_name}"
             )])
         
+        # 添加词典分类单词表（保持定义顺序，未生成过的不显示单词数）
+        if virtual_wordlists:
+            keyboard.append([InlineKeyboardButton("━━━ 🎯 词典分类单词表 ━━━", callback_data="separator")])
+        
+        for wordlist_name, wordlist_info in virtual_wordlists:
+            prefix = "✅ " if wordlist_name == current_wordlist_name else ""
+            count_text = f" ({wordlist_info['word_count']}词)" if wordlist_info['word_count'] else ""
+            button_text = f"{prefix}{wordlist_info['display_name']}{count_text}"
+            keyboard.append([InlineKeyboardButton(
+                button_text, 
+                callback_data=f"select_wordlist_{wordlist_name}"
+            )])
+        
         # 添加分隔线（如果有用户单词表）
         if user_wordlists:
             keyboard.append([InlineKeyboardButton("━━━ 📁 我的单词表 ━━━", callback_data="separator")])
@@ -130,6 +147,7 @@ class WordService:
             "📚 <b>选择单词表</b>\n\n"
             "✅ 当前使用的单词表\n"
             "📚 系统默认单词表\n"
+            "🎯 按考试范围、柯林斯星级和词频筛选的词典单词表\n"
             "📁 用户上传的单词表\n\n"
             "💡 <b>提示：</b>\n"
             "• 发送 /upload 上传自定义单词表\n"
@@ -165,17 +183,15 @@ class WordService:
                 return
             
             # 切换单词表
-            success = word_manager.switch_wordlist(wordlist_name)
-            if not success:
+            # 切换单词表（返回的信息在切换后立即取得，不受之后其他用户切换的影响）
+            current_wordlist = await word_manager.switch_wordlist_async(wordlist_name)
+            if not current_wordlist:
                 await query.edit_message_text(f"❌ 切换到单词表 {wordlist_name} 失败。")
                 return
+            word_count = current_wordlist['word_count']
             
             # 更新数据库中的用户选择 - 使用聊天ID
-            db_manager.update_user_wordlist(chat_id, wordlist_name)
-            
-            # 获取新单词表信息
-            current_wordlist = word_manager.get_current_wordlist_info()
-            word_count = word_manager.get_word_count()
+            await async_db_manager.update_user_wordlist(chat_id, wordlist_name)
             
             await query.edit_message_text(
                 f"✅ 已切换到单词表：{current_wordlist['name']}\n"
@@ -190,7 +206,7 @@ class WordService:
             word_manager.available_wordlists = word_manager.scan_wordlists()
             
             available_wordlists = word_manager.get_available_wordlists()
-            current_wordlist_name = db_manager.get_user_wordlist(chat_id)
+            current_wordlist_name = await async_db_manager.get_user_wordlist(chat_id)
             
             if not available_wordlists:
                 await query.edit_message_text("❌ 没有找到可用的单词表文件。")
@@ -238,23 +254,36 @@ class WordService:
         
         logger.info(f"用户 {user.username or user.first_name} (ID: {chat_id}) 发送单词: {word}")
         
+        # AI 翻译时先回复一条消息并逐步更新，完成后替换为最终结果
+        progress_message = None
+        
+        async def show_progress(text: str):
+            nonlocal progress_message
+            if progress_message is None:
+                progress_message = await update.message.reply_text(text)
+            else:
+                await progress_message.edit_text(text)
+        
         try:
             # 翻译单词
-            translation = TranslationService.translate(word)
+            progress = ProgressiveMessage(show_progress)
+            translation = await TranslationService.translate(word, on_progress=progress.update)
             
             # 更新用户活动
-            db_manager.add_or_update_user(
+            await async_db_manager.add_or_update_user(
                 chat_id=chat_id,
                 username=user.username,
                 first_name=user.first_name,
                 last_name=user.last_name
             )
             
-            # 添加到用户查询单词记录
-            db_manager.add_user_query_word(chat_id, word, translation)
-            
-            # 添加到学习历史
-            db_manager.add_word_to_history(chat_id, word, translated=True, translation=translation)
+            # 词典加载期间返回的是临时提示，不记入查询记录和学习历史
+            if not ecdict_service.is_loading_message(translation):
+                # 添加到用户查询单词记录
+                await async_db_manager.add_user_query_word(chat_id, word, translation)
+                
+                # 添加到学习历史
+                await async_db_manager.add_word_to_history(chat_id, word, translated=True, translation=translation)
             
             # 创建按钮
             from telegram import InlineKeyboardButton, InlineKeyboardMarkup
@@ -264,19 +293,29 @@ class WordService:
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
-            await update.message.reply_text(
-                translation,
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
+            if progress_message is not None:
+                await progress_message.edit_text(
+                    translation,
+                    reply_markup=reply_markup,
+                    parse_mode='HTML'
+                )
+            else:
+                await update.message.reply_text(
+                    translation,
+                    reply_markup=reply_markup,
+                    parse_mode='HTML'
+                )
             
             return True
             
         except Exception as e:
             logger.error(f"处理用户单词输入失败: {e}")
-            await update.message.reply_text(
-                f"❌ 翻译单词 '{word}' 时出现错误: {str(e)}"
-            )
+            error_text = f"❌ 翻译单词 '{word}' 时出现错误: {str(e)}"
+            # 已发出进度消息时替换为错误提示，不留下未完成的翻译
+            if progress_message is not None:
+                await progress_message.edit_text(error_text)
+            else:
+                await update.message.reply_text(error_text)
             return True
     
     @staticmethod
@@ -291,13 +330,14 @@ class WordService:
         
         if callback_data == "create_query_wordlist":
             # 创建查询单词表
-            result = word_manager.create_user_query_wordlist(chat_id)
+            query_words = await async_db_manager.get_user_query_word_list(chat_id)
+            result = word_manager.create_user_query_wordlist(chat_id, query_words)
             
             if result['success']:
                 # 自动切换到新创建的单词表
                 wordlist_key = result['wordlist_key']
                 word_manager.switch_wordlist(wordlist_key)
-                db_manager.update_user_wordlist(chat_id, wordlist_key)
+                await async_db_manager.update_user_wordlist(chat_id, wordlist_key)
                 
                 await query.edit_message_text(
                     f"✅ <b>单词表创建成功！</b>\n\n"
@@ -317,7 +357,7 @@ class WordService:
                 
         elif callback_data == "view_query_words":
             # 查看查询记录
-            query_words = db_manager.get_user_query_words(chat_id, limit=20)
+            query_words = await async_db_manager.get_user_query_words(chat_id, limit=20)
             
             if not query_words:
                 await query.edit_message_text(
@@ -338,11 +378,11 @@ class WordService:
             if len(query_words) > 10:
                 message_lines.append(f"\n... 还有 {len(query_words) - 10} 个单词")
             
-            total_count = db_manager.get_user_query_words_count(chat_id)
+            total_count = await async_db_manager.get_user_query_words_count(chat_id)
             message_lines.append(f"\n📊 总计查询了 {total_count} 个不同的单词")
             
             # 检查是否已有查询单词表
-            query_info = word_manager.get_user_query_wordlist_info(chat_id)
+            query_info = word_manager.get_user_query_wordlist_info(chat_id, total_count)
             
             keyboard = []
             if query_info['query_words_count'] > 0:
@@ -389,7 +429,7 @@ class WordService:
             
         elif callback_data == "confirm_clear_query":
             # 执行清空操作
-            success = db_manager.clear_user_query_words(chat_id)
+            success = await async_db_manager.clear_user_query_words(chat_id)
             
             if success:
                 await query.edit_message_text(
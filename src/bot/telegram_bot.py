@@ -12,6 +12,13 @@ from .handlers.commands import (
 )
 from .handlers.callbacks import translation_callback, wordlist_callback
 from .services.word_service import WordService
+from .services.ai_client import ai_client
+from .services.dict_render import TEMPLATE_VERSION
+from .services.ecdict_service import ecdict_service
+from .services.translation import translation_flight, translation_prefetcher
+from .services.warmup import cache_warmer
+from .models.async_database import async_db_manager
+from .utils.config import Config
 
 
 class TelegramBot:
@@ -81,6 +88,14 @@ class TelegramBot:
         """异步启动机器人"""
         logger.info("英语学习机器人启动中...")
         
+        # 词典渲染模板改动后，数据库中按旧模板渲染的翻译缓存作废
+        deleted = await async_db_manager.sync_render_version(TEMPLATE_VERSION)
+        if deleted:
+            logger.info(f"词典渲染模板已更新 ({TEMPLATE_VERSION})，清除旧的词典翻译缓存 {deleted} 条")
+        
+        # 在后台加载词典，不阻塞机器人启动
+        ecdict_service.start_loading()
+        
         try:
             # 初始化应用程序
             await self.application.initialize()
@@ -92,6 +107,10 @@ class TelegramBot:
             await self.application.start()
             await self.application.updater.start_polling()
             
+            # 开始接收消息后再在后台预热翻译缓存
+            if Config.get_cache_warmup_enabled():
+                cache_warmer.start()
+            
             # 保持运行
             await asyncio.Event().wait()
             
@@ -100,9 +119,33 @@ class TelegramBot:
             raise
         finally:
             # 清理资源
+            cache_warmer.stop()
+            await translation_prefetcher.stop()
             await self.application.updater.stop()
             await self.application.stop()
             await self.application.shutdown()
+            async_db_manager.shutdown()
+            
+            flight_stats = translation_flight.stats()
+            if flight_stats['coalesced']:
+                logger.info(f"翻译请求合并: 共 {flight_stats['calls']} 次, 合并 {flight_stats['coalesced']} 次")
+            
+            prefetch_stats = translation_prefetcher.stats()
+            if prefetch_stats['planned']:
+                logger.info(
+                    f"翻译预取: 计划 {prefetch_stats['planned']} 个, 预取 {prefetch_stats['prefetched']}, "
+                    f"已有缓存 {prefetch_stats['already_cached']}, 命中 {prefetch_stats['hits']}, "
+                    f"未命中 {prefetch_stats['misses']} (命中率 {prefetch_stats['hit_rate']:.0%}), "
+                    f"浪费 {prefetch_stats['wasted']}"
+                )
+            
+            ai_stats = ai_client.stats()
+            if ai_stats['requests']:
+                logger.info(
+                    f"AI 翻译统计: 请求 {ai_stats['requests']} 次, 完成 {ai_stats['completed']}, "
+                    f"超时 {ai_stats['timeouts']}, 取消 {ai_stats['cancelled']}, 失败 {ai_stats['failed']}, "
+                    f"平均排队 {ai_stats['queue_wait_avg']:.2f}s, 平均生成 {ai_stats['generation_avg']:.2f}s"
+                )
     
     def run(self):
         """启动机器人（同步接口）"""
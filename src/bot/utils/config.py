@@ -21,6 +21,71 @@ class Config:
             return False
         return True
     
+    @staticmethod
+    def get_user_activity_write_interval() -> int:
+        """获取用户活动时间的最小写入间隔（秒）"""
+        return int(os.getenv("USER_ACTIVITY_WRITE_INTERVAL", "300"))
+    
+    @staticmethod
+    def get_ecdict_preload_index() -> bool:
+        """是否在启动时预加载 ECDICT 词头索引"""
+        return os.getenv("ECDICT_PRELOAD_INDEX", "0").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def get_cache_warmup_enabled() -> bool:
+        """是否在启动后预热单词表的翻译缓存"""
+        return os.getenv("CACHE_WARMUP_ENABLED", "1").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def get_cache_warmup_workers() -> int:
+        """缓存预热的并发线程数"""
+        return max(1, int(os.getenv("CACHE_WARMUP_WORKERS", "2")))
+    
+    @staticmethod
+    def get_ollama_host() -> Optional[str]:
+        """获取 Ollama 服务地址（未设置时使用 ollama 默认地址）"""
+        return os.getenv("OLLAMA_HOST")
+    
+    @staticmethod
+    def get_ollama_model() -> str:
+        """获取 AI 翻译使用的模型"""
+        return os.getenv("OLLAMA_MODEL", "qwen2.5:7b")
+    
+    @staticmethod
+    def get_ollama_timeout() -> float:
+        """获取单次 AI 请求的超时时间（秒，包括排队时间）"""
+        return float(os.getenv("OLLAMA_TIMEOUT", "60"))
+    
+    @staticmethod
+    def get_ollama_max_in_flight() -> int:
+        """获取同时进行的 AI 请求上限，超出的请求排队等待"""
+        return max(1, int(os.getenv("OLLAMA_MAX_IN_FLIGHT", "2")))
+    
+    @staticmethod
+    def get_ai_streaming_enabled() -> bool:
+        """AI 翻译是否流式生成并逐步更新消息"""
+        return os.getenv("AI_STREAMING", "1").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def get_translation_prefetch_enabled() -> bool:
+        """自动发送单词时是否预先翻译下一个单词"""
+        return os.getenv("TRANSLATION_PREFETCH", "1").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def get_translation_memory_ttl() -> int:
+        """翻译缓存内存层条目的最长保留时间（秒），管理工具清除的缓存最迟在此时间后对运行中的机器人生效"""
+        return int(os.getenv("TRANSLATION_MEMORY_TTL", "300"))
+    
+    @staticmethod
+    def get_negative_cache_ttl() -> int:
+        """词典未收录结果（未找到、拼写建议）的缓存时间（秒）"""
+        return int(os.getenv("TRANSLATION_NEGATIVE_TTL", "3600"))
+    
+    @staticmethod
+    def get_ai_translation_ttl() -> int:
+        """AI 翻译结果的缓存时间（秒，0 表示永不过期）"""
+        return int(os.getenv("TRANSLATION_AI_TTL", str(30 * 24 * 3600)))
+    
     @staticmethod
     def get_data_dir() -> str:
         """获取数据目录路径"""
@@ -0,0 +1,137 @@
+"""
+工具模块 - 内存 LRU 缓存
+按条目数和总字节数限制容量，支持可选的过期时间（TTL）；
+invalidate() 递增代数，读数据库前记下代数的 put() 在期间发生过失效时不写入，避免旧值覆盖失效
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+def _default_sizeof(key: Any, value: Any) -> int:
+    """估算缓存条目占用的字节数"""
+    size = len(str(key).encode('utf-8'))
+    if isinstance(value, str):
+        size += len(value.encode('utf-8'))
+    elif isinstance(value, (bytes, bytearray)):
+        size += len(value)
+    else:
+        size += 64
+    return size
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None, sizeof: Callable[[Any, Any], int] = _default_sizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        # key -> (value, size, expires_at)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # 每次 invalidate() 递增
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """读取缓存，命中时将条目移到最近使用端"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    @property
+    def generation(self) -> int:
+        """当前代数，在读取数据库之前获取，写入缓存时传给 put()"""
+        return self._generation
+
+    def invalidate(self, key: Any):
+        """删除条目并递增代数，之前开始的读取不会再把旧值写回缓存"""
+        with self._lock:
+            self._generation += 1
+            if key in self._data:
+                self._remove(key)
+
+    def put(self, key: Any, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None):
+        """写入缓存，超出容量时淘汰最久未使用的条目
+
+        提供 generation 且之后发生过 invalidate() 时放弃写入（值可能已过时）
+        """
+        size = self._sizeof(key, value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # 单个条目超过总容量，不缓存
+            self.pop(key)
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """删除并返回缓存条目"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def _remove(self, key: Any):
+        """删除条目（调用方需持有锁）"""
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """清空缓存（同时递增代数）"""
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[2] is None or entry[2] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
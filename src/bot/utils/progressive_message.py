@@ -0,0 +1,66 @@
+"""
+工具模块 - 逐步更新的 Telegram 消息
+流式生成的内容通过编辑同一条消息逐步显示：第一段内容立即显示，之后按固定间隔节流，
+避免超出 Bot API 对同一聊天的编辑频率限制
+"""
+import time
+from typing import Awaitable, Callable
+
+from loguru import logger
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+
+# Telegram 单条消息的最大长度
+MAX_MESSAGE_LENGTH = 4096
+
+
+class ProgressiveMessage:
+    """节流的消息更新器，show(text) 负责发送或编辑消息"""
+
+    def __init__(self, show: Callable[[str], Awaitable[object]], interval: float = 1.2,
+                 suffix: str = ' ▌', clock: Callable[[], float] = time.monotonic):
+        self._show = show
+        self._clock = clock
+        self.interval = interval
+        self.suffix = suffix
+        self.edits = 0
+        self.first_shown_at = None
+        self._next_at = 0.0
+        self._last_text = None
+        self._disabled = False
+
+    async def update(self, text: str):
+        """显示最新的文本（距上次编辑不足 interval 时跳过，由之后的更新或最终结果补上）"""
+        now = self._clock()
+        if self._disabled or now < self._next_at:
+            return
+
+        text = text.strip()
+        if not text or text == self._last_text:
+            return
+        display = text[:MAX_MESSAGE_LENGTH - len(self.suffix) - 1] + self.suffix
+
+        self._next_at = now + self.interval
+        try:
+            await self._show(display)
+            self._last_text = text
+            self.edits += 1
+            if self.first_shown_at is None:
+                self.first_shown_at = now
+        except RetryAfter as e:
+            # 被限流时推迟下一次编辑
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+            self._next_at = now + float(retry_after)
+            logger.debug(f"消息编辑被限流，{retry_after}s 后再更新")
+        except BadRequest as e:
+            # 内容未变化等情况，忽略
+            logger.debug(f"消息编辑失败: {e}")
+        except TelegramError as e:
+            # 其他错误（如消息已删除）不再继续编辑，最终结果仍由调用方发送
+            logger.warning(f"消息逐步更新失败，停止更新: {e}")
+            self._disabled = True
+
+    @property
+    def shown(self) -> bool:
+        """是否已经显示过内容"""
+        return self.edits > 0
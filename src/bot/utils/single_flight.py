@@ -0,0 +1,68 @@
+"""
+工具模块 - 并发请求合并（single flight）
+同一个键同时只执行一次计算，期间到达的调用者等待同一个结果；
+计算在独立的任务中运行，某个调用者被取消或超时不会影响其他调用者，
+所有调用者都已离开时取消计算
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """按键合并并发的异步计算"""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        # 每个计算任务当前的等待者数量
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]],
+                 timeout: Optional[float] = None) -> Any:
+        """执行 func()，同一键已有进行中的计算时直接等待其结果
+
+        计算出错时所有等待者收到同一个异常，键随即移除，下一次调用重新计算；
+        timeout 只限制当前调用者的等待时间，计算本身继续为其他调用者运行；
+        最后一个等待者因取消或超时离开时取消计算（例如 Telegram 请求已放弃，不再占用 AI 并发名额）
+        """
+        self.calls += 1
+        task = self._tasks.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            if timeout is None:
+                return await asyncio.shield(task)
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # 没有调用者在等待结果了
+                    task.cancel()
+                    if self._tasks.get(key) is task:
+                        del self._tasks[key]
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # 读取异常，避免所有调用者都已离开时出现 "exception was never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        """获取合并统计"""
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'in_flight': len(self._tasks),
+        }
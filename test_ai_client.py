@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+AI 客户端测试
+在本地启动模拟 Ollama /api/chat 接口的 HTTP 服务，验证超时、并发上限、取消和指标统计
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.services.ai_client import OllamaClient
+from bot.utils.progressive_message import ProgressiveMessage
+
+
+class FakeOllama:
+    """模拟 Ollama 服务：按请求内容中的 delay=秒数 延迟响应，记录最大并发数"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                content = body['messages'][-1]['content']
+                delay = float(content.split('delay=')[1]) if 'delay=' in content else 0.0
+                with fake.lock:
+                    fake.requests += 1
+                    fake.active += 1
+                    fake.max_active = max(fake.max_active, fake.active)
+                try:
+                    if body.get('stream'):
+                        self._stream(body, content)
+                        return
+                    time.sleep(delay)
+                    data = json.dumps({
+                        'model': body['model'],
+                        'created_at': '2024-01-01T00:00:00Z',
+                        'message': {'role': 'assistant', 'content': f"echo: {content}"},
+                        'done': True,
+                    }).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with fake.lock:
+                        fake.active -= 1
+
+            def _stream(self, body, content):
+                """流式响应：每 50ms 输出一个词，最后一行 done=true"""
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.end_headers()
+                words = content.split()
+                for i, word in enumerate(words + ['']):
+                    time.sleep(0.05)
+                    line = json.dumps({
+                        'model': body['model'],
+                        'created_at': '2024-01-01T00:00:00Z',
+                        'message': {'role': 'assistant', 'content': f"{word} " if word else ''},
+                        'done': i == len(words),
+                    })
+                    self.wfile.write(line.encode('utf-8') + b'\n')
+                    self.wfile.flush()
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _message(content):
+    return [{'role': 'user', 'content': content}]
+
+
+def test_chat_returns_content():
+    fake = FakeOllama()
+    try:
+        client = OllamaClient(host=fake.host, model='test-model', timeout=5)
+        result = asyncio.run(client.chat(_message('hello')))
+        assert result == 'echo: hello'
+        stats = client.stats()
+        assert stats['completed'] == 1 and stats['in_flight'] == 0 and stats['queued'] == 0
+    finally:
+        fake.close()
+
+
+def test_in_flight_limit_queues_requests():
+    fake = FakeOllama()
+    try:
+        client = OllamaClient(host=fake.host, timeout=5, max_in_flight=1)
+
+        async def run():
+            return await asyncio.gather(*(client.chat(_message(f'{i} delay=0.2')) for i in range(3)))
+
+        results = asyncio.run(run())
+        assert len(results) == 3
+        assert fake.max_active == 1
+        stats = client.stats()
+        assert stats['completed'] == 3
+        # 第三个请求至少排队了两次生成的时间
+        assert stats['queue_wait_max'] >= 0.3
+        assert stats['generation_avg'] >= 0.2
+    finally:
+        fake.close()
+
+
+def test_timeout_raises_and_frees_slot():
+    fake = FakeOllama()
+    try:
+        client = OllamaClient(host=fake.host, timeout=5, max_in_flight=1)
+
+        async def run():
+            try:
+                await client.chat(_message('delay=1'), timeout=0.2)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                raise AssertionError('应该超时')
+            # 超时后槽位被释放，后续请求可以正常执行
+            return await client.chat(_message('after'))
+
+        assert asyncio.run(run()) == 'echo: after'
+        stats = client.stats()
+        assert stats['timeouts'] == 1 and stats['completed'] == 1 and stats['in_flight'] == 0
+    finally:
+        fake.close()
+
+
+def test_cancel_while_queued():
+    fake = FakeOllama()
+    try:
+        client = OllamaClient(host=fake.host, timeout=5, max_in_flight=1)
+
+        async def run():
+            first = asyncio.create_task(client.chat(_message('first delay=0.3')))
+            await asyncio.sleep(0.05)
+            second = asyncio.create_task(client.chat(_message('second')))
+            await asyncio.sleep(0.05)
+            assert client.stats()['queued'] == 1
+            second.cancel()
+            try:
+                await second
+            except asyncio.CancelledError:
+                pass
+            return await first
+
+        assert asyncio.run(run()) == 'echo: first delay=0.3'
+        stats = client.stats()
+        assert stats['cancelled'] == 1 and stats['queued'] == 0 and stats['in_flight'] == 0
+        # 被取消的请求没有发送到服务端
+        assert fake.requests == 1
+    finally:
+        fake.close()
+
+
+def test_stream_updates_message_progressively():
+    fake = FakeOllama()
+    try:
+        client = OllamaClient(host=fake.host, timeout=5)
+        shown = []
+
+        async def show(text):
+            shown.append(text)
+
+        # 每次更新时钟前进 1，节流间隔 3：与实际耗时无关，第 1、4、7、10 段内容触发编辑
+        ticks = iter(range(100))
+
+        async def run():
+            progress = ProgressiveMessage(show, interval=3, clock=lambda: next(ticks))
+            result = await client.chat(_message(' '.join(f'w{i}' for i in range(12))), on_progress=progress.update)
+            return progress, result
+
+        progress, result = asyncio.run(run())
+        assert result.split() == [f'w{i}' for i in range(12)]
+        # 第一段内容在生成完成之前就已显示，之后的编辑按间隔节流
+        assert shown == [' '.join(f'w{i}' for i in range(n)) + ' ▌' for n in (1, 4, 7, 10)]
+        assert progress.edits == 4 and progress.first_shown_at == 0
+        stats = client.stats()
+        assert stats['streams'] == 1 and stats['first_chunk_max'] <= stats['generation_max']
+    finally:
+        fake.close()
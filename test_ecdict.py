@@ -14,8 +14,8 @@ def test_translation():
     """测试翻译功能"""
     print("=== ECDICT 翻译服务测试 ===\n")
     
-    # 检查服务是否可用
-    if not ecdict_service.is_available():
+    # 等待词典在后台加载完成
+    if not ecdict_service.wait_ready():
         print("❌ ECDICT 服务不可用")
         return
     
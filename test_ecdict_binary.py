@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+ECDICT 二进制词典和词形索引测试
+用合成的 ecdict.db 验证二进制文件与 SQLite 数据一致，以及格式检查
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.dictionary.ecdict_binary import NUMERIC_COLUMNS, TEXT_COLUMNS, BinaryDict, build_binary, source_signature
+from bot.dictionary.ecdict_convert import SCHEMA
+from bot.dictionary.lemma_index import LemmaIndex, build_lemma_index, load_lemma_index
+
+ROWS = [
+    ('run', 'rʌn', 'v. move fast', 'v. 跑', 'v:60/n:40', 5, 1, 'zk gk', 300, 250, 'p:ran/d:run/i:running/3:runs', None),
+    ('ran', 'ræn', '', 'v. run 的过去式', '', 0, 0, '', None, None, '0:run/1:p', None),
+    ('Apple', 'ˈæp(ə)l', 'n. fruit', 'n. 苹果', 'n:100', 3, 1, 'zk', 1200, 900, 's:apples',
+     json.dumps({'note': '测试'})),
+    ('ice cream', '', '', 'n. 冰淇淋', '', 0, 0, '', None, None, '', None),
+    ('child', 'tʃaɪld', '', 'n. 孩子', '', 4, 1, '', 500, 400, 's:children', None),
+]
+
+
+def _build_sqlite(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany('''
+        INSERT INTO stardict (word, sw, phonetic, definition, translation, pos, collins, oxford,
+                              tag, bnc, frq, exchange, detail)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [(row[0], row[0].lower()) + row[1:] for row in ROWS])
+    conn.commit()
+    conn.close()
+
+
+def test_binary_matches_sqlite():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_path = os.path.join(tmp_dir, 'ecdict.db')
+        binary_path = os.path.join(tmp_dir, 'ecdict.bin')
+        _build_sqlite(sqlite_path)
+        assert build_binary(sqlite_path, binary_path) == len(ROWS)
+        assert not os.path.exists(binary_path + '.part')
+
+        conn = sqlite3.connect(sqlite_path)
+        expected = conn.execute(
+            f"SELECT id, {', '.join(TEXT_COLUMNS + NUMERIC_COLUMNS)} FROM stardict ORDER BY id"
+        ).fetchall()
+        conn.close()
+
+        binary = BinaryDict(binary_path)
+        try:
+            assert binary.count() == len(ROWS)
+            for record, row in enumerate(expected):
+                data = binary.query(record)
+                assert data['id'] == row[0]
+                # NULL 字段读出为空字符串或 0
+                assert tuple(data[column] for column in TEXT_COLUMNS if column != 'detail') == tuple(
+                    value or '' for column, value in zip(TEXT_COLUMNS, row[1:]) if column != 'detail'
+                )
+                assert tuple(data[column] for column in NUMERIC_COLUMNS) == tuple(
+                    value or 0 for value in row[1 + len(TEXT_COLUMNS):]
+                )
+
+            # 词头不区分大小写，detail 解析为 JSON
+            assert binary.query('APPLE')['detail'] == {'note': '测试'}
+            assert binary.query('ice cream')['translation'] == 'n. 冰淇淋'
+            assert binary.query('pear') is None and binary.query(len(ROWS)) is None
+            # 按字典序返回前缀匹配
+            assert [word for _, word in binary.match('c', limit=2)] == ['child', 'ice cream']
+            assert list(binary.scan(('word', 'collins')))[0] == ('run', 5)
+        finally:
+            binary.close()
+
+
+def test_rejects_foreign_file():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'ecdict.bin')
+        with open(path, 'wb') as f:
+            f.write(b'\x00' * 64)
+        try:
+            BinaryDict(path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('应该拒绝非二进制词典文件')
+
+
+def test_lemma_index_round_trip():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_path = os.path.join(tmp_dir, 'ecdict.db')
+        lemma_path = os.path.join(tmp_dir, 'ecdict.lemma')
+        _build_sqlite(sqlite_path)
+        # 原型词条列出的变形和变形词条指回的原型合并为一条
+        assert build_lemma_index(sqlite_path, lemma_path) == 5
+        index = LemmaIndex.load(lemma_path)
+        assert index.lookup('ran') == [('run', 'p')]
+        assert index.lookup('Running') == [('run', 'i')]
+        assert index.lookup('children') == [('child', 's')]
+        assert index.lookup('apples') == [('Apple', 's')]
+        # 原型本身和未收录的单词不是变形
+        assert index.lookup('run') == [] and index.lookup('pear') == []
+
+        # 格式不匹配或文件截断时加载失败返回 None
+        with open(lemma_path, 'rb') as f:
+            data = f.read()
+        with open(lemma_path, 'wb') as f:
+            f.write(data[:-3])
+        assert load_lemma_index(lemma_path) is None
+        assert load_lemma_index(os.path.join(tmp_dir, 'missing.lemma')) is None
+
+
+def test_stale_files_are_detected_after_reconversion():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_path = os.path.join(tmp_dir, 'ecdict.db')
+        binary_path = os.path.join(tmp_dir, 'ecdict.bin')
+        lemma_path = os.path.join(tmp_dir, 'ecdict.lemma')
+        _build_sqlite(sqlite_path)
+        build_binary(sqlite_path, binary_path)
+        build_lemma_index(sqlite_path, lemma_path)
+
+        binary = BinaryDict(binary_path)
+        assert binary.source_signature == source_signature(sqlite_path)
+        binary.close()
+        assert load_lemma_index(lemma_path, sqlite_path) is not None
+
+        # 重新转换 ecdict.db 后文件签名改变
+        stat = os.stat(sqlite_path)
+        os.utime(sqlite_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        binary = BinaryDict(binary_path)
+        assert binary.source_signature != source_signature(sqlite_path)
+        binary.close()
+        assert load_lemma_index(lemma_path, sqlite_path) is None
+        # 没有词典数据库可比较时照常加载
+        assert load_lemma_index(lemma_path) is not None
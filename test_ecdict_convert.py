@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+ECDICT CSV 转换测试
+用合成的 CSV 验证批量载入、中断后从检查点继续、重复单词处理和载入后创建的索引
+"""
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.dictionary import ecdict_convert
+
+HEADER = ['word', 'phonetic', 'definition', 'translation', 'pos', 'collins', 'oxford',
+          'tag', 'bnc', 'frq', 'exchange', 'detail', 'audio']
+
+
+def _write_csv(path, count):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(count):
+            writer.writerow([f'word{i}', 'wɜːd', 'n. a word\\nline two', f'n. 单词{i}', '', str(i % 6), '0',
+                             'cet4 gre' if i % 3 == 0 else '', '', str(i), '', '', ''])
+        # 大小写不同的重复单词只保留第一个，空单词跳过
+        writer.writerow(['WORD1', '', '', 'duplicate', '', '', '', '', '', '', '', '', ''])
+        writer.writerow(['', '', '', 'empty', '', '', '', '', '', '', '', '', ''])
+
+
+def _snapshot(path):
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute('SELECT word, sw, definition, translation, collins, frq FROM stardict ORDER BY id').fetchall()
+        indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        tags = conn.execute('SELECT COUNT(*) FROM stardict_tag').fetchone()[0]
+    finally:
+        conn.close()
+    return rows, indexes, tables, tags
+
+
+def test_convert_and_resume_after_interruption():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'ecdict.csv')
+        _write_csv(csv_path, 1000)
+
+        clean_path = os.path.join(tmp_dir, 'clean.db')
+        assert ecdict_convert.convert_csv(csv_path, clean_path, chunk_size=100) == 1000
+        rows, indexes, tables, tags = _snapshot(clean_path)
+        assert rows[1] == ('word1', 'word1', 'n. a word\nline two', 'n. 单词1', 1, 1)
+        assert 'WORD1' not in {row[0] for row in rows}
+        # word 的唯一索引在载入后创建，表上没有约束生成的自动索引
+        assert 'stardict_2' in indexes and 'stardict_1' not in indexes
+        assert not any(name.startswith('sqlite_autoindex_stardict') for name in indexes)
+        assert 'build_checkpoint' not in tables and tags == 334 * 2
+
+        # 第 4 块写入时中断
+        resumed_path = os.path.join(tmp_dir, 'resumed.db')
+        write_chunk = ecdict_convert._write_chunk
+        calls = []
+
+        def interrupted(conn, chunk, rows_read):
+            calls.append(rows_read)
+            if len(calls) == 4:
+                # 模拟 journal_mode=OFF 下中断的事务留下部分行
+                conn.executemany(ecdict_convert.INSERT_SQL, chunk[:30])
+                raise KeyboardInterrupt
+            write_chunk(conn, chunk, rows_read)
+
+        ecdict_convert._write_chunk = interrupted
+        try:
+            ecdict_convert.convert_csv(csv_path, resumed_path, chunk_size=100)
+        except KeyboardInterrupt:
+            pass
+        else:
+            raise AssertionError('应该中断')
+        finally:
+            ecdict_convert._write_chunk = write_chunk
+        assert os.path.exists(resumed_path + '.part') and not os.path.exists(resumed_path)
+
+        # 重新打开时删除检查点之后的残留行
+        conn, skip = ecdict_convert._open_part(resumed_path + '.part', ecdict_convert._csv_signature(csv_path))
+        assert skip == 300 and conn.execute('SELECT COUNT(*) FROM stardict').fetchone()[0] == 300
+        conn.close()
+
+        # 再次执行从检查点继续，结果与一次完成的转换相同
+        assert ecdict_convert.convert_csv(csv_path, resumed_path, chunk_size=100) == 1000
+        assert _snapshot(resumed_path) == (rows, indexes, tables, tags)
+        assert not os.path.exists(resumed_path + '.part')
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+ECDICT 词典服务测试
+用合成的二进制词典和词形索引验证变形词的还原
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.dictionary.ecdict_binary import BinaryDict, build_binary
+from bot.dictionary.ecdict_convert import SCHEMA
+from bot.dictionary.lemma_index import LemmaIndex, build_lemma_index
+from bot.services.ecdict_service import STATE_READY, ECDictService
+
+# (word, translation, definition, exchange)
+ROWS = [
+    ('leave', 'v. 离开', 'v. go away', 'p:left/d:left/i:leaving/3:leaves'),
+    ('left', 'a. 左边的\nn. 左边', 'adj. on the left side', '0:leave/1:pd'),
+    ('run', 'v. 跑', 'v. move fast', 'p:ran/d:run/i:running/3:runs'),
+    ('ran', '', '', '0:run/1:p'),
+]
+
+
+def test_inflected_form_with_own_senses_is_kept():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_path = os.path.join(tmp_dir, 'ecdict.db')
+        conn = sqlite3.connect(sqlite_path)
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            'INSERT INTO stardict (word, sw, translation, definition, exchange) VALUES (?, ?, ?, ?, ?)',
+            [(row[0], row[0]) + row[1:] for row in ROWS]
+        )
+        conn.commit()
+        conn.close()
+        build_binary(sqlite_path, os.path.join(tmp_dir, 'ecdict.bin'))
+        build_lemma_index(sqlite_path, os.path.join(tmp_dir, 'ecdict.lemma'))
+
+        service = ECDictService()
+        service.binary_db = BinaryDict(os.path.join(tmp_dir, 'ecdict.bin'))
+        service.lemma_index = LemmaIndex.load(os.path.join(tmp_dir, 'ecdict.lemma'))
+        service.state = STATE_READY
+        try:
+            # left 有自己的释义，保留原词条并给出原型
+            word_data, matched_form = service.resolve_word('Left')
+            assert word_data['word'] == 'left' and matched_form is None
+            html = service.translate('left')
+            assert '左边的' in html and '也是 leave 的过去式、过去分词' in html
+
+            # 没有释义的变形词和未收录的变形词还原为原型
+            word_data, matched_form = service.resolve_word('ran')
+            assert word_data['word'] == 'run' and matched_form == ('ran', 'p')
+            word_data, matched_form = service.resolve_word('running')
+            assert word_data['word'] == 'run' and matched_form == ('running', 'i')
+
+            resolved = service.resolve_many(['left', 'ran', 'leave'])
+            assert {key: (data['word'], form) for key, (data, form) in resolved.items()} == {
+                'left': ('left', None), 'ran': ('run', ('ran', 'p')), 'leave': ('leave', None)
+            }
+            assert '也是' not in service.translate('leave')
+        finally:
+            service.binary_db.close()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+内存 LRU 缓存测试
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.utils.lru_cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache and cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_max_bytes_and_oversized_entry():
+    cache = LRUCache(max_entries=100, max_bytes=20)
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'y' * 10)
+    assert 'a' not in cache and cache.get('b') == 'y' * 10
+    # 单个条目超过总容量时不缓存，同时删除旧值
+    cache.put('b', 'z' * 50)
+    assert 'b' not in cache and cache.stats()['bytes'] == 0
+
+
+def test_entry_ttl_expires():
+    cache = LRUCache(ttl=60)
+    cache.put('short', 1, ttl=0.01)
+    cache.put('default', 2)
+    time.sleep(0.02)
+    assert cache.get('short') is None and cache.get('default') == 2
+    assert cache.stats()['expirations'] == 1
+
+
+def test_put_after_invalidate_is_refused():
+    cache = LRUCache()
+    # 读取方在查询数据库前记下代数
+    generation = cache.generation
+    # 查询期间另一个线程更新了数据并使条目失效
+    cache.invalidate('settings')
+    cache.put('settings', 'old value', generation=generation)
+    assert 'settings' not in cache
+
+    # 失效之后开始的读取可以正常写入
+    cache.put('settings', 'new value', generation=cache.generation)
+    assert cache.get('settings') == 'new value'
+
+
+def test_translation_memory_tier():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        # 全局 db_manager 会在当前目录创建数据库文件，切换到临时目录避免污染项目
+        os.chdir(tmp_dir)
+        try:
+            from bot.models.database import DatabaseManager
+
+            path = os.path.join(tmp_dir, 'memory.db')
+            db = DatabaseManager(path, translation_cache_ttl=0.05)
+            db.cache_translation('Apple', '苹果')
+            db.cache_translation('pear', '梨')
+            db.translation_memory.pop('pear')
+
+            # 管理工具在其他进程中删除条目
+            conn = sqlite3.connect(path)
+            conn.execute('DELETE FROM translation_cache')
+            conn.commit()
+            conn.close()
+
+            # 内存缓存层中的条目不访问数据库，最多保留 ttl 秒
+            assert db.get_cached_translation('APPLE') == '苹果'
+            assert db.get_cached_translation('pear') is None
+            time.sleep(0.06)
+            assert db.get_cached_translation('apple') is None
+            db.close()
+        finally:
+            os.chdir(cwd)
+
+
+def test_overlapping_read_does_not_undo_overwrite():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        # 全局 db_manager 会在当前目录创建数据库文件，切换到临时目录避免污染项目
+        os.chdir(tmp_dir)
+        try:
+            from bot.models.database import DatabaseManager
+
+            db = DatabaseManager(os.path.join(tmp_dir, 'memory.db'), translation_cache_ttl=60)
+            db.cache_translation('apple', 'old')
+            db.translation_memory.pop('apple')
+
+            # 读取方从数据库读到旧翻译后、写回内存缓存层前，另一个请求覆盖了翻译
+            put = db.translation_memory.put
+
+            def overlapping_put(key, value, **kwargs):
+                if value == 'old':
+                    db.cache_translation('apple', 'new')
+                put(key, value, **kwargs)
+
+            db.translation_memory.put = overlapping_put
+            assert db.get_cached_translation('apple') == 'old'
+            db.translation_memory.put = put
+
+            # 旧翻译没有写回内存缓存层
+            assert db.translation_memory.get('apple') == 'new'
+            assert db.get_cached_translation('apple') == 'new'
+            db.close()
+        finally:
+            os.chdir(cwd)
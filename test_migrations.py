@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+数据库迁移测试
+在只执行到旧版本的数据库中写入旧格式数据，验证升级后的数据迁移结果
+"""
+import os
+import sys
+import tempfile
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.models.cache_kinds import KIND_AI, KIND_DICT, KIND_NOT_FOUND, KIND_SUGGESTION, SOURCE_ECDICT, SOURCE_OLLAMA
+from bot.models.migrations import MIGRATIONS, Migration, MigrationRunner
+from bot.models.pool import ConnectionPool
+
+
+def _legacy_database(path, version):
+    """创建执行到指定版本的数据库"""
+    pool = ConnectionPool(path, size=2)
+    assert MigrationRunner(pool, [m for m in MIGRATIONS if m.version <= version]).run() == version
+    return pool
+
+
+def test_dedupe_user_query_words():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = _legacy_database(os.path.join(tmp_dir, 'legacy.db'), 6)
+        with pool.connection() as conn:
+            conn.executemany(
+                'INSERT INTO user_query_words (chat_id, word, translation, created_at) VALUES (?, ?, ?, ?)',
+                [
+                    (1, 'Apple', 'old', '2024-01-01 08:00:00'),
+                    (1, 'APPLE', 'middle', '2024-01-02 08:00:00'),
+                    (1, 'pear', 'pear', '2024-01-02 09:00:00'),
+                    (1, 'apple', 'new', '2024-01-03 08:00:00'),
+                    (2, 'apple', 'other user', '2024-01-04 08:00:00'),
+                    (None, 'orphan', 'orphan', '2024-01-05 08:00:00'),
+                ]
+            )
+
+        assert MigrationRunner(pool).run() == len(MIGRATIONS) - 6
+        with pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT chat_id, word, translation, first_seen, last_seen, lookup_count
+                FROM user_query_words ORDER BY chat_id, word
+            ''').fetchall()
+            indexes = {name for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'user_query_words'"
+            )}
+        # 大小写不同的记录合并为一行，翻译取最近一次查询的结果，没有 chat_id 的记录丢弃
+        assert rows == [
+            (1, 'apple', 'new', '2024-01-01 08:00:00', '2024-01-03 08:00:00', 3),
+            (1, 'pear', 'pear', '2024-01-02 09:00:00', '2024-01-02 09:00:00', 1),
+            (2, 'apple', 'other user', '2024-01-04 08:00:00', '2024-01-04 08:00:00', 1),
+        ]
+        assert 'idx_user_query_words_chat_last_seen' in indexes
+        assert 'idx_user_query_words_chat_created' not in indexes
+
+        # 已是最新版本时不再执行
+        assert MigrationRunner(pool).run() == 0
+        pool.close()
+
+
+def test_type_translation_cache():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'legacy.db')
+        pool = _legacy_database(path, 7)
+        with pool.connection() as conn:
+            conn.executemany('INSERT INTO translation_cache (word, translation) VALUES (?, ?)', [
+                ('apple', '<b>📖 apple</b>\nn. 苹果'),
+                ('qzx', '❌ 词典中未找到: qzx'),
+                ('recieve', '❌ 词典中未找到: recieve\n💡 你是不是要找: receive'),
+                ('serendipity', '意外发现珍奇事物的本领'),
+            ])
+        assert MigrationRunner(pool).run() == len(MIGRATIONS) - 7
+        with pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT word, kind, source, expires_at IS NOT NULL FROM translation_cache ORDER BY word
+            ''').fetchall()
+        pool.close()
+        # 按内容区分条目类型，"未找到"和拼写建议立即过期
+        assert rows == [
+            ('apple', KIND_DICT, SOURCE_ECDICT, 0),
+            ('qzx', KIND_NOT_FOUND, SOURCE_ECDICT, 1),
+            ('recieve', KIND_SUGGESTION, SOURCE_ECDICT, 1),
+            ('serendipity', KIND_AI, SOURCE_OLLAMA, 0),
+        ]
+
+        cwd = os.getcwd()
+        # 全局 db_manager 会在当前目录创建数据库文件，切换到临时目录避免污染项目
+        os.chdir(tmp_dir)
+        try:
+            from bot.models.database import DatabaseManager
+
+            db = DatabaseManager(path)
+            # 迁移前缓存的"未找到"结果不再命中，释义和 AI 翻译照常命中
+            assert db.get_cached_translation('qzx') is None
+            assert db.get_cached_translation('recieve') is None
+            assert db.get_cached_translation('apple') == '<b>📖 apple</b>\nn. 苹果'
+            assert db.get_cached_translation('serendipity') == '意外发现珍奇事物的本领'
+            db.close()
+        finally:
+            os.chdir(cwd)
+
+
+def test_failed_migration_is_rolled_back():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = _legacy_database(os.path.join(tmp_dir, 'legacy.db'), 1)
+
+        def broken(conn):
+            conn.execute('CREATE TABLE half_done (id INTEGER)')
+            raise RuntimeError('迁移失败')
+
+        runner = MigrationRunner(pool, MIGRATIONS[:1] + [Migration(2, '失败的迁移', broken)])
+        try:
+            runner.run()
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError('迁移失败时应该抛出异常')
+        # 失败的版本整体回滚且不记录版本，修复后可以重新执行
+        assert runner.current_version() == 1
+        with pool.connection() as conn:
+            assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+        assert MigrationRunner(pool).run() == len(MIGRATIONS) - 1
+        pool.close()
+
+
+def test_concurrent_runners_apply_each_version_once():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'legacy.db')
+        pool = _legacy_database(path, 6)
+        other_pool = ConnectionPool(path, size=1)
+        runner = MigrationRunner(pool)
+        # 两个进程同时启动，都在对方迁移前读到了 v6
+        runner.current_version = lambda: 6
+        assert MigrationRunner(other_pool).run() == len(MIGRATIONS) - 6
+
+        # 写事务内发现版本已执行，跳过而不是重复执行（v8 重复 ADD COLUMN 会失败）
+        assert runner.run() == 0
+        with pool.connection() as conn:
+            versions = [row[0] for row in conn.execute('SELECT version FROM schema_version ORDER BY version')]
+        assert versions == [m.version for m in MIGRATIONS]
+        other_pool.close()
+        pool.close()
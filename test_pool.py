@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+SQLite 连接池测试
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.models.pool import ConnectionPool
+
+INSERT = 'INSERT INTO events (chat_id, word) VALUES (?, ?)'
+
+
+def _rows(pool, sql):
+    with pool.connection() as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_pool_reuses_connections_and_scopes_transactions():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = ConnectionPool(os.path.join(tmp_dir, 'pool.db'), size=2, timeout=0.05)
+        with pool.connection() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+            conn.execute('CREATE TABLE events (chat_id INTEGER NOT NULL, word TEXT NOT NULL)')
+            conn.execute(INSERT, (1, 'kept'))
+        # 异常退出时回滚
+        try:
+            with pool.connection() as conn:
+                conn.execute(INSERT, (1, 'rolled back'))
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        assert _rows(pool, 'SELECT word FROM events') == [('kept',)]
+        assert pool.stats() == {'size': 2, 'created': 1, 'idle': 1}
+
+        # 写事务进行中，其他连接仍可读取已提交的数据
+        writer = pool.acquire()
+        writer.execute(INSERT, (1, 'pending'))
+        reader = pool.acquire()
+        assert reader.execute('SELECT word FROM events').fetchall() == [('kept',)]
+
+        # 连接用尽时等待超时
+        try:
+            pool.acquire()
+        except sqlite3.OperationalError:
+            pass
+        else:
+            raise AssertionError('连接用尽时应该超时')
+
+        # 归还时回滚未提交的事务
+        pool.release(writer)
+        pool.release(reader)
+        assert _rows(pool, 'SELECT COUNT(*) FROM events') == [(1,)]
+        assert pool.stats()['created'] == 2
+
+        pool.close()
+        try:
+            pool.acquire()
+        except sqlite3.ProgrammingError:
+            pass
+        else:
+            raise AssertionError('连接池关闭后不能再获取连接')
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+翻译预取测试
+用临时数据库验证预取写入内存缓存、命中率和浪费统计
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+
+def test_prefetch_hits_and_waste(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        # 全局 db_manager 会在当前目录创建数据库文件，切换到临时目录避免污染项目
+        os.chdir(tmp_dir)
+        try:
+            from bot.models.async_database import AsyncDatabaseManager
+            from bot.models.database import DatabaseManager
+            from bot.services import prefetch
+
+            db = DatabaseManager(os.path.join(tmp_dir, 'prefetch.db'))
+            # 测试结束后恢复全局的 async_db_manager
+            monkeypatch.setattr(prefetch, 'async_db_manager', AsyncDatabaseManager(db))
+            translated = []
+
+            async def translate(word):
+                translated.append(word)
+                db.cache_translation(word, f'译文: {word}')
+                return f'译文: {word}'
+
+            prefetcher = prefetch.TranslationPrefetcher(translate)
+
+            async def run():
+                # 发送 apple 时选好 banana，预取完成后点击翻译即命中
+                prefetcher.plan(1, 'list', 'banana')
+                await prefetcher._queue.join()
+                assert prefetcher.take(1, 'list') == 'banana'
+                assert db.translation_memory.get('banana') == '译文: banana'
+                prefetcher.record_request(1, 'banana')
+
+                # 已有缓存的单词不再翻译
+                prefetcher.plan(1, 'list', 'banana')
+                await prefetcher._queue.join()
+                assert prefetcher.take(1, 'list') == 'banana'
+
+                # 单词表切换后预选的单词作废
+                prefetcher.plan(1, 'list', 'cherry')
+                await prefetcher._queue.join()
+                assert prefetcher.take(1, 'other') is None
+
+                # 关闭自动发送时未点击的单词计为浪费
+                prefetcher.discard(1)
+
+                # 非自动发送的单词不计入命中率
+                prefetcher.record_request(2, 'durian')
+                await prefetcher.stop()
+
+            asyncio.run(run())
+            db.close()
+        finally:
+            os.chdir(cwd)
+
+    assert translated == ['banana', 'cherry']
+    stats = prefetcher.stats()
+    assert stats['planned'] == 3 and stats['prefetched'] == 2 and stats['already_cached'] == 1
+    assert stats['hits'] == 1 and stats['misses'] == 0 and stats['hit_rate'] == 1.0
+    assert stats['wasted'] == 2 and stats['ready'] == 0
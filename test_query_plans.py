@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+查询计划回归测试
+执行 database.py 和 admin.py 中的全部查询，对每条语句运行 EXPLAIN QUERY PLAN，
+出现全表扫描（没有使用索引的 SCAN）时测试失败
+"""
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+# 添加项目路径
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+# 不需要检查查询计划的语句
+SKIP_PREFIXES = ('INSERT', 'CREATE', 'DROP', 'PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+# 全表扫描: "SCAN users"，索引扫描: "SCAN users USING COVERING INDEX ..."
+FULL_SCAN = re.compile(r'^SCAN \w+$')
+
+
+def exercise_queries(db, admin):
+    """调用 DatabaseManager 的全部方法和 admin.py 的全部命令"""
+    db.add_or_update_user(1, 'alice', 'Alice', None)
+    db.add_or_update_user(2, 'bob', 'Bob', None)
+    db.get_user_settings(1)
+    db.update_auto_send_status(1, True)
+    db.update_user_wordlist(1, '2')
+    db.get_user_wordlist(1)
+    db.add_word_to_history(1, 'apple')
+    db.add_word_to_history(1, 'pear', translated=True, translation='梨')
+    db.cache_translation('apple', '苹果')
+    db.get_cached_translation('apple')
+    db.get_cached_translation('missing')
+    db.load_cached_translation('apple')
+    db.cache_translations([('pear', '梨'), ('apple', '苹果')])
+    db.get_cached_words(['apple', 'pear', 'plum'])
+    db.cache_translation('plum', '❌ 词典中未找到单词', 'not_found', 'ecdict', ttl=60)
+    db.get_translation_cache_breakdown()
+    db.purge_expired_translations()
+    db.invalidate_translations('ollama')
+    db.invalidate_translations('ecdict', 'not_found')
+    db.sync_render_version('test-version')
+    db.add_user_query_word(1, 'apple', '苹果')
+    db.get_user_query_words(1)
+    db.get_user_query_word_list(1)
+    db.get_user_query_words_count(1)
+    db.get_user_stats(1)
+    db.get_user_word_count(1, days=7)
+    db.clear_user_query_words(2)
+    db.write_behind.flush()
+
+    admin.show_user_list()
+    admin.show_user_stats()
+    admin.show_user_stats(1)
+    admin.show_popular_words(5)
+    admin.clean_old_data(30)
+    admin.invalidate_cache('ollama', 'ai')
+
+
+def collect_full_scans(db_path, statements):
+    """对每条语句运行 EXPLAIN QUERY PLAN，返回出现全表扫描的语句"""
+    conn = sqlite3.connect(db_path)
+    failures = []
+    try:
+        for sql in sorted(set(statements)):
+            if sql.lstrip().upper().startswith(SKIP_PREFIXES):
+                continue
+            plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+            scans = [row[3] for row in plan if FULL_SCAN.match(row[3])]
+            if scans:
+                failures.append((' '.join(sql.split()), scans))
+    finally:
+        conn.close()
+    return failures
+
+
+def test_query_plans():
+    """所有查询都必须命中索引"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        # 全局 db_manager 会在当前目录创建数据库文件，切换到临时目录避免污染项目
+        os.chdir(tmp_dir)
+        try:
+            import admin
+            from bot.models.database import DatabaseManager
+
+            db_path = os.path.join(tmp_dir, 'plans.db')
+            db = DatabaseManager(db_path)
+            statements = []
+            db.pool.set_trace_callback(statements.append)
+            admin.db_manager = db
+
+            exercise_queries(db, admin)
+            db.close()
+
+            failures = collect_full_scans(db_path, statements)
+        finally:
+            os.chdir(cwd)
+
+    for sql, scans in failures:
+        print(f"❌ 全表扫描: {scans}\n   {sql}")
+    assert not failures, f"{len(failures)} 条查询出现全表扫描"
+    print(f"✅ 共检查 {len(set(statements))} 条语句，未发现全表扫描")
+
+
+if __name__ == "__main__":
+    test_query_plans()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+并发请求合并测试
+"""
+import asyncio
+import os
+import sys
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def run():
+        return await asyncio.gather(*(flight.do('apple', work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ['result'] * 5
+    assert len(runs) == 1
+    assert flight.stats() == {'calls': 5, 'coalesced': 4, 'errors': 0, 'in_flight': 0}
+
+
+def test_error_reaches_all_callers_and_is_not_remembered():
+    flight = SingleFlight()
+    runs = []
+
+    async def fail():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def run():
+        results = await asyncio.gather(*(flight.do('apple', fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        # 失败后键已移除，下一次调用重新计算
+        await asyncio.gather(flight.do('apple', fail), return_exceptions=True)
+
+    asyncio.run(run())
+    assert len(runs) == 2
+    assert flight.stats()['errors'] == 2
+
+
+def test_timeout_or_cancel_does_not_affect_other_callers():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        return 'slow'
+
+    async def run():
+        impatient = asyncio.create_task(flight.do('apple', slow, timeout=0.05))
+        cancelled = asyncio.create_task(flight.do('apple', slow))
+        patient = asyncio.create_task(flight.do('apple', slow))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        return await asyncio.gather(impatient, cancelled, patient, return_exceptions=True)
+
+    impatient, cancelled, patient = asyncio.run(run())
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert patient == 'slow'
+
+
+def test_computation_is_cancelled_when_last_caller_leaves():
+    flight = SingleFlight()
+    events = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            events.append('cancelled')
+            raise
+        return 'slow'
+
+    async def fast():
+        return 'fresh'
+
+    async def run():
+        impatient = asyncio.create_task(flight.do('apple', slow, timeout=0.02))
+        cancelled = asyncio.create_task(flight.do('apple', slow))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        # 还有一个调用者在等待，计算继续
+        assert events == [] and flight.stats()['in_flight'] == 1
+        results = await asyncio.gather(impatient, cancelled, return_exceptions=True)
+        await asyncio.sleep(0)
+        # 最后一个调用者超时离开后计算被取消，键随即移除
+        assert events == ['cancelled'] and flight.stats()['in_flight'] == 0
+        return results + [await flight.do('apple', fast)]
+
+    impatient, cancelled, fresh = asyncio.run(run())
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert fresh == 'fresh'
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+拼写纠错索引测试
+"""
+import os
+import sys
+import tempfile
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.dictionary.suggestion_index import MAX_DISTANCE, SuggestionIndex, osa_distance
+
+ROWS = [
+    ('receive', 900), ('deceive', 5000), ('relieve', 3000), ('believe', 200),
+    ('word', 50), ('world', 80), ('sword', 4000), ('ward', 2000),
+    ('ice cream', 10), ('Word', 60),
+]
+
+
+def test_all_single_edits_are_suggested():
+    index = SuggestionIndex.build(ROWS)
+    # 词组不收录，大小写不同的重复单词只保留排名靠前的一个
+    assert 'ice cream' not in index.words and index.words.count('word') == 1
+
+    assert index.suggest('recieve')[0] == 'receive'     # 相邻交换
+    assert index.suggest('receeve') == ['receive']       # 替换
+    assert index.suggest('receve') == ['receive']        # 缺字母
+    assert index.suggest('recceive') == ['receive']      # 多字母
+    # 编辑距离相同时按词频排名排序
+    assert index.suggest('wxrd') == ['word', 'ward']
+    assert index.suggest('word') == ['world', 'ward', 'sword']
+    # 超出 MAX_DISTANCE 的单词不作为建议
+    assert MAX_DISTANCE == 1 and index.suggest('rekeeve') == []
+
+
+def test_save_and_load_round_trip():
+    index = SuggestionIndex.build(ROWS)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'ecdict.suggest')
+        index.save(path)
+        loaded = SuggestionIndex.load(path)
+    assert loaded.words == index.words
+    assert loaded.ranks == index.ranks and loaded.hashes == index.hashes and loaded.postings == index.postings
+    assert loaded.suggest('recieve') == index.suggest('recieve')
+
+
+def test_osa_distance():
+    assert osa_distance('receive', 'recieve', max_distance=2) == 1
+    assert osa_distance('word', 'ward', max_distance=2) == 1
+    assert osa_distance('receive', 'rekeeve', max_distance=2) == 2
+    assert osa_distance('receive', 'xyz', max_distance=2) == 3
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+虚拟单词表测试
+用合成的 ecdict.db 验证筛选条件、stardict_tag 表与全表扫描结果一致，以及磁盘缓存的复用和失效
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.dictionary.ecdict_convert import SCHEMA, build_filter_indexes
+from bot.services.virtual_wordlists import VirtualWordlistStore
+
+# (word, collins, oxford, tag, frq)
+ROWS = [
+    ('abandon', 3, 1, 'cet4 cet6 ky', 5000),
+    ('Abandon', 3, 1, 'cet6', 5000),
+    ('zeal', 2, 0, 'cet6 gre', 15000),
+    ('mitigate', 3, 0, 'cet6 ielts', 18000),
+    ('obscure', 4, 0, 'cet6', 25000),
+    ('the', 5, 1, 'zk gk', 1),
+    ('qzx', 0, 0, '', None),
+]
+
+
+def _build_sqlite(path, with_tags):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        'INSERT INTO stardict (word, sw, collins, oxford, tag, frq) VALUES (?, ?, ?, ?, ?, ?)',
+        [(row[0], row[0].lower()) + row[1:] for row in ROWS]
+    )
+    if with_tags:
+        build_filter_indexes(conn)
+    conn.commit()
+    conn.close()
+
+
+def test_filters_with_and_without_tag_table():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = []
+        for with_tags in (True, False):
+            db_path = os.path.join(tmp_dir, f'ecdict_{with_tags}.db')
+            _build_sqlite(db_path, with_tags)
+            store = VirtualWordlistStore(db_path, os.path.join(tmp_dir, f'wordlists_{with_tags}'))
+            results.append({key: store.get_words(key) for key in ('cet6', 'cet6_core', 'oxford', 'frq5k', 'zk')})
+
+        # 没有 stardict_tag 表时退回全表扫描，结果相同
+        assert results[0] == results[1]
+        words = results[0]
+        # 大小写不同的词条只保留一个，按字母排序
+        assert words['cet6'] == ['abandon', 'mitigate', 'obscure', 'zeal']
+        assert words['cet6_core'] == ['abandon', 'mitigate']
+        assert words['oxford'] == ['abandon', 'the']
+        assert words['frq5k'] == ['abandon', 'the']
+        assert words['zk'] == ['the']
+
+
+def test_cache_file_is_reused_until_dictionary_changes():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'ecdict.db')
+        cache_dir = os.path.join(tmp_dir, 'wordlists')
+        _build_sqlite(db_path, with_tags=True)
+        assert VirtualWordlistStore(db_path, cache_dir).get_words('cet6_core') == ['abandon', 'mitigate']
+        assert os.path.exists(os.path.join(cache_dir, 'cet6_core.wl'))
+
+        # 新进程直接读取缓存文件，不再查询词典
+        store = VirtualWordlistStore(db_path, cache_dir)
+        generated = []
+        generate = store._generate
+        store._generate = lambda key: generated.append(key) or generate(key)
+        assert store.cached_count('cet6_core') == 2 and store.cached_count('gre') == 0
+        assert store.get_words('cet6_core') == ['abandon', 'mitigate'] and generated == []
+        assert store.get_words('unknown') == []
+
+        # 词典文件变化后缓存失效，重新生成
+        conn = sqlite3.connect(db_path)
+        conn.execute('INSERT INTO stardict (word, sw, collins, tag, frq) VALUES (?, ?, ?, ?, ?)',
+                     ('ameliorate', 'ameliorate', 3, 'cet6', 19000))
+        build_filter_indexes(conn)
+        conn.commit()
+        conn.close()
+        store = VirtualWordlistStore(db_path, cache_dir)
+        assert store.cached_count('cet6_core') == 0
+        assert store.get_words('cet6_core') == ['abandon', 'ameliorate', 'mitigate']
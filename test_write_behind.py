@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+写后队列测试
+"""
+import os
+import sys
+import tempfile
+import threading
+
+# 添加项目路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from bot.models.pool import ConnectionPool
+from bot.models.write_behind import WriteBehindQueue
+
+INSERT = 'INSERT INTO events (chat_id, word) VALUES (?, ?)'
+COUNT = 'INSERT INTO counters (word, hits) VALUES (?1, ?2) ON CONFLICT(word) DO UPDATE SET hits = hits + ?2'
+
+
+def _open(tmp_dir):
+    pool = ConnectionPool(os.path.join(tmp_dir, 'queue.db'), size=2)
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE events (chat_id INTEGER NOT NULL, word TEXT NOT NULL)')
+        conn.execute('CREATE TABLE counters (word TEXT PRIMARY KEY, hits INTEGER NOT NULL)')
+    return pool
+
+
+def _rows(pool, sql):
+    with pool.connection() as conn:
+        return conn.execute(sql).fetchall()
+
+
+def test_group_commit_and_counter_merge():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = _open(tmp_dir)
+        queue = WriteBehindQueue(pool, flush_interval=60, max_rows=1000)
+        for i in range(100):
+            queue.enqueue(INSERT, (1, f'w{i}'))
+            queue.increment(COUNT, ('apple',))
+        # 同一 key 的增量合并为一行
+        assert queue.depth() == 101
+        assert queue.flush() == 101
+        assert queue.flush_count == 1 and queue.depth() == 0
+        assert _rows(pool, 'SELECT COUNT(*) FROM events') == [(100,)]
+        assert _rows(pool, 'SELECT hits FROM counters') == [(100,)]
+
+        # 关闭时写入剩余数据
+        queue.enqueue(INSERT, (2, 'last'))
+        queue.close()
+        assert _rows(pool, 'SELECT COUNT(*) FROM events WHERE chat_id = 2') == [(1,)]
+        pool.close()
+
+
+def test_concurrent_enqueue_is_not_lost():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = _open(tmp_dir)
+        queue = WriteBehindQueue(pool, flush_interval=0.01, max_rows=50)
+
+        def produce(chat_id):
+            for i in range(200):
+                queue.enqueue(INSERT, (chat_id, f'w{i}'))
+
+        threads = [threading.Thread(target=produce, args=(chat_id,)) for chat_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        queue.close()
+        assert _rows(pool, 'SELECT COUNT(*) FROM events') == [(800,)]
+        pool.close()
+
+
+def test_bad_row_is_dropped_after_retries():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool = _open(tmp_dir)
+        queue = WriteBehindQueue(pool, flush_interval=60, max_rows=1000, max_retries=2)
+        queue.enqueue(INSERT, (1, 'good'))
+        # NOT NULL 约束失败，整批事务回滚
+        queue.enqueue(INSERT, (1, None))
+        queue.increment(COUNT, ('apple',))
+
+        assert queue.flush() == 0 and queue.depth() == 3
+        queue.enqueue(INSERT, (1, 'later'))
+        assert queue.flush() == 0 and queue.depth() == 4
+        # 达到重试上限后逐行写入，只丢弃坏行
+        assert queue.flush() == 3
+        assert queue.dropped_rows == 1 and queue.depth() == 0
+        assert sorted(_rows(pool, 'SELECT word FROM events')) == [('good',), ('later',)]
+        assert _rows(pool, 'SELECT hits FROM counters') == [(1,)]
+
+        # 之后恢复为整批提交
+        queue.enqueue(INSERT, (1, 'next'))
+        assert queue.flush() == 1 and queue.dropped_rows == 1
+        queue.close()
+        pool.close()
+